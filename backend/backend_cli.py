@@ -13,7 +13,8 @@ Some functions do not require a profile_name parameter, specifically those which
 do not interact with the filter in any way (for now, this is simply the setters and getters
 for profile names).
 
-Scroll down to DelegateFunctionCall() to see documentation of all supported functions.
+Scroll down to the command handlers (functions decorated with @Command) to see documentation
+of all supported functions.
 
 The input and output filter filepaths are specified in config.py.
 (Eventually these will be the same, but for testing they're distinct.)
@@ -27,13 +28,33 @@ will generate the error message:
 "ValueError: invalid literal for int() with base 10: 'a'",
 which will be logged to the log file along with the stack trace.
 
+Daemon mode:
+ > python3 backend_cli.py run_daemon
+starts a long-lived backend process that reads function calls (formatted exactly like the
+command-line arguments above) from standard input, one per line.  Parsed filters are kept
+in memory between calls, so each call does not need to re-parse the whole filter.
+See RunDaemon() for details.
+
 Testing feature:
  - Insert "TEST" as the first argument after "python3 backend_cli.py" to run tests
  - This wil write output to test output filter, rather than the PathOfExile filter path
  - This will also save all profile updates in a separate testing profile so as to not ruin
    one's real profile(s).  Used in all test_suite.py calls.
+
+Timing and profiling:
+ - If "Record Timings" is True in general.config, or the environment variable
+   DLF_RECORD_TIMINGS is set to 1, the time spent in each stage of every call is appended
+   to "backend_cli.timings" as a line of JSON (see stage_timing.py)
+ - If the environment variable DLF_CPROFILE_OUTPUT is set to a filepath, the call is run
+   under cProfile, and the profile stats are written to that file, for example:
+   > set DLF_CPROFILE_OUTPUT=backend_cli.prof
+   > python3 backend_cli.py import_downloaded_filter MyProfile
 '''
 
+# Imported first, so the time taken to import all other modules can be recorded
+import time
+kImportStartTime = time.perf_counter()
+
 from collections import OrderedDict
 import os
 from pathlib import Path
@@ -46,19 +67,26 @@ from backend_cli_function_info import kFunctionInfoMap
 import consts
 import file_helper
 from general_config import GeneralConfig, GeneralConfigKeywords
-from item import Item
+from item import Item, SplitItemTexts
 import logger
 from loot_filter import InputFilterSource, LootFilter
 from loot_filter_rule import RuleVisibility
 import profile
 import profile_changes
 import socket_helper
+import stage_timing
+import type_checker
 from type_checker import CheckType
 
 kLogFilename = os.path.join(consts.kCacheDirectory, 'backend_cli.log')
 kInputFilename = os.path.join(consts.kCacheDirectory, 'backend_cli.input')
 kOutputFilename = os.path.join(consts.kCacheDirectory, 'backend_cli.output')
 kInfoFilename = os.path.join(consts.kCacheDirectory, 'backend_cli.info')
+kTimingsFilename = os.path.join(consts.kCacheDirectory, 'backend_cli.timings')
+
+# Environment variables enabling timing and profiling (take precedence over general.config)
+kRecordTimingsEnvironmentVariable = 'DLF_RECORD_TIMINGS'
+kCProfileOutputEnvironmentVariable = 'DLF_CPROFILE_OUTPUT'
 
 def UsageMessage(function_name: str or None):
     usage_message = 'Usage synax:\n> python backend_cli.py '
@@ -79,13 +107,16 @@ def Error(e):
     raise RuntimeError(e)
 # End Error
 
+# Name of the function currently being processed by DelegateFunctionCall (used in error messages)
+g_function_name = ''
+
 def CheckNumParams(params_list: List[str], required_num_params: int):
     CheckType(params_list, 'params_list', list)
     CheckType(required_num_params, 'required_num_params', int)
     if (len(params_list) != required_num_params):
         error_message: str = ('incorrect number of parameters given for '
                               'function {}: required {}, got {}').format(
-                                   sys.argv[1], required_num_params, len(params_list))
+                                   g_function_name, required_num_params, len(params_list))
         Error(error_message)
 # End CheckNumParams
 
@@ -95,7 +126,1190 @@ def AppendFunctionOutput(function_output_string: str):
     file_helper.AppendToFile(function_output_string + '\n@\n', kOutputFilename)
 # End AppendFunctionOutput
 
-# Note: loot_filter is None iff the command does not have a profile name parameter.
+# Applies a run of consecutive set_currency_to_tier changes as a single batch.
+# Returns a list of flags indicating which of the changes were valid.
+def ApplyCurrencyTierChanges(loot_filter: LootFilter, function_params_lists: List[List[str]]):
+    valid_flags = []
+    currency_tier_pairs = []
+    for function_params in function_params_lists:
+        valid_flag = (len(function_params) == 2)
+        if (valid_flag):
+            try:
+                currency_tier_pairs.append((function_params[0], int(function_params[1])))
+            except ValueError:
+                valid_flag = False
+        valid_flags.append(valid_flag)
+    loot_filter.SetCurrenciesToTiers(currency_tier_pairs)
+    return valid_flags
+# End ApplyCurrencyTierChanges
+
+# Maps function name to a function applying a run of consecutive changes of that function
+# more efficiently than one at a time, with the same result.
+# Signature: (loot_filter, function_params_lists) -> valid_flags
+kChangeRunHandlers = {
+    'set_currency_to_tier' : ApplyCurrencyTierChanges,
+}
+
+# Applies the given Profile.changes lines to loot_filter, in order.
+# Returns the list of valid changes lines; invalid lines are logged and skipped.
+def ApplyProfileChanges(loot_filter: LootFilter, changes_lines: List[str]) -> List[str]:
+    CheckType(loot_filter, 'loot_filter', LootFilter)
+    CheckType(changes_lines, 'changes_lines', list, str)
+    changes_fullpath = loot_filter.profile_obj.config_values['ChangesFullpath']
+    def LogInvalidLine(function_call_string: str):
+        logger.Log('Warning: invalid line in {} skipped: {}'.format(
+                changes_fullpath, function_call_string))
+        file_helper.AppendToFile('Invalid .changes line skipped', kInfoFilename)
+    # End LogInvalidLine
+    # Tokenize all changes up front, grouping consecutive changes of the same function
+    # into runs of (function_name, [(function_call_string, function_params), ...])
+    change_runs = []
+    for function_call_string in changes_lines:
+        if (function_call_string == ''):
+            continue
+        try:
+            function_name, *function_params = shlex.split(function_call_string)
+        except ValueError:
+            LogInvalidLine(function_call_string)
+            continue
+        if ((len(change_runs) > 0) and (change_runs[-1][0] == function_name)):
+            change_runs[-1][1].append((function_call_string, function_params))
+        else:
+            change_runs.append((function_name, [(function_call_string, function_params)]))
+    valid_changes_lines = []
+    for function_name, changes in change_runs:
+        if (function_name in kChangeRunHandlers):
+            try:
+                valid_flags = kChangeRunHandlers[function_name](
+                        loot_filter, [function_params for _, function_params in changes])
+                for (function_call_string, _), valid_flag in zip(changes, valid_flags):
+                    if (valid_flag):
+                        valid_changes_lines.append(function_call_string)
+                    else:
+                        LogInvalidLine(function_call_string)
+                continue
+            except Exception as e:
+                # The handler leaves the filter unmodified on failure, so we can
+                # fall back to applying the changes one at a time
+                logger.Log('Warning: failed to apply {} changes as a batch: {}'.format(
+                        function_name, e))
+        for function_call_string, function_params in changes:
+            try:
+                DelegateFunctionCall(loot_filter, function_name, function_params,
+                                     in_batch = True, suppress_output = True)
+                valid_changes_lines.append(function_call_string)
+            except:
+                LogInvalidLine(function_call_string)
+    return valid_changes_lines
+# End ApplyProfileChanges
+
+# ==================================== Command Registry ====================================
+
+# Map of function name -> handler function, populated by the @Command decorator below.
+# Every handler has the signature: (loot_filter, function_params) -> output_string, where:
+#  - loot_filter is None iff the command does not have a profile name parameter
+#  - function_params is the list of parameters (excluding function name and profile name),
+#    which handlers may modify (for example, to add default arguments), since the
+#    possibly modified parameters are what is saved to the Profile.changes file
+#  - output_string is the function's output, or None if it has no output
+# The handler documentation (docstring) describes the command-line syntax of each function.
+g_command_handlers = {}
+
+# Names of functions that cannot be called within run_batch or when applying profile changes
+g_non_batch_function_names = set()
+
+# Decorator registering the decorated function as the handler for the given function names,
+# each of which must be a function described in kFunctionInfoMap.
+def Command(*function_names: str, allow_in_batch: bool = True):
+    CheckType(allow_in_batch, 'allow_in_batch', bool)
+    for function_name in function_names:
+        CheckType(function_name, 'function_name', str)
+        if (function_name not in kFunctionInfoMap):
+            raise RuntimeError('command {} is not in kFunctionInfoMap'.format(function_name))
+        if (function_name in g_command_handlers):
+            raise RuntimeError('command {} is registered more than once'.format(function_name))
+    def RegisterHandler(handler_function):
+        for function_name in function_names:
+            g_command_handlers[function_name] = handler_function
+            if (not allow_in_batch):
+                g_non_batch_function_names.add(function_name)
+        return handler_function
+    # End RegisterHandler
+    return RegisterHandler
+# End Command
+
+# Returns the handler registered for the given function name, or None if there is none
+# (or if in_batch is True and the function cannot be called in batch).
+def GetCommandHandler(function_name: str, in_batch: bool = False):
+    if (in_batch and (function_name in g_non_batch_function_names)):
+        return None
+    return g_command_handlers.get(function_name)
+# End GetCommandHandler
+
+# ==================================== Command Handlers ====================================
+
+@Command('is_first_launch')
+def IsFirstLaunchCommand(loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    is_first_launch
+     - Output: "1" if this is the first launch of the program (i.e. requires setup),
+       "0" otherwise
+     - It is considered first launch iff there are no profiles
+     - Example: > python3 backend_cli.py is_first_launch
+    '''
+    CheckNumParams(function_params, 0)
+    profile_names_list = profile.GetAllProfileNames()
+    is_first_launch_flag: bool = (len(profile_names_list) == 0)
+    return str(int(is_first_launch_flag))
+# End IsFirstLaunchCommand
+
+# ===================================== General Config =====================================
+
+@Command('set_hotkey')
+def SetHotkeyCommand(loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    set_hotkey <hotkey_identifier: str> <hotkey_string: str>
+     - hotkey_identifier is the label found in general.config before the ':' character,
+       for example "Toggle GUI Hotkey"
+     - hotkey_string is the AHK-syntax desired hotkey string
+     - Example: > python3 set_hotkey "Write Filter Hotkey" "^+S"
+    '''
+    CheckNumParams(function_params, 2)
+    hotkey_identifier, hotkey_string = function_params
+    if (hotkey_identifier not in GeneralConfigKeywords.kHotkeysList):
+        raise RuntimeError('invalid hotkey identifier: "{}"'.format(hotkey_identifier))
+    general_config_obj = GeneralConfig()
+    general_config_obj.keyword_value_dict[hotkey_identifier] = hotkey_string
+    general_config_obj.SaveToFile()
+# End SetHotkeyCommand
+
+@Command('get_all_hotkeys')
+def GetAllHotkeysCommand(loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    get_all_hotkeys
+     - Outputs a sequence of lines, each formatted as <hotkey_identifier>;<hotkey_string>
+     - Example: > python3 backend_cli.py get_all_hotkeys
+    '''
+    output_string = ''
+    CheckNumParams(function_params, 0)
+    general_config_obj = GeneralConfig()
+    config_dict = general_config_obj.keyword_value_dict
+    output_string += '\n'.join('{};{}'.format(identifier, config_dict[identifier])
+            for identifier in GeneralConfigKeywords.kHotkeysList)
+    return output_string
+# End GetAllHotkeysCommand
+
+# ================================== Check Filters Exist ==================================
+
+@Command('check_filters_exist')
+def CheckFiltersExistCommand(loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    check_filters_exist
+     - Outputs a sequence of integer flags (1 or 0), one per line, indicating whether
+       each of the following filters exist:
+        - Downloaded filter
+        - Input filter
+        - Output filter
+     - Example: > python3 backend_cli.py check_filters_exist MyProfile
+    '''
+    output_string = ''
+    CheckNumParams(function_params, 1)
+    config_values = profile.Profile(function_params[0]).config_values
+    downloaded_filter_exists = os.path.isfile(config_values['DownloadedLootFilterFullpath'])
+    input_filter_exists = os.path.isfile(config_values['InputLootFilterFullpath'])
+    output_filter_exists = os.path.isfile(config_values['OutputLootFilterFullpath'])
+    output_string += '\n'.join(str(int(flag)) for flag in
+            (downloaded_filter_exists, input_filter_exists, output_filter_exists))
+    return output_string
+# End CheckFiltersExistCommand
+
+# ================================= Import / Reload Filter =================================
+
+@Command('import_downloaded_filter', 'load_input_filter', allow_in_batch=False)
+def ImportDownloadedFilterCommand(loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    import_downloaded_filter
+     - Copies or moves the downloaded filter to the input directory (depending on profile
+       config), parses the input filter, adds DLF-generated rules, applies profile changes,
+       and writes the final result to the output filter
+     - Filters out invalid and obsolete changes and updates profile .changes file accordingly
+     - Output: None
+     - Example: > python3 backend_cli.py import_downloaded_filter MyProfile
+
+    load_input_filter
+     - Parses the input filter, adds DLF-generated rules, applies profile changes,
+       and writes the final result to the output filter
+     - Output: None
+     - Example: > python3 bacend_cli.py load_input_filter MyProfile
+    '''
+    config_values = loot_filter.profile_obj.config_values
+    CheckNumParams(function_params, 0)
+    # Obsolete changes are removed first, so changes are applied exactly as compacted
+    changes_lines: List[str] = profile_changes.GetCompactedProfileChanges(
+            loot_filter.profile_obj.name)
+    # Changes are applied in backend_cli rather than within the LootFilter class,
+    # because they are formatted as backend_cli calls within the Profile.changes file.
+    with stage_timing.TimeStage('apply_profile_changes'):
+        valid_changes_lines = ApplyProfileChanges(loot_filter, changes_lines)
+    # Update .changes file to only contain valid_changes_lines
+    with stage_timing.TimeStage('update_changes_file'):
+        file_helper.AtomicWriteToFile(
+                valid_changes_lines, config_values['ChangesFullpath'], fsync_flag=True)
+        profile_changes.RecordCompactedSize(loot_filter.profile_obj.name)
+    loot_filter.SaveToFile()
+# End ImportDownloadedFilterCommand
+
+# ======================================= Run Batch =======================================
+
+@Command('run_batch', allow_in_batch=False)
+def RunBatchCommand(loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    run_batch
+     - Runs the batch of functions specified in file backend_cli.input
+     - Format is one function call per line, given as: <function_name> <function_params...>
+     - Output: concatenation of the outputs of all the functions, with each function output
+       separated by the line containing the single character: `@`
+     - Example: > python3 run_batch MyProfile
+    '''
+    CheckNumParams(function_params, 0)
+    # Clear the output file, since we will be appending output in batch
+    file_helper.WriteToFile('', kOutputFilename)
+    contains_mutator = False
+    function_call_list: List[str] = file_helper.ReadFile(kInputFilename, strip=True)
+    for function_call_string in function_call_list:
+        if (function_call_string == ''):
+            continue
+        # need different variable names here to not overwrite the existing ones
+        _function_name, *_function_params = shlex.split(function_call_string)
+        contains_mutator = kFunctionInfoMap[_function_name].get('ModifiesFilter', False)
+        try:
+            DelegateFunctionCall(loot_filter, _function_name, _function_params,
+                                 in_batch = True, suppress_output = False)
+        except:
+            logger.Log('Warning: invalid line in run_batch input skipped: {}'.format(
+                    function_call_string))
+            file_helper.AppendToFile('Invalid batch line skipped', kInfoFilename)
+    # Check if batch contained a mutator and save filter if so
+    if (contains_mutator):
+        loot_filter.SaveToFile()
+# End RunBatchCommand
+
+# ===================================== Filter Snapshot =====================================
+
+# Version of the get_filter_snapshot output format: incremented whenever sections are
+# added, removed, or reformatted, so the GUI can detect a backend it does not understand.
+kFilterSnapshotVersion = 1
+
+# Kinds of get_filter_snapshot sections
+kSnapshotScalar = 'scalar'  # single value
+kSnapshotDict = 'dict'  # lines formatted as <key>;<value>
+kSnapshotSet = 'set'  # lines used as keys in full, with value 1
+
+# (section_name, kind, getter function_name) triplets: each section holds the output of the
+# given getter (a function without parameters), in the order in which the GUI queries them.
+kFilterSnapshotSections = [
+    ('currency_to_tier_dict', kSnapshotDict, 'get_all_currency_tiers'),
+    ('currency_tier_min_visible_stack_sizes', kSnapshotDict,
+            'get_all_currency_tier_min_visible_stack_sizes'),
+    ('splinter_min_visible_stack_sizes', kSnapshotDict,
+            'get_all_splinter_min_visible_stack_sizes'),
+    ('chaos_recipe_statuses', kSnapshotDict, 'get_all_chaos_recipe_statuses'),
+    ('hide_maps_below_tier', kSnapshotScalar, 'get_hide_maps_below_tier'),
+    ('hide_essences_above_tier', kSnapshotScalar, 'get_hide_essences_above_tier'),
+    ('hide_div_cards_above_tier', kSnapshotScalar, 'get_hide_div_cards_above_tier'),
+    ('hide_unique_items_above_tier', kSnapshotScalar, 'get_hide_unique_items_above_tier'),
+    ('hide_unique_maps_above_tier', kSnapshotScalar, 'get_hide_unique_maps_above_tier'),
+    ('lowest_visible_oil', kSnapshotScalar, 'get_lowest_visible_oil'),
+    ('visible_basetypes', kSnapshotSet, 'get_all_visible_basetypes'),
+    ('visible_flasks', kSnapshotDict, 'get_all_visible_flasks'),
+    ('socket_rules', kSnapshotSet, 'get_all_added_socket_rules'),
+    ('gem_min_quality', kSnapshotScalar, 'get_gem_min_quality'),
+    ('flask_min_quality', kSnapshotScalar, 'get_flask_min_quality'),
+    ('rgb_item_max_size', kSnapshotScalar, 'get_rgb_item_max_size'),
+]
+
+@Command('get_filter_snapshot')
+def GetFilterSnapshotCommand(loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    get_filter_snapshot
+     - Output: all filter data displayed by the GUI, as tab-separated lines:
+        - the first line is: `version<tab><version: int>`
+        - a scalar section is the line: `<section_name><tab><value>`
+        - a dict section is the line `<section_name>`, followed by one line per entry:
+          `<section_name><tab><key><tab><value>`
+     - Sections hold the outputs of the corresponding getters, so the order of lines
+       (other than the version line) carries no meaning.  Sections (kFilterSnapshotSections):
+        - currency_to_tier_dict, currency_tier_min_visible_stack_sizes,
+          splinter_min_visible_stack_sizes, chaos_recipe_statuses, visible_flasks:
+          dicts with the <key>;<value> lines of the corresponding getters as entries
+        - visible_basetypes, socket_rules: dicts with the full lines of the corresponding
+          getters as keys, each with value 1
+        - hide_maps_below_tier, hide_essences_above_tier, hide_div_cards_above_tier,
+          hide_unique_items_above_tier, hide_unique_maps_above_tier, lowest_visible_oil,
+          gem_min_quality, flask_min_quality, rgb_item_max_size: scalars
+     - Example: > python3 backend_cli.py get_filter_snapshot MyProfile
+    '''
+    CheckNumParams(function_params, 0)
+    output_lines = ['version\t{}'.format(kFilterSnapshotVersion)]
+    for section_name, section_kind, getter_function_name in kFilterSnapshotSections:
+        getter_output = g_command_handlers[getter_function_name](loot_filter, [])
+        if (section_kind == kSnapshotScalar):
+            output_lines.append(section_name + '\t' + getter_output)
+            continue
+        output_lines.append(section_name)
+        for line in getter_output.split('\n'):
+            if (line == ''):
+                continue
+            if (section_kind == kSnapshotDict):
+                key, value = line.split(';', 1)
+            else:
+                key, value = line, '1'
+            output_lines.append('\t'.join((section_name, key, value)))
+    return '\n'.join(output_lines)
+# End GetFilterSnapshotCommand
+
+# ========================================== Profile ==========================================
+
+@Command('get_all_profile_names')
+def GetAllProfileNamesCommand(loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    get_all_profile_names
+     - Output: newline-separated list of all profile names, with currently active profile first
+     - Example: > python3 backend_cli.py get_all_profile_names
+    '''
+    output_string = ''
+    CheckNumParams(function_params, 0)
+    profile_names_list = profile.GetAllProfileNames()
+    output_string += '\n'.join(profile_names_list)
+    return output_string
+# End GetAllProfileNamesCommand
+
+@Command('create_new_profile')
+def CreateNewProfileCommand(loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    create_new_profile <new_profile_name>
+     - Creates a new profile from the config values given in backend_cli.input
+     - Each input line takes the form: "<keyword>:<value>", with keywords defined in profile.py
+     - Required keywords: 'DownloadDirectory', 'PathOfExileDirectory', 'DownloadedLootFilterFilename'
+     - Does nothing if a profile with the given new_profile_name already exists
+     - Output: "1" if the new profile was created, "0" otherwise
+     - Example: > python3 backend_cli.py create_new_profile MyProfile
+    '''
+    output_string = ''
+    CheckNumParams(function_params, 1)
+    new_profile_name = function_params[0]
+    config_values: dict = file_helper.ReadFileToDict(kInputFilename)
+    created_profile = profile.CreateNewProfile(new_profile_name, config_values)
+    output_string += str(int(created_profile != None))
+    return output_string
+# End CreateNewProfileCommand
+
+@Command('rename_profile')
+def RenameProfileCommand(loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    rename_profile <original_profile_name> <new_profile_name>
+     - Renames a profile, renaming all the corresponding config files,
+     - Updates general.config if needed
+     - Raises an error if the profile original_profile_name does not exist
+     - Example: > python3 backend_cli.py rename_profile MyProfile MyFancyProfile
+    '''
+    CheckNumParams(function_params, 2)
+    original_profile_name, new_profile_name = function_params
+    profile.RenameProfile(original_profile_name, new_profile_name)
+# End RenameProfileCommand
+
+@Command('delete_profile')
+def DeleteProfileCommand(loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    delete_profile <profile_name>
+     - Deletes the given profile, removing all corresponding config files
+     - Updates general.config if needed
+     - Raises an error if the profile profile_name does not exist
+     - Example: > python3 backend_cli.py delete_profile MyProfile
+    '''
+    CheckNumParams(function_params, 1)
+    profile_name = function_params[0]
+    profile.DeleteProfile(profile_name)
+# End DeleteProfileCommand
+
+@Command('set_active_profile')
+def SetActiveProfileCommand(loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    set_active_profile <new_active_profile_name>
+     - Raises an error if new_active_profile_name does not exist
+     - Output: None
+     - Example: > python3 backend_cli.py set_active_profile MyFancyProfile
+    '''
+    CheckNumParams(function_params, 1)
+    profile.SetActiveProfile(function_params[0])
+# End SetActiveProfileCommand
+
+# ====================================== Rule Matching ======================================
+
+@Command('get_rule_matching_item')
+def GetRuleMatchingItemCommand(loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    TODO: this is probably broken with refactor.
+    get_rule_matching_item
+     - Takes an item text as input in backend_cli.input
+     - Finds the rule in the PoE filter matching the item and writes it to backend_cli.output
+     - The first two lines of output will be `type_tag:<type_tag>` and `tier_tag:<tier_tag>`,
+       these two tags together form a unique key for the rule
+     - Ignores rules with AreaLevel conditions, as well as many other niche keywords
+     - Socket rules only implemented as numeric counting for now, ignores color requirements
+     - Example: > python3 backend_cli.py get_rule_matching_item MyProfile
+    '''
+    CheckNumParams(function_params, 0)
+    item_text_lines: List[str] = file_helper.ReadFile(kInputFilename, strip=True)
+    matched_rule = loot_filter.GetRuleMatchingItem(Item(item_text_lines))
+    output_string = ''
+    if (matched_rule != None):
+        output_string = 'type_tag:{}\ntier_tag:{}\n'.format(
+                matched_rule.type_tag, matched_rule.tier_tag)
+        output_string += '\n'.join(matched_rule.rule_text_lines)
+    return output_string
+# End GetRuleMatchingItemCommand
+
+@Command('get_rules_matching_items')
+def GetRulesMatchingItemsCommand(loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    get_rules_matching_items
+     - Takes any number of item texts as input in backend_cli.input, each preceded by a
+       line beginning with "========" (the separator line is optional for the first item)
+     - Finds the rule in the PoE filter matching each item, parsing the filter only once
+     - Output: one line per item, in input order, of the form: "<type_tag>;<tier_tag>",
+       or ";" if no rule matches the item or the item text could not be parsed
+     - Same matching limitations as get_rule_matching_item
+     - Example: > python3 backend_cli.py get_rules_matching_items MyProfile
+    '''
+    CheckNumParams(function_params, 0)
+    item_text_strings = SplitItemTexts(file_helper.ReadFile(kInputFilename, strip=True))
+    items = []
+    for item_text in item_text_strings:
+        try:
+            items.append(Item(item_text))
+        except Exception as e:
+            logger.Log('Warning: failed to parse item text: {}\n{}'.format(e, item_text))
+            items.append(None)
+    matched_rules_iter = iter(loot_filter.GetRulesMatchingItems(
+            [item for item in items if item != None]))
+    output_lines = []
+    for item in items:
+        matched_rule = next(matched_rules_iter) if (item != None) else None
+        output_lines.append(';' if (matched_rule == None)
+                else '{};{}'.format(matched_rule.type_tag, matched_rule.tier_tag))
+    return '\n'.join(output_lines)
+# End GetRulesMatchingItemsCommand
+
+@Command('set_rule_visibility')
+def SetRuleVisibilityCommand(loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    set_rule_visibility <type_tag: str> <tier_tag: str> <visibility: {show, hide, disable}>
+     - Shows, hides, or disables the rule specified by the given type and tier tags
+     - The visibility parameter is one of: `show`, `hide`, `disable`
+     - Output: None (could output rule_found_flag if needed)
+     - Example > python3 backend_cli.py set_rule_visibility "rare->redeemer" t12 show
+     - Note: quotes (either type) are necessary for tags containing a ">" character,
+       since the shell will normally iterpret as the output redirection signal
+     - Example: > python3 backend_cli.py set_rule_visibility uniques 5link disable MyProfile
+    '''
+    CheckNumParams(function_params, 3)
+    type_tag, tier_tag, visibility_string = function_params
+    visibility_map = {
+            'show': RuleVisibility.kShow,
+            'hide': RuleVisibility.kHide,
+            'disable': RuleVisibility.kDisabledAny}
+    loot_filter.GetRule(type_tag, tier_tag).SetVisibility(visibility_map[visibility_string])
+# End SetRuleVisibilityCommand
+
+# ======================================== Currency ========================================
+
+@Command('set_currency_to_tier')
+def SetCurrencyToTierCommand(loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    set_currency_to_tier <currency_name: str> <tier: int>
+     - Moves the given currency type to the specified tier for all unstacked and stacked rules
+     - Output: None
+     - Example: > python3 backend_cli.py set_currency_to_tier "Chromatic Orb" 5 MyProfile
+    '''
+    CheckNumParams(function_params, 2)
+    currency_name: str = function_params[0]
+    target_tier: int = int(function_params[1])
+    loot_filter.SetCurrencyToTier(currency_name, target_tier)
+# End SetCurrencyToTierCommand
+
+@Command('get_tier_of_currency')
+def GetTierOfCurrencyCommand(loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    get_tier_of_currency <currency_name: str>
+     - Output: tier (int) containing the given currency type
+     - Example: > python3 backend_cli.py get_tier_of_currency "Chromatic Orb" MyProfile
+    '''
+    CheckNumParams(function_params, 1)
+    currency_name: str = function_params[0]
+    return str(loot_filter.GetTierOfCurrency(currency_name))
+# End GetTierOfCurrencyCommand
+
+@Command('get_all_currency_tiers')
+def GetAllCurrencyTiersCommand(loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    get_all_currency_tiers
+     - Output: newline-separated sequence of `<currency_name: str>;<tier: int>`
+     - Example: > python3 backend_cli.py get_all_currency_tiers MyProfile
+    '''
+    output_string = ''
+    CheckNumParams(function_params, 0)
+    for tier in range(1, consts.kNumCurrencyTiersExcludingScrolls + 1):
+        currency_names = loot_filter.GetAllCurrencyInTier(tier)
+        output_string += ''.join((currency_name + ';' + str(tier) + '\n')
+                                    for currency_name in currency_names)
+    if (output_string[-1] == '\n'): output_string = output_string[:-1]  # remove final newline
+    return output_string
+# End GetAllCurrencyTiersCommand
+
+@Command('set_currency_tier_min_visible_stack_size')
+def SetCurrencyTierMinVisibleStackSizeCommand(
+        loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    set_currency_tier_min_visible_stack_size <tier: int or string> <stack_size: int or "hide_all">
+     - Shows currency stacks >= stack_size and hides stacks < stack_size for the given tier
+     - If stack_size is "hide_all", all currency of the given tier will be hidden
+     - Valid stack_size values: {1, 2, 4} for tiers 1-7, {1, 2, 4, 6} for tiers 8-9 and scrolls
+     - tier is an integer [1-9] or "tportal"/"twisdom" for Portal/Wisdom Scrolls
+     - Output: None
+     - Example: > python3 backend_cli.py set_currency_min_visible_stack_size 7 6 MyProfile
+     - Example: > python3 backend_cli.py set_currency_min_visible_stack_size twisdom hide_all MyProfile
+    '''
+    CheckNumParams(function_params, 2)
+    tier_str: str = function_params[0]
+    min_stack_size_str: str = function_params[1]
+    loot_filter.SetCurrencyTierMinVisibleStackSize(tier_str, min_stack_size_str)
+# End SetCurrencyTierMinVisibleStackSizeCommand
+
+@Command('get_currency_tier_min_visible_stack_size')
+def GetCurrencyTierMinVisibleStackSizeCommand(
+        loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    get_currency_tier_min_visible_stack_size <tier: int or str>
+     - "tier" is an int, or "tportal"/"twisdom" for portal/wisdom scrolls
+     - Output: min visible stack size for the given currency tier
+     - Example: > python3 backend_cli.py get_currency_tier_min_visible_stack_size 4 MyProfile
+     - Example: > python3 backend_cli.py get_currency_tier_min_visible_stack_size twisdom MyProfile
+    '''
+    CheckNumParams(function_params, 1)
+    tier_str: str = function_params[0]
+    stack_size_int = loot_filter.GetCurrencyTierMinVisibleStackSize(tier_str)
+    return consts.kCurrencyStackSizeIntToStringMap[stack_size_int]
+# End GetCurrencyTierMinVisibleStackSizeCommand
+
+@Command('get_all_currency_tier_min_visible_stack_sizes')
+def GetAllCurrencyTierMinVisibleStackSizesCommand(
+        loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    get_all_currency_tier_min_visible_stack_sizes
+     - Output: newline-separated sequence of `<tier: int>;<min_visible_stack_size: int>`
+     - Example: > python3 backend_cli.py get_all_currency_tier_min_visible_stack_sizes MyProfile
+    '''
+    output_string = ''
+    CheckNumParams(function_params, 0)
+    tier_strings = ([str(i) for i in range(1, consts.kNumCurrencyTiersExcludingScrolls + 1)] +
+            ['tportal', 'twisdom'])
+    stack_size_ints = [loot_filter.GetCurrencyTierMinVisibleStackSize(tier_string)
+            for tier_string in tier_strings]
+    stack_size_strings = [consts.kCurrencyStackSizeIntToStringMap[stack_size_int]
+            for stack_size_int in stack_size_ints]
+    output_string += '\n'.join('{};{}'.format(*pair)
+            for pair in zip(tier_strings, stack_size_strings))
+    return output_string
+# End GetAllCurrencyTierMinVisibleStackSizesCommand
+
+# ======================================== Splinters ========================================
+
+@Command('set_splinter_min_visible_stack_size')
+def SetSplinterMinVisibleStackSizeCommand(
+        loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    set_splinter_min_visible_stack_size <base_type: str> <stack_size: int>
+     - Shows splinter stacks >= stack_size and hides stacks < stack_size for the given base_type
+     - Valid stack_size values are {1, 2, 4, 8} (consts.kDlfSplinterStackSizes)
+     - Output: None
+     - Example: > python3 backend_cli.py set_splinter_min_visible_stack_size "Splinter of Esh" 4 MyProfile
+    '''
+    CheckNumParams(function_params, 2)
+    splinter_base_type, stack_size_string = function_params
+    loot_filter.SetSplinterMinVisibleStackSize(splinter_base_type, int(stack_size_string))
+# End SetSplinterMinVisibleStackSizeCommand
+
+@Command('get_splinter_min_visible_stack_size')
+def GetSplinterMinVisibleStackSizeCommand(
+        loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    get_splinter_min_visible_stack_size <base_type: str>
+     - Output: min visible stack size for the given base_type
+     - Example: > python3 backend_cli.py get_splinter_min_visible_stack_size "Splinter of Esh" MyProfile
+    '''
+
+
+    CheckNumParams(function_params, 1)
+    splinter_base_type = function_params[0]
+    return str(loot_filter.GetSplinterMinVisibleStackSize(splinter_base_type))
+# End GetSplinterMinVisibleStackSizeCommand
+
+@Command('get_all_splinter_min_visible_stack_sizes')
+def GetAllSplinterMinVisibleStackSizesCommand(
+        loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    get_all_splinter_min_visible_stack_sizes
+     - Output: newline-separated sequence of `<base_type: str>;<stack_size: int>`
+     - Example: > python3 backend_cli.py get_all_splinter_min_visible_stack_sizes MyProfile
+    '''
+    CheckNumParams(function_params, 0)
+    # Track found splinter types, not found means min visible stack size is 1
+    found_splinter_base_types = set()
+    output_list = []
+    for stack_size in consts.kDlfSplinterStackSizes:
+        splinter_base_types = loot_filter.GetSplintersHiddenBelow(stack_size)
+        found_splinter_base_types.update(splinter_base_types)
+        output_list += [(base_type, stack_size) for base_type in splinter_base_types]
+    all_splinter_base_types = file_helper.ReadFile(
+            consts.kSplinterBaseTypesListFullpath, strip=True)
+    for splinter_base_type in all_splinter_base_types:
+        if (splinter_base_type not in found_splinter_base_types):
+            output_list.append((splinter_base_type, 1))
+    return '\n'.join('{};{}'.format(*pair) for pair in output_list)
+# End GetAllSplinterMinVisibleStackSizesCommand
+
+# ========================================= Essences =========================================
+
+@Command('get_all_essence_tier_visibilities')
+def GetAllEssenceTierVisibilitiesCommand(
+        loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    get_all_essence_tier_visibilities
+     - Output: newline-separated sequence of `<tier>;<visible_flag>`, one per tier
+     - <tier> is an integer representing the tier, <visibile_flag> is 1/0 for True/False
+     - Example: > python3 backend_cli.py get_all_essence_tier_visibilities MyProfile
+    '''
+    output_string = ''
+    CheckNumParams(function_params, 0)
+    for tier in range(1, consts.kNumEssenceTiers + 1):
+        output_string += str(tier) + ';' + str(int(
+                loot_filter.GetEssenceTierVisibility(tier) == RuleVisibility.kShow)) + '\n'
+    if (output_string[-1] == '\n'): output_string = output_string[:-1]  # remove final newline
+    return output_string
+# End GetAllEssenceTierVisibilitiesCommand
+
+@Command('set_hide_essences_above_tier')
+def SetHideEssencesAboveTierCommand(loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    set_hide_essences_above_tier <tier: int>
+     - Sets the essence tier "above" which all will be hidden
+       (higher essence tiers are worse)
+     - Output: None
+     - Example: > python3 backend_cli.py set_hide_essences_above_tier 3 MyProfile
+    '''
+    CheckNumParams(function_params, 1)
+    max_visible_tier: int = int(function_params[0])
+    loot_filter.SetHideEssencesAboveTierTier(max_visible_tier)
+# End SetHideEssencesAboveTierCommand
+
+@Command('get_hide_essences_above_tier')
+def GetHideEssencesAboveTierCommand(loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    get_hide_essences_above_tier
+     - Output: single integer, the tier above which all essences are hidden
+     - Example: > python3 backend_cli.py get_hide_essences_above_tier MyProfile
+    '''
+    CheckNumParams(function_params, 0)
+    return str(loot_filter.GetHideEssencesAboveTierTier())
+# End GetHideEssencesAboveTierCommand
+
+# ========================================= Div Cards =========================================
+
+@Command('get_all_div_card_tier_visibilities')
+def GetAllDivCardTierVisibilitiesCommand(
+        loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    get_all_div_card_tier_visibilities
+     - Output: newline-separated sequence of `<tier>;<visible_flag>`, one per tier
+     - <tier> is an integer representing the tier, <visibile_flag> is 1/0 for True/False
+     - Example: > python3 backend_cli.py get_all_div_card_tier_visibilities MyProfile
+    '''
+    output_string = ''
+    CheckNumParams(function_params, 0)
+    for tier in range(1, consts.kNumDivCardTiers + 1):
+        output_string += str(tier) + ';' + str(int(
+                loot_filter.GetDivCardTierVisibility(tier) == RuleVisibility.kShow)) + '\n'
+    if (output_string[-1] == '\n'): output_string = output_string[:-1]  # remove final newline
+    return output_string
+# End GetAllDivCardTierVisibilitiesCommand
+
+@Command('set_hide_div_cards_above_tier')
+def SetHideDivCardsAboveTierCommand(loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    set_hide_div_cards_above_tier <tier: int>
+     - Sets the essence tier "above" which all will be hidden
+       (higher tiers are worse)
+     - Output: None
+     - Example: > python3 backend_cli.py set_hide_essences_above_tier 3 MyProfile
+    '''
+    CheckNumParams(function_params, 1)
+    max_visible_tier: int = int(function_params[0])
+    loot_filter.SetHideDivCardsAboveTierTier(max_visible_tier)
+# End SetHideDivCardsAboveTierCommand
+
+@Command('get_hide_div_cards_above_tier')
+def GetHideDivCardsAboveTierCommand(loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    get_hide_div_cards_above_tier
+     - Output: single integer, the tier above which all essences are hidden
+     - Example: > python3 backend_cli.py get_hide_div_cards_above_tier MyProfile
+    '''
+    CheckNumParams(function_params, 0)
+    return str(loot_filter.GetHideDivCardsAboveTierTier())
+# End GetHideDivCardsAboveTierCommand
+
+# ======================================= Unique Items =======================================
+
+@Command('get_all_unique_item_tier_visibilities')
+def GetAllUniqueItemTierVisibilitiesCommand(
+        loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    get_all_unique_item_tier_visibilities
+     - Output: newline-separated sequence of `<tier>;<visible_flag>`, one per tier
+     - <tier> is an integer representing the tier, <visibile_flag> is 1/0 for True/False
+     - Example: > python3 backend_cli.py get_all_unique_item_tier_visibilities MyProfile
+    '''
+    output_string = ''
+    CheckNumParams(function_params, 0)
+    for tier in range(1, consts.kNumUniqueItemTiers + 1):
+        output_string += str(tier) + ';' + str(int(
+                loot_filter.GetUniqueItemTierVisibility(tier) == RuleVisibility.kShow)) + '\n'
+    if (output_string[-1] == '\n'): output_string = output_string[:-1]  # remove final newline
+    return output_string
+# End GetAllUniqueItemTierVisibilitiesCommand
+
+@Command('set_hide_unique_items_above_tier')
+def SetHideUniqueItemsAboveTierCommand(loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    set_hide_unique_items_above_tier <tier: int>
+     - Sets the unique item tier "above" which all will be hidden
+       (higher tiers are less valuable)
+     - Output: None
+     - Example: > python3 backend_cli.py set_hide_unique_items_above_tier 3 MyProfile
+    '''
+    CheckNumParams(function_params, 1)
+    max_visible_tier: int = int(function_params[0])
+    loot_filter.SetHideUniqueItemsAboveTierTier(max_visible_tier)
+# End SetHideUniqueItemsAboveTierCommand
+
+@Command('get_hide_unique_items_above_tier')
+def GetHideUniqueItemsAboveTierCommand(loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    get_hide_unique_items_above_tier
+     - Output: single integer, the tier above which all unique items are hidden
+     - Example: > python3 backend_cli.py get_hide_unique_items_above_tier MyProfile
+    '''
+    CheckNumParams(function_params, 0)
+    return str(loot_filter.GetHideUniqueItemsAboveTierTier())
+# End GetHideUniqueItemsAboveTierCommand
+
+# ======================================= Unique Maps =======================================
+
+@Command('get_all_unique_map_tier_visibilities')
+def GetAllUniqueMapTierVisibilitiesCommand(
+        loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    get_all_unique_map_tier_visibilities
+     - Output: newline-separated sequence of `<tier>;<visible_flag>`, one per tier
+     - <tier> is an integer representing the tier, <visibile_flag> is 1/0 for True/False
+     - Example: > python3 backend_cli.py get_all_unique_map_tier_visibilities MyProfile
+    '''
+    output_string = ''
+    CheckNumParams(function_params, 0)
+    for tier in range(1, consts.kNumUniqueMapTiers + 1):
+        output_string += str(tier) + ';' + str(int(
+                loot_filter.GetUniqueMapTierVisibility(tier) == RuleVisibility.kShow)) + '\n'
+    if (output_string[-1] == '\n'): output_string = output_string[:-1]  # remove final newline
+    return output_string
+# End GetAllUniqueMapTierVisibilitiesCommand
+
+@Command('set_hide_unique_maps_above_tier')
+def SetHideUniqueMapsAboveTierCommand(loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    set_hide_unique_maps_above_tier <tier: int>
+     - Sets the unique map tier "above" which all will be hidden
+       (higher tiers are less valuable)
+     - Output: None
+     - Example: > python3 backend_cli.py set_hide_unique_maps_above_tier 3 MyProfile
+    '''
+    CheckNumParams(function_params, 1)
+    max_visible_tier: int = int(function_params[0])
+    loot_filter.SetHideUniqueMapsAboveTierTier(max_visible_tier)
+# End SetHideUniqueMapsAboveTierCommand
+
+@Command('get_hide_unique_maps_above_tier')
+def GetHideUniqueMapsAboveTierCommand(loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    get_hide_unique_maps_above_tier
+     - Output: single integer, the tier above which all unique maps are hidden
+     - Example: > python3 backend_cli.py get_hide_unique_maps_above_tier MyProfile
+    '''
+    CheckNumParams(function_params, 0)
+    return str(loot_filter.GetHideUniqueMapsAboveTierTier())
+# End GetHideUniqueMapsAboveTierCommand
+
+# ======================================= Blight Oils =======================================
+
+@Command('set_lowest_visible_oil')
+def SetLowestVisibleOilCommand(loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    set_lowest_visible_oil <oil_name: str>
+     - Sets the lowest-value blight oil which to be shown
+     - Output: None
+     - Example: > python3 backend_cli.py set_lowest_visible_oil "Violet Oil" MyProfile
+    '''
+    CheckNumParams(function_params, 1)
+    loot_filter.SetLowestVisibleOil(function_params[0])
+# End SetLowestVisibleOilCommand
+
+@Command('get_lowest_visible_oil')
+def GetLowestVisibleOilCommand(loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    get_lowest_visible_oil
+     - Output: the name of the lowest-value blight oil that is shown
+     - Example: > python3 backend_cli.py get_lowest_visible_oil MyProfile
+    '''
+    CheckNumParams(function_params, 0)
+    return loot_filter.GetLowestVisibleOil()
+# End GetLowestVisibleOilCommand
+
+# ======================================= Gem Quality =======================================
+
+@Command('set_gem_min_quality')
+def SetGemMinQualityCommand(loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    set_gem_min_quality <quality: int in [1, 20]>
+     - Sets the minimum quality below which gems will not be shown by gem quality rules
+     - Output: None
+     - Example: > python3 backend_cli.py set_gem_min_quality 10 MyProfile
+    '''
+    CheckNumParams(function_params, 1)
+    min_quality: int = int(function_params[0])
+    loot_filter.SetGemMinQuality(min_quality)
+# End SetGemMinQualityCommand
+
+@Command('get_gem_min_quality')
+def GetGemMinQualityCommand(loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    get_gem_min_quality
+     - Output: single integer, minimum shown gem quality for gem quality rules
+     - Example: > python3 backend_cli.py get_gem_min_quality MyProfile
+    '''
+    CheckNumParams(function_params, 0)
+    return str(loot_filter.GetGemMinQuality())
+# End GetGemMinQualityCommand
+
+# ====================================== Flask Quality ======================================
+
+@Command('set_flask_min_quality')
+def SetFlaskMinQualityCommand(loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    set_flask_min_quality <quality: int in [1, 20]>
+     - Sets the minimum quality below which flasks will not be shown by flask quality rules
+     - Output: None
+     - Example: > python3 backend_cli.py set_flask_min_quality 14 MyProfile
+    '''
+    CheckNumParams(function_params, 1)
+    min_quality: int = int(function_params[0])
+    loot_filter.SetFlaskMinQuality(min_quality)
+# End SetFlaskMinQualityCommand
+
+@Command('get_flask_min_quality')
+def GetFlaskMinQualityCommand(loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    get_flask_min_quality
+     - Output: single integer, minimum shown flask quality for flask quality rules
+     - Example: > python3 backend_cli.py get_flask_min_quality MyProfile
+    '''
+    CheckNumParams(function_params, 0)
+    min_quality_int = loot_filter.GetFlaskMinQuality()
+    # Translate -1 (all quality rules disabled) into 21 for simplicity of UI code
+    if (min_quality_int == -1):
+        min_quality_int = 21
+    return str(min_quality_int)
+# End GetFlaskMinQualityCommand
+
+# ========================================== Maps ==========================================
+
+@Command('set_hide_maps_below_tier')
+def SetHideMapsBelowTierCommand(loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    set_hide_maps_below_tier <tier: int>
+     - Sets the map tier below which all will be hidden (use 0/1 to show all)
+     - Output: None
+     - Example: > python3 backend_cli.py set_hide_maps_below_tier 14 MyProfile
+    '''
+    CheckNumParams(function_params, 1)
+    min_visibile_tier: int = int(function_params[0])
+    loot_filter.SetHideMapsBelowTierTier(min_visibile_tier)
+# End SetHideMapsBelowTierCommand
+
+@Command('get_hide_maps_below_tier')
+def GetHideMapsBelowTierCommand(loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    get_hide_maps_below_tier
+     - Output:  single integer, the tier below which all maps are hidden
+     - Example: > python3 backend_cli.py get_hide_maps_below_tier MyProfile
+    '''
+    CheckNumParams(function_params, 0)
+    return str(loot_filter.GetHideMapsBelowTierTier())
+# End GetHideMapsBelowTierCommand
+
+# ==================================== Generic BaseTypes ====================================
+
+# Implementation function for show_basetype and disable_basetype
+def ParseBaseTypeRuleParams(function_params: List[str]) -> Tuple[str, bool, int, int]:
+    CheckNumParams(function_params, 4)
+    base_type: str = function_params[0]
+    rare_only_flag: bool = bool(int(function_params[1]))
+    min_ilvl: int = int(function_params[2])
+    max_ilvl: int = int(function_params[3])
+    return base_type, rare_only_flag, min_ilvl, max_ilvl
+# End ParseBaseTypeRuleParams
+
+@Command('show_basetype')
+def ShowBasetypeCommand(loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    show_basetype <base_type: str> <rare_only_flag: int> <min_ilvl: int> <max_ilvl: int>
+     - rare_only_flag is 1 for only rare items, 0 for any non-unique items
+     - Output: None
+     - Example: > python3 backend_cli.py show_basetype "Hubris Circlet" 1 84 100 MyProfile
+    '''
+    loot_filter.AddBaseTypeRule(*ParseBaseTypeRuleParams(function_params))
+# End ShowBasetypeCommand
+
+@Command('disable_basetype')
+def DisableBasetypeCommand(loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    disable_basetype <base_type: str> <rare_only_flag: int> <min_ilvl: int> <max_ilvl: int>
+     - Note: disable_basetype never hides anything, only disables the associated DLF-added rule
+     - rare_only_flag is 1 for only rare items, 0 for any non-unique items
+     - Output: None
+     - Example: > python3 backend_cli.py disable_basetype "Hubris Circlet" 1 84 100 MyProfile
+    '''
+    loot_filter.RemoveBaseTypeRule(*ParseBaseTypeRuleParams(function_params))
+# End DisableBasetypeCommand
+
+@Command('get_all_visible_basetypes')
+def GetAllVisibleBasetypesCommand(loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    get_all_visible_basetypes
+     - Output: newline-separated sequence of:
+        <base_type>;<rare_only_flag: int>;<min_ilvl>;<max_ilvl>
+     - rare_only_flag is 1 for only rare items, 0 for any non-unique items
+     - Example: > python3 backend_cli.py get_all_visible_basetypes MyProfile
+    '''
+    output_string = ''
+    CheckNumParams(function_params, 0)
+    for base_type, rare_only_flag, min_ilvl, max_ilvl in loot_filter.GetAllVisibleBaseTypes():
+        output_string += '{};{};{};{}\n'.format(
+                base_type, int(rare_only_flag), min_ilvl, max_ilvl)
+    if ((len(output_string) > 0) and (output_string[-1] == '\n')):
+        output_string = output_string[:-1]  # remove final newline
+    return output_string
+# End GetAllVisibleBasetypesCommand
+
+# ========================================= Flasks =========================================
+
+@Command('set_flask_visibility')
+def SetFlaskVisibilityCommand(loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    set_flask_visibility <base_type: str> <visibility_flag: int> <(optional) high_ilvl_flag: int>
+     - This does not overwrite any original filter rules, only adds a rule on top.
+     - This function never hides flasks, it only modifies its own "Show" rule.
+     - <base_type> is any valid flask BaseType
+     - visibility_flag is 1 for True (visible), 0 for False (not included in DLF rule)
+     - high_ilvl_flag is 1 for only high ilvl flasks, 0 for any flasks
+     - rare_only_flag should *only* be specified when visibility_flag is 1;
+       when visibility_flag is 0, the base_type is removed from both rules.
+     - Output: None
+     - Example: > python3 backend_cli.py set_flask_rule_enabled_for "Quartz Flask" 1 0 MyProfile
+    '''
+    flask_base_type: str = function_params[0]
+    enable_flag: bool = bool(int(function_params[1]))
+    if (not enable_flag):
+        loot_filter.SetFlaskRuleEnabledFor(flask_base_type, enable_flag)
+    else:
+        CheckNumParams(function_params, 3)
+        high_ilvl_flag: bool = bool(int(function_params[2]))
+        loot_filter.SetFlaskRuleEnabledFor(flask_base_type, enable_flag, high_ilvl_flag)
+# End SetFlaskVisibilityCommand
+
+@Command('get_flask_visibility')
+def GetFlaskVisibilityCommand(loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    get_flask_visibility <base_type: str>
+     - <base_type> is any valid flask BaseType
+     - Output: a space-separated pair of boolean ints, e.g. "0 1"
+        - The first value corresponds to any ilvl, the second corresponds to high ilvl only
+        - 1 indicates visible, 0 indicates not present in DLF rule
+     - Example: > python3 backend_cli.py is_flask_rule_enabled_for "Quicksilver Flask" MyProfile
+    '''
+    CheckNumParams(function_params, 1)
+    flask_base_type: str = function_params[0]
+    any_visibility_flag = loot_filter.IsFlaskRuleEnabledFor(
+            flask_base_type, high_ilvl_flag=False)
+    high_ilvl_visibility_flag = loot_filter.IsFlaskRuleEnabledFor(
+            flask_base_type, high_ilvl_flag=True)
+    return '{} {}'.format(int(any_visibility_flag), int(high_ilvl_visibility_flag))
+# End GetFlaskVisibilityCommand
+
+@Command('get_all_visible_flasks')
+def GetAllVisibleFlasksCommand(loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    get_all_visible_flasks
+     - Output: newline-separated sequence of <flask_basetype>;<high_ilvl_flag: int>
+     - high_ilvl_flag is 1 for only high ilvl flasks, 0 for any flasks
+     - Example: > python3 backend_cli.py get_all_visible_flasks MyProfile
+    '''
+    output_string = ''
+    CheckNumParams(function_params, 0)
+    visible_flask_types_any_ilvl = loot_filter.GetAllVisibleFlaskTypes(high_ilvl_flag=False)
+    visible_flask_types_high_ilvl = loot_filter.GetAllVisibleFlaskTypes(high_ilvl_flag=True)
+    # Compute high ilvl BaseTypes that are not also in any
+    visible_flask_types_high_ilvl_only = list(
+            set(visible_flask_types_high_ilvl) - set(visible_flask_types_any_ilvl))
+    for flask_base_type in visible_flask_types_any_ilvl:
+        output_string += '{};0\n'.format(flask_base_type)
+    for flask_base_type in visible_flask_types_high_ilvl_only:
+        output_string += '{};1\n'.format(flask_base_type)
+    if ((len(output_string) > 0) and (output_string[-1] == '\n')):
+        output_string = output_string[:-1]  # remove final newline
+    return output_string
+# End GetAllVisibleFlasksCommand
+
+# ========================================= Socket Rules =========================================
+
+@Command('add_remove_socket_rule')
+def AddRemoveSocketRuleCommand(loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    add_remove_socket_rule <socket_string: str> <(optional) item_slot: str> <add_flag: bool>
+     - TODO: add socket_string explanation
+     - <item_slot> is one of the following (case insensitive): "Weapons", "Body Armours",
+       "Helmets", "Gloves", "Boots", "Amulets", "Rings", "Belts", or "Any"
+     - add_flag is 1 to add a corresponding rule, 0 to remove the corresponding rule
+     - Output: None
+     - Example: > python3 backend_cli.py add_remove_socket_rule "B-B-G-X" 1 MyProfile
+     - Example: > python3 backend_cli.py add_remove_socket_rule "b-b xx" 1 MyProfile
+    '''
+    if (len(function_params) == 2):
+        function_params.insert(1, 'any')
+    CheckNumParams(function_params, 3)
+    socket_string, item_slot, add_flag_string = function_params
+    add_flag: bool = bool(int(add_flag_string))
+    if (not socket_helper.IsSocketStringValid(socket_string)):
+        raise RuntimeError('Given socket string is invalid: {}'.format(socket_string))
+    if (add_flag):
+        loot_filter.AddSocketRule(socket_string, item_slot)
+    else:
+        loot_filter.RemoveSocketRule(socket_string, item_slot)
+# End AddRemoveSocketRuleCommand
+
+@Command('get_all_added_socket_rules')
+def GetAllAddedSocketRulesCommand(loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    get_all_added_socket_rules
+     - Output: newline-separated sequence of <socket_string>;<item_slot>
+     - Example: > python3 backend_cli.py get_all_added_socket_rules MyProfile
+    '''
+    CheckNumParams(function_params, 0)
+    lines = [';'.join(string_pair) for string_pair in loot_filter.GetAllAddedSocketRules()]
+    return '\n'.join(lines)
+# End GetAllAddedSocketRulesCommand
+
+# ======================================== Rgb Items ========================================
+
+@Command('set_rgb_item_max_size')
+def SetRgbItemMaxSizeCommand(loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    set_rgb_item_max_size <size: {none, small, medium, large}>
+     - Sets the maximum size at which an RGB item is shown
+     - "small" = 4, "medium" = 6, "large" = 8
+     - Output: None
+     - Example: > python3 backend_cli.py set_rgb_item_max_size small MyProfile
+    '''
+    CheckNumParams(function_params, 1)
+    rgb_item_max_size: str = function_params[0]
+    loot_filter.SetRgbItemMaxSize(rgb_item_max_size)
+# End SetRgbItemMaxSizeCommand
+
+@Command('get_rgb_item_max_size')
+def GetRgbItemMaxSizeCommand(loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    get_rgb_item_max_size
+     - Output:  max-size of shown RGB items, one of {none, small, medium, large}
+     - Example: > python3 backend_cli.py get_rgb_item_max_size MyProfile
+    '''
+    CheckNumParams(function_params, 0)
+    return loot_filter.GetRgbItemMaxSize()
+# End GetRgbItemMaxSizeCommand
+
+# =================================== Chaos Recipe Rares ===================================
+
+@Command('set_chaos_recipe_enabled_for')
+def SetChaosRecipeEnabledForCommand(loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    set_chaos_recipe_enabled_for <item_slot: str> <enable_flag: int>
+     - <item_slot> is one of: "Weapons", "Body Armours", "Helmets", "Gloves",
+       "Boots", "Amulets", "Rings", "Belts"
+     - enable_flag is 1 for True (enable), 0 for False (disable)
+     - Output: None
+     - Example: > python3 backend_cli.py set_chaos_recipe_enabled_for Weapons 0 MyProfile
+    '''
+    CheckNumParams(function_params, 2)
+    item_slot: str = function_params[0]
+    enable_flag: bool = bool(int(function_params[1]))
+    loot_filter.SetChaosRecipeEnabledFor(item_slot, enable_flag)
+# End SetChaosRecipeEnabledForCommand
+
+@Command('is_chaos_recipe_enabled_for')
+def IsChaosRecipeEnabledForCommand(loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    is_chaos_recipe_enabled_for <item_slot: str>
+     - <item_slot> is one of: "Weapons", "Body Armours", "Helmets", "Gloves",
+       "Boots", "Amulets", "Rings", "Belts"  (defined in consts.py)
+     - Output: "1" if chaos recipe items are showing for the given item_slot, else "0"
+     - Example: > python3 backend_cli.py is_chaos_recipe_enabled_for "Body Armours" MyProfile
+    '''
+    CheckNumParams(function_params, 1)
+    item_slot: str = function_params[0]
+    return str(int(loot_filter.IsChaosRecipeEnabledFor(item_slot)))
+# End IsChaosRecipeEnabledForCommand
+
+@Command('get_all_chaos_recipe_statuses')
+def GetAllChaosRecipeStatusesCommand(loot_filter: LootFilter, function_params: List[str]) -> str:
+    '''
+    get_all_chaos_recipe_statuses
+     - Output: one line formatted as `<item_slot>;<enabled_flag>` for each item slot
+     - <item_slot> is one of: "Weapons", "Body Armours", "Helmets", "Gloves",
+       "Boots", "Amulets", "Rings", "Belts"
+     - <enabled_flag> is "1" if chaos recipe items are showing for given item_slot, else "0"
+     - Example: > python3 backend_cli.py get_all_chaos_recipe_statuses MyProfile
+    '''
+    output_string = ''
+    CheckNumParams(function_params, 0)
+    for item_slot in consts.kItemSlots:
+        enabled_flag_string = str(int(loot_filter.IsChaosRecipeEnabledFor(item_slot)))
+        output_string += item_slot + ';' + enabled_flag_string + '\n'
+    if (output_string[-1] == '\n'): output_string = output_string[:-1]  # remove final newline
+    return output_string
+# End GetAllChaosRecipeStatusesCommand
+
+# ================================= Function Call Delegation =================================
+
+# Calls the handler registered for function_name, then writes its output, saves the filter,
+# and records the change in the profile as appropriate.
 def DelegateFunctionCall(loot_filter: LootFilter or None,
                          function_name: str,
                          function_params: List[str],
@@ -107,747 +1321,18 @@ def DelegateFunctionCall(loot_filter: LootFilter or None,
     CheckType(function_params, 'function_params_list', list, str)
     CheckType(in_batch, 'in_batch', bool)
     CheckType(suppress_output, 'suppress_output', bool)
-    # Alias config_values for convenience
-    config_values = loot_filter.profile_obj.config_values if loot_filter else None
-    #
-    output_string = ''
-    if (function_name == 'is_first_launch'):
-        '''
-        is_first_launch
-         - Output: "1" if this is the first launch of the program (i.e. requires setup),
-           "0" otherwise
-         - It is considered first launch iff there are no profiles
-         - Example: > python3 backend_cli.py is_first_launch
-        '''
-        CheckNumParams(function_params, 0)
-        profile_names_list = profile.GetAllProfileNames()
-        is_first_launch_flag: bool = (len(profile_names_list) == 0)
-        output_string = str(int(is_first_launch_flag))
-    # ===================================== General Config =====================================
-    elif (function_name == 'set_hotkey'):
-        '''
-        set_hotkey <hotkey_identifier: str> <hotkey_string: str>
-         - hotkey_identifier is the label found in general.config before the ':' character,
-           for example "Toggle GUI Hotkey"
-         - hotkey_string is the AHK-syntax desired hotkey string
-         - Example: > python3 set_hotkey "Write Filter Hotkey" "^+S"
-        '''
-        CheckNumParams(function_params, 2)
-        hotkey_identifier, hotkey_string = function_params
-        general_config_obj = GeneralConfig()
-        if (hotkey_identifier not in GeneralConfigKeywords.kKeywordsList):
-            raise RuntimeError('invalid hotkey identifier: "{}"'.format(hotkey_identifier))
-        general_config_obj.keyword_value_dict[hotkey_identifier] = hotkey_string
-        general_config_obj.SaveToFile()
-    elif (function_name == 'get_all_hotkeys'):
-        '''
-        get_all_hotkeys
-         - Outputs a sequence of lines, each formatted as <hotkey_identifier>;<hotkey_string>
-         - Example: > python3 backend_cli.py get_all_hotkeys
-        '''
-        CheckNumParams(function_params, 0)
-        hotkey_identifiers = [
-                GeneralConfigKeywords.kToggleGuiHotkey,
-                GeneralConfigKeywords.kWriteFilterHotkey,
-                GeneralConfigKeywords.kReloadFilterHotkey]
-        general_config_obj = GeneralConfig()
-        config_dict = general_config_obj.keyword_value_dict
-        output_string += '\n'.join('{};{}'.format(identifier, config_dict[identifier])
-                for identifier in hotkey_identifiers)
-    # ================================== Check Filters Exist ==================================
-    elif (function_name == 'check_filters_exist'):
-        '''
-        check_filters_exist
-         - Outputs a sequence of integer flags (1 or 0), one per line, indicating whether
-           each of the following filters exist:
-            - Downloaded filter
-            - Input filter
-            - Output filter
-         - Example: > python3 backend_cli.py check_filters_exist MyProfile
-        '''
-        CheckNumParams(function_params, 1)
-        config_values = profile.Profile(function_params[0]).config_values
-        downloaded_filter_exists = os.path.isfile(config_values['DownloadedLootFilterFullpath'])
-        input_filter_exists = os.path.isfile(config_values['InputLootFilterFullpath'])
-        output_filter_exists = os.path.isfile(config_values['OutputLootFilterFullpath'])
-        output_string += '\n'.join(str(int(flag)) for flag in
-                (downloaded_filter_exists, input_filter_exists, output_filter_exists))
-    # ================================= Import / Reload Filter =================================
-    elif ((function_name in ('import_downloaded_filter', 'load_input_filter')) and not in_batch):
-        '''
-        import_downloaded_filter
-         - Copies or moves the downloaded filter to the input directory (depending on profile
-           config), parses the input filter, adds DLF-generated rules, applies profile changes,
-           and writes the final result to the output filter
-         - Filters out invalid changes and updates profile .changes file accordingly
-         - Output: None
-         - Example: > python3 backend_cli.py import_downloaded_filter MyProfile
-
-        load_input_filter
-         - Parses the input filter, adds DLF-generated rules, applies profile changes,
-           and writes the final result to the output filter
-         - Output: None
-         - Example: > python3 bacend_cli.py load_input_filter MyProfile
-        '''
-        CheckNumParams(function_params, 0)
-        changes_lines: List[str] = file_helper.ReadFile(config_values['ChangesFullpath'], strip=True)
-        # Changes are applied in backend_cli rather than within the LootFilter class,
-        # because they are formatted as backend_cli calls within the Profile.changes file.
-        valid_changes_lines = []
-        for function_call_string in changes_lines:
-            if (function_call_string == ''):
-                continue
-            # need different variable names here to not overwrite the existing ones
-            _function_name, *_function_params = shlex.split(function_call_string)
-            try:
-                DelegateFunctionCall(loot_filter, _function_name, _function_params,
-                                     in_batch = True, suppress_output = True)
-                valid_changes_lines.append(function_call_string)
-            except:
-                logger.Log('Warning: invalid line in {} skipped: {}'.format(
-                        config_values['ChangesFullpath'], function_call_string))
-                file_helper.AppendToFile(kInfoFilename, 'Invalid .changes line skipped')
-        # Update .changes file to only contain valid_changes_lines
-        file_helper.WriteToFile(valid_changes_lines, config_values['ChangesFullpath'])
-        loot_filter.SaveToFile()
-    # ======================================= Run Batch =======================================
-    elif ((function_name == 'run_batch') and not in_batch):
-        '''
-        run_batch
-         - Runs the batch of functions specified in file backend_cli.input
-         - Format is one function call per line, given as: <function_name> <function_params...>
-         - Output: concatenation of the outputs of all the functions, with each function output
-           separated by the line containing the single character: `@`
-         - Example: > python3 run_batch MyProfile
-        '''
-        CheckNumParams(function_params, 0)
-        # Clear the output file, since we will be appending output in batch
-        file_helper.WriteToFile('', kOutputFilename)
-        contains_mutator = False
-        function_call_list: List[str] = file_helper.ReadFile(kInputFilename, strip=True)
-        for function_call_string in function_call_list:
-            if (function_call_string == ''):
-                continue
-            # need different variable names here to not overwrite the existing ones
-            _function_name, *_function_params = shlex.split(function_call_string)
-            contains_mutator = kFunctionInfoMap[_function_name].get('ModifiesFilter', False)
-            try:
-                DelegateFunctionCall(loot_filter, _function_name, _function_params,
-                                     in_batch = True, suppress_output = False)
-            except:
-                logger.Log('Warning: invalid line in run_batch input skipped: {}'.format(
-                        function_call_string))
-                file_helper.AppendToFile('Invalid batch line skipped', kInfoFilename)
-        # Check if batch contained a mutator and save filter if so
-        if (contains_mutator):
-            loot_filter.SaveToFile()
-    # ========================================== Profile ==========================================
-    elif (function_name == 'get_all_profile_names'):
-        '''
-        get_all_profile_names
-         - Output: newline-separated list of all profile names, with currently active profile first
-         - Example: > python3 backend_cli.py get_all_profile_names
-        '''
-        CheckNumParams(function_params, 0)
-        profile_names_list = profile.GetAllProfileNames()
-        output_string += '\n'.join(profile_names_list)
-    elif (function_name == 'create_new_profile'):
-        '''
-        create_new_profile <new_profile_name>
-         - Creates a new profile from the config values given in backend_cli.input
-         - Each input line takes the form: "<keyword>:<value>", with keywords defined in profile.py
-         - Required keywords: 'DownloadDirectory', 'PathOfExileDirectory', 'DownloadedLootFilterFilename'
-         - Does nothing if a profile with the given new_profile_name already exists
-         - Output: "1" if the new profile was created, "0" otherwise
-         - Example: > python3 backend_cli.py create_new_profile MyProfile
-        '''
-        CheckNumParams(function_params, 1)
-        new_profile_name = function_params[0]
-        config_values: dict = file_helper.ReadFileToDict(kInputFilename)
-        created_profile = profile.CreateNewProfile(new_profile_name, config_values)
-        output_string += str(int(created_profile != None))
-    elif (function_name == 'rename_profile'):
-        '''
-        rename_profile <original_profile_name> <new_profile_name>
-         - Renames a profile, renaming all the corresponding config files,
-         - Updates general.config if needed
-         - Raises an error if the profile original_profile_name does not exist
-         - Example: > python3 backend_cli.py rename_profile MyProfile MyFancyProfile
-        '''
-        CheckNumParams(function_params, 2)
-        original_profile_name, new_profile_name = function_params
-        profile.RenameProfile(original_profile_name, new_profile_name)
-    elif (function_name == 'delete_profile'):
-        '''
-        delete_profile <profile_name>
-         - Deletes the given profile, removing all corresponding config files
-         - Updates general.config if needed
-         - Raises an error if the profile profile_name does not exist
-         - Example: > python3 backend_cli.py delete_profile MyProfile
-        '''
-        CheckNumParams(function_params, 1)
-        profile_name = function_params[0]
-        profile.DeleteProfile(profile_name)
-    elif (function_name == 'set_active_profile'):
-        '''
-        set_active_profile <new_active_profile_name>
-         - Raises an error if new_active_profile_name does not exist
-         - Output: None
-         - Example: > python3 backend_cli.py set_active_profile MyFancyProfile
-        '''
-        CheckNumParams(function_params, 1)
-        profile.SetActiveProfile(function_params[0])
-    # ====================================== Rule Matching ======================================
-    elif (function_name == 'get_rule_matching_item'):
-        '''
-        TODO: this is probably broken with refactor.
-        get_rule_matching_item
-         - Takes an item text as input in backend_cli.input
-         - Finds the rule in the PoE filter matching the item and writes it to backend_cli.output
-         - The first two lines of output will be `type_tag:<type_tag>` and `tier_tag:<tier_tag>`,
-           these two tags together form a unique key for the rule
-         - Ignores rules with AreaLevel conditions, as well as many other niche keywords
-         - Socket rules only implemented as numeric counting for now, ignores color requirements
-         - Example: > python3 backend_cli.py get_rule_matching_item MyProfile
-        '''
-        CheckNumParams(function_params, 0)
-        item_text_lines: List[str] = file_helper.ReadFile(kInputFilename, strip=True)
-        matched_rule = loot_filter.GetRuleMatchingItem(Item(item_text_lines))
-        if (matched_rule != None):
-            output_string = 'type_tag:{}\ntier_tag:{}\n'.format(
-                    matched_rule.type_tag, matched_rule.tier_tag)
-            output_string += '\n'.join(matched_rule.rule_text_lines)
-    elif (function_name == 'set_rule_visibility'):
-        '''
-        set_rule_visibility <type_tag: str> <tier_tag: str> <visibility: {show, hide, disable}>
-         - Shows, hides, or disables the rule specified by the given type and tier tags
-         - The visibility parameter is one of: `show`, `hide`, `disable`
-         - Output: None (could output rule_found_flag if needed)
-         - Example > python3 backend_cli.py set_rule_visibility "rare->redeemer" t12 show
-         - Note: quotes (either type) are necessary for tags containing a ">" character,
-           since the shell will normally iterpret as the output redirection signal
-         - Example: > python3 backend_cli.py set_rule_visibility uniques 5link disable MyProfile
-        '''
-        CheckNumParams(function_params, 3)
-        type_tag, tier_tag, visibility_string = function_params
-        visibility_map = {
-                'show': RuleVisibility.kShow,
-                'hide': RuleVisibility.kHide,
-                'disable': RuleVisibility.kDisabledAny}
-        loot_filter.GetRule(type_tag, tier_tag).SetVisibility(visibility_map[visibility_string])
-    # ======================================== Currency ========================================
-    elif (function_name == 'set_currency_to_tier'):
-        '''
-        set_currency_to_tier <currency_name: str> <tier: int>
-         - Moves the given currency type to the specified tier for all unstacked and stacked rules
-         - Output: None
-         - Example: > python3 backend_cli.py set_currency_to_tier "Chromatic Orb" 5 MyProfile
-        '''
-        CheckNumParams(function_params, 2)
-        currency_name: str = function_params[0]
-        target_tier: int = int(function_params[1])
-        loot_filter.SetCurrencyToTier(currency_name, target_tier)
-    elif (function_name == 'get_tier_of_currency'):
-        '''
-        get_tier_of_currency <currency_name: str>
-         - Output: tier (int) containing the given currency type
-         - Example: > python3 backend_cli.py get_tier_of_currency "Chromatic Orb" MyProfile
-        '''
-        CheckNumParams(function_params, 1)
-        currency_name: str = function_params[0]
-        output_string = str(loot_filter.GetTierOfCurrency(currency_name))
-    elif (function_name == 'get_all_currency_tiers'):
-        '''
-        get_all_currency_tiers
-         - Output: newline-separated sequence of `<currency_name: str>;<tier: int>`
-         - Example: > python3 backend_cli.py get_all_currency_tiers MyProfile
-        '''
-        CheckNumParams(function_params, 0)
-        for tier in range(1, consts.kNumCurrencyTiersExcludingScrolls + 1):
-            currency_names = loot_filter.GetAllCurrencyInTier(tier)
-            output_string += ''.join((currency_name + ';' + str(tier) + '\n')
-                                        for currency_name in currency_names)
-        if (output_string[-1] == '\n'): output_string = output_string[:-1]  # remove final newline
-    elif (function_name == 'set_currency_tier_min_visible_stack_size'):
-        '''
-        set_currency_tier_min_visible_stack_size <tier: int or string> <stack_size: int or "hide_all">
-         - Shows currency stacks >= stack_size and hides stacks < stack_size for the given tier
-         - If stack_size is "hide_all", all currency of the given tier will be hidden
-         - Valid stack_size values: {1, 2, 4} for tiers 1-7, {1, 2, 4, 6} for tiers 8-9 and scrolls
-         - tier is an integer [1-9] or "tportal"/"twisdom" for Portal/Wisdom Scrolls
-         - Output: None
-         - Example: > python3 backend_cli.py set_currency_min_visible_stack_size 7 6 MyProfile
-         - Example: > python3 backend_cli.py set_currency_min_visible_stack_size twisdom hide_all MyProfile
-        '''
-        CheckNumParams(function_params, 2)
-        tier_str: str = function_params[0]
-        min_stack_size_str: str = function_params[1]
-        loot_filter.SetCurrencyTierMinVisibleStackSize(tier_str, min_stack_size_str)
-    elif (function_name == 'get_currency_tier_min_visible_stack_size'):
-        '''
-        get_currency_tier_min_visible_stack_size <tier: int or str>
-         - "tier" is an int, or "tportal"/"twisdom" for portal/wisdom scrolls
-         - Output: min visible stack size for the given currency tier
-         - Example: > python3 backend_cli.py get_currency_tier_min_visible_stack_size 4 MyProfile
-         - Example: > python3 backend_cli.py get_currency_tier_min_visible_stack_size twisdom MyProfile
-        '''
-        CheckNumParams(function_params, 1)
-        tier_str: str = function_params[0]
-        stack_size_int = loot_filter.GetCurrencyTierMinVisibleStackSize(tier_str)
-        output_string = consts.kCurrencyStackSizeIntToStringMap[stack_size_int]
-    elif (function_name == 'get_all_currency_tier_min_visible_stack_sizes'):
-        '''
-        get_all_currency_tier_min_visible_stack_sizes
-         - Output: newline-separated sequence of `<tier: int>;<min_visible_stack_size: int>`
-         - Example: > python3 backend_cli.py get_all_currency_tier_min_visible_stack_sizes MyProfile
-        '''
-        CheckNumParams(function_params, 0)
-        tier_strings = ([str(i) for i in range(1, consts.kNumCurrencyTiersExcludingScrolls + 1)] +
-                ['tportal', 'twisdom'])
-        stack_size_ints = [loot_filter.GetCurrencyTierMinVisibleStackSize(tier_string)
-                for tier_string in tier_strings]
-        stack_size_strings = [consts.kCurrencyStackSizeIntToStringMap[stack_size_int]
-                for stack_size_int in stack_size_ints]
-        output_string += '\n'.join('{};{}'.format(*pair)
-                for pair in zip(tier_strings, stack_size_strings))
-    # ======================================== Splinters ========================================
-    elif (function_name == 'set_splinter_min_visible_stack_size'):
-        '''
-        set_splinter_min_visible_stack_size <base_type: str> <stack_size: int>
-         - Shows splinter stacks >= stack_size and hides stacks < stack_size for the given base_type
-         - Valid stack_size values are {1, 2, 4, 8} (consts.kDlfSplinterStackSizes)
-         - Output: None
-         - Example: > python3 backend_cli.py set_splinter_min_visible_stack_size "Splinter of Esh" 4 MyProfile
-        '''
-        CheckNumParams(function_params, 2)
-        splinter_base_type, stack_size_string = function_params
-        loot_filter.SetSplinterMinVisibleStackSize(splinter_base_type, int(stack_size_string))
-    elif (function_name == 'get_splinter_min_visible_stack_size'):
-        '''
-        get_splinter_min_visible_stack_size <base_type: str>
-         - Output: min visible stack size for the given base_type
-         - Example: > python3 backend_cli.py get_splinter_min_visible_stack_size "Splinter of Esh" MyProfile
-        '''
-
-
-        CheckNumParams(function_params, 1)
-        splinter_base_type = function_params[0]
-        output_string = str(loot_filter.GetSplinterMinVisibleStackSize(splinter_base_type))
-    elif (function_name == 'get_all_splinter_min_visible_stack_sizes'):
-        '''
-        get_all_splinter_min_visible_stack_sizes
-         - Output: newline-separated sequence of `<base_type: str>;<stack_size: int>`
-         - Example: > python3 backend_cli.py get_all_splinter_min_visible_stack_sizes MyProfile
-        '''
-        CheckNumParams(function_params, 0)
-        # Track found splinter types, not found means min visible stack size is 1
-        found_splinter_base_types = set()
-        output_list = []
-        for stack_size in consts.kDlfSplinterStackSizes:
-            splinter_base_types = loot_filter.GetSplintersHiddenBelow(stack_size)
-            found_splinter_base_types.update(splinter_base_types)
-            output_list += [(base_type, stack_size) for base_type in splinter_base_types]
-        all_splinter_base_types = file_helper.ReadFile(
-                consts.kSplinterBaseTypesListFullpath, strip=True)
-        for splinter_base_type in all_splinter_base_types:
-            if (splinter_base_type not in found_splinter_base_types):
-                output_list.append((splinter_base_type, 1))
-        output_string = '\n'.join('{};{}'.format(*pair) for pair in output_list)
-    # ========================================= Essences =========================================
-    elif (function_name == 'get_all_essence_tier_visibilities'):
-        '''
-        get_all_essence_tier_visibilities
-         - Output: newline-separated sequence of `<tier>;<visible_flag>`, one per tier
-         - <tier> is an integer representing the tier, <visibile_flag> is 1/0 for True/False
-         - Example: > python3 backend_cli.py get_all_essence_tier_visibilities MyProfile
-        '''
-        CheckNumParams(function_params, 0)
-        for tier in range(1, consts.kNumEssenceTiers + 1):
-            output_string += str(tier) + ';' + str(int(
-                    loot_filter.GetEssenceTierVisibility(tier) == RuleVisibility.kShow)) + '\n'
-        if (output_string[-1] == '\n'): output_string = output_string[:-1]  # remove final newline
-    elif (function_name == 'set_hide_essences_above_tier'):
-        '''
-        set_hide_essences_above_tier <tier: int>
-         - Sets the essence tier "above" which all will be hidden
-           (higher essence tiers are worse)
-         - Output: None
-         - Example: > python3 backend_cli.py set_hide_essences_above_tier 3 MyProfile
-        '''
-        CheckNumParams(function_params, 1)
-        max_visible_tier: int = int(function_params[0])
-        loot_filter.SetHideEssencesAboveTierTier(max_visible_tier)
-    elif (function_name == 'get_hide_essences_above_tier'):
-        '''
-        get_hide_essences_above_tier
-         - Output: single integer, the tier above which all essences are hidden
-         - Example: > python3 backend_cli.py get_hide_essences_above_tier MyProfile
-        '''
-        CheckNumParams(function_params, 0)
-        output_string = str(loot_filter.GetHideEssencesAboveTierTier())
-    # ========================================= Div Cards =========================================
-    elif (function_name == 'get_all_div_card_tier_visibilities'):
-        '''
-        get_all_div_card_tier_visibilities
-         - Output: newline-separated sequence of `<tier>;<visible_flag>`, one per tier
-         - <tier> is an integer representing the tier, <visibile_flag> is 1/0 for True/False
-         - Example: > python3 backend_cli.py get_all_div_card_tier_visibilities MyProfile
-        '''
-        CheckNumParams(function_params, 0)
-        for tier in range(1, consts.kNumDivCardTiers + 1):
-            output_string += str(tier) + ';' + str(int(
-                    loot_filter.GetDivCardTierVisibility(tier) == RuleVisibility.kShow)) + '\n'
-        if (output_string[-1] == '\n'): output_string = output_string[:-1]  # remove final newline
-    elif (function_name == 'set_hide_div_cards_above_tier'):
-        '''
-        set_hide_div_cards_above_tier <tier: int>
-         - Sets the essence tier "above" which all will be hidden
-           (higher tiers are worse)
-         - Output: None
-         - Example: > python3 backend_cli.py set_hide_essences_above_tier 3 MyProfile
-        '''
-        CheckNumParams(function_params, 1)
-        max_visible_tier: int = int(function_params[0])
-        loot_filter.SetHideDivCardsAboveTierTier(max_visible_tier)
-    elif (function_name == 'get_hide_div_cards_above_tier'):
-        '''
-        get_hide_div_cards_above_tier
-         - Output: single integer, the tier above which all essences are hidden
-         - Example: > python3 backend_cli.py get_hide_div_cards_above_tier MyProfile
-        '''
-        CheckNumParams(function_params, 0)
-        output_string = str(loot_filter.GetHideDivCardsAboveTierTier())
-    # ======================================= Unique Items =======================================
-    elif (function_name == 'get_all_unique_item_tier_visibilities'):
-        '''
-        get_all_unique_item_tier_visibilities
-         - Output: newline-separated sequence of `<tier>;<visible_flag>`, one per tier
-         - <tier> is an integer representing the tier, <visibile_flag> is 1/0 for True/False
-         - Example: > python3 backend_cli.py get_all_unique_item_tier_visibilities MyProfile
-        '''
-        CheckNumParams(function_params, 0)
-        for tier in range(1, consts.kNumUniqueItemTiers + 1):
-            output_string += str(tier) + ';' + str(int(
-                    loot_filter.GetUniqueItemTierVisibility(tier) == RuleVisibility.kShow)) + '\n'
-        if (output_string[-1] == '\n'): output_string = output_string[:-1]  # remove final newline
-    elif (function_name == 'set_hide_unique_items_above_tier'):
-        '''
-        set_hide_unique_items_above_tier <tier: int>
-         - Sets the unique item tier "above" which all will be hidden
-           (higher tiers are less valuable)
-         - Output: None
-         - Example: > python3 backend_cli.py set_hide_unique_items_above_tier 3 MyProfile
-        '''
-        CheckNumParams(function_params, 1)
-        max_visible_tier: int = int(function_params[0])
-        loot_filter.SetHideUniqueItemsAboveTierTier(max_visible_tier)
-    elif (function_name == 'get_hide_unique_items_above_tier'):
-        '''
-        get_hide_unique_items_above_tier
-         - Output: single integer, the tier above which all unique items are hidden
-         - Example: > python3 backend_cli.py get_hide_unique_items_above_tier MyProfile
-        '''
-        CheckNumParams(function_params, 0)
-        output_string = str(loot_filter.GetHideUniqueItemsAboveTierTier())
-    # ======================================= Unique Maps =======================================
-    elif (function_name == 'get_all_unique_map_tier_visibilities'):
-        '''
-        get_all_unique_map_tier_visibilities
-         - Output: newline-separated sequence of `<tier>;<visible_flag>`, one per tier
-         - <tier> is an integer representing the tier, <visibile_flag> is 1/0 for True/False
-         - Example: > python3 backend_cli.py get_all_unique_map_tier_visibilities MyProfile
-        '''
-        CheckNumParams(function_params, 0)
-        for tier in range(1, consts.kNumUniqueMapTiers + 1):
-            output_string += str(tier) + ';' + str(int(
-                    loot_filter.GetUniqueMapTierVisibility(tier) == RuleVisibility.kShow)) + '\n'
-        if (output_string[-1] == '\n'): output_string = output_string[:-1]  # remove final newline
-    elif (function_name == 'set_hide_unique_maps_above_tier'):
-        '''
-        set_hide_unique_maps_above_tier <tier: int>
-         - Sets the unique map tier "above" which all will be hidden
-           (higher tiers are less valuable)
-         - Output: None
-         - Example: > python3 backend_cli.py set_hide_unique_maps_above_tier 3 MyProfile
-        '''
-        CheckNumParams(function_params, 1)
-        max_visible_tier: int = int(function_params[0])
-        loot_filter.SetHideUniqueMapsAboveTierTier(max_visible_tier)
-    elif (function_name == 'get_hide_unique_maps_above_tier'):
-        '''
-        get_hide_unique_maps_above_tier
-         - Output: single integer, the tier above which all unique maps are hidden
-         - Example: > python3 backend_cli.py get_hide_unique_maps_above_tier MyProfile
-        '''
-        CheckNumParams(function_params, 0)
-        output_string = str(loot_filter.GetHideUniqueMapsAboveTierTier())
-    # ======================================= Blight Oils =======================================
-    elif (function_name == 'set_lowest_visible_oil'):
-        '''
-        set_lowest_visible_oil <oil_name: str>
-         - Sets the lowest-value blight oil which to be shown
-         - Output: None
-         - Example: > python3 backend_cli.py set_lowest_visible_oil "Violet Oil" MyProfile
-        '''
-        CheckNumParams(function_params, 1)
-        loot_filter.SetLowestVisibleOil(function_params[0])
-    elif (function_name == 'get_lowest_visible_oil'):
-        '''
-        get_lowest_visible_oil
-         - Output: the name of the lowest-value blight oil that is shown
-         - Example: > python3 backend_cli.py get_lowest_visible_oil MyProfile
-        '''
-        CheckNumParams(function_params, 0)
-        output_string = loot_filter.GetLowestVisibleOil()
-    # ======================================= Gem Quality =======================================
-    elif (function_name == 'set_gem_min_quality'):
-        '''
-        set_gem_min_quality <quality: int in [1, 20]>
-         - Sets the minimum quality below which gems will not be shown by gem quality rules
-         - Output: None
-         - Example: > python3 backend_cli.py set_gem_min_quality 10 MyProfile
-        '''
-        CheckNumParams(function_params, 1)
-        min_quality: int = int(function_params[0])
-        loot_filter.SetGemMinQuality(min_quality)
-    elif (function_name == 'get_gem_min_quality'):
-        '''
-        get_gem_min_quality
-         - Output: single integer, minimum shown gem quality for gem quality rules
-         - Example: > python3 backend_cli.py get_gem_min_quality MyProfile
-        '''
-        CheckNumParams(function_params, 0)
-        output_string = str(loot_filter.GetGemMinQuality())
-    # ====================================== Flask Quality ======================================
-    elif (function_name == 'set_flask_min_quality'):
-        '''
-        set_flask_min_quality <quality: int in [1, 20]>
-         - Sets the minimum quality below which flasks will not be shown by flask quality rules
-         - Output: None
-         - Example: > python3 backend_cli.py set_flask_min_quality 14 MyProfile
-        '''
-        CheckNumParams(function_params, 1)
-        min_quality: int = int(function_params[0])
-        loot_filter.SetFlaskMinQuality(min_quality)
-    elif (function_name == 'get_flask_min_quality'):
-        '''
-        get_flask_min_quality
-         - Output: single integer, minimum shown flask quality for flask quality rules
-         - Example: > python3 backend_cli.py get_flask_min_quality MyProfile
-        '''
-        CheckNumParams(function_params, 0)
-        min_quality_int = loot_filter.GetFlaskMinQuality()
-        # Translate -1 (all quality rules disabled) into 21 for simplicity of UI code
-        if (min_quality_int == -1):
-            min_quality_int = 21
-        output_string = str(min_quality_int)
-    # ========================================== Maps ==========================================
-    elif (function_name == 'set_hide_maps_below_tier'):
-        '''
-        set_hide_maps_below_tier <tier: int>
-         - Sets the map tier below which all will be hidden (use 0/1 to show all)
-         - Output: None
-         - Example: > python3 backend_cli.py set_hide_maps_below_tier 14 MyProfile
-        '''
-        CheckNumParams(function_params, 1)
-        min_visibile_tier: int = int(function_params[0])
-        loot_filter.SetHideMapsBelowTierTier(min_visibile_tier)
-    elif (function_name == 'get_hide_maps_below_tier'):
-        '''
-        get_hide_maps_below_tier
-         - Output:  single integer, the tier below which all maps are hidden
-         - Example: > python3 backend_cli.py get_hide_maps_below_tier MyProfile
-        '''
-        CheckNumParams(function_params, 0)
-        output_string = str(loot_filter.GetHideMapsBelowTierTier())
-    # ==================================== Generic BaseTypes ====================================
-    elif (function_name in ('show_basetype', 'disable_basetype')):
-        '''
-        show_basetype <base_type: str> <rare_only_flag: int> <min_ilvl: int> <max_ilvl: int>
-        disable_basetype <base_type: str> <rare_only_flag: int> <min_ilvl: int> <max_ilvl: int>
-         - Note: disable_basetype never hides anything, only disables the associated DLF-added rule
-         - rare_only_flag is 1 for only rare items, 0 for any non-unique items
-         - Output: None
-         - Example: > python3 backend_cli.py show_basetype "Hubris Circlet" 1 84 100 MyProfile
-         - Example: > python3 backend_cli.py disable_basetype "Hubris Circlet" 1 84 100 MyProfile
-        '''
-        CheckNumParams(function_params, 4)
-        base_type: str = function_params[0]
-        rare_only_flag: bool = bool(int(function_params[1]))
-        min_ilvl: int = int(function_params[2])
-        max_ilvl: int = int(function_params[3])
-        dispatch_function = (loot_filter.AddBaseTypeRule if function_name == 'show_basetype'
-                else loot_filter.RemoveBaseTypeRule)
-        dispatch_function(base_type, rare_only_flag, min_ilvl, max_ilvl)
-    elif (function_name == 'get_all_visible_basetypes'):
-        '''
-        get_all_visible_basetypes
-         - Output: newline-separated sequence of:
-            <base_type>;<rare_only_flag: int>;<min_ilvl>;<max_ilvl>
-         - rare_only_flag is 1 for only rare items, 0 for any non-unique items
-         - Example: > python3 backend_cli.py get_all_visible_basetypes MyProfile
-        '''
-        CheckNumParams(function_params, 0)
-        for base_type, rare_only_flag, min_ilvl, max_ilvl in loot_filter.GetAllVisibleBaseTypes():
-            output_string += '{};{};{};{}\n'.format(
-                    base_type, int(rare_only_flag), min_ilvl, max_ilvl)
-        if ((len(output_string) > 0) and (output_string[-1] == '\n')):
-            output_string = output_string[:-1]  # remove final newline
-    # ========================================= Flasks =========================================
-    elif (function_name == 'set_flask_visibility'):
-        '''
-        set_flask_visibility <base_type: str> <visibility_flag: int> <(optional) high_ilvl_flag: int>
-         - This does not overwrite any original filter rules, only adds a rule on top.
-         - This function never hides flasks, it only modifies its own "Show" rule.
-         - <base_type> is any valid flask BaseType
-         - visibility_flag is 1 for True (visible), 0 for False (not included in DLF rule)
-         - high_ilvl_flag is 1 for only high ilvl flasks, 0 for any flasks
-         - rare_only_flag should *only* be specified when visibility_flag is 1;
-           when visibility_flag is 0, the base_type is removed from both rules.
-         - Output: None
-         - Example: > python3 backend_cli.py set_flask_rule_enabled_for "Quartz Flask" 1 0 MyProfile
-        '''
-        flask_base_type: str = function_params[0]
-        enable_flag: bool = bool(int(function_params[1]))
-        if (not enable_flag):
-            loot_filter.SetFlaskRuleEnabledFor(flask_base_type, enable_flag)
-        else:
-            CheckNumParams(function_params, 3)
-            high_ilvl_flag: bool = bool(int(function_params[2]))
-            loot_filter.SetFlaskRuleEnabledFor(flask_base_type, enable_flag, high_ilvl_flag)
-    elif (function_name == 'get_flask_visibility'):
-        '''
-        get_flask_visibility <base_type: str>
-         - <base_type> is any valid flask BaseType
-         - Output: a space-separated pair of boolean ints, e.g. "0 1"
-            - The first value corresponds to any ilvl, the second corresponds to high ilvl only
-            - 1 indicates visible, 0 indicates not present in DLF rule
-         - Example: > python3 backend_cli.py is_flask_rule_enabled_for "Quicksilver Flask" MyProfile
-        '''
-        CheckNumParams(function_params, 1)
-        flask_base_type: str = function_params[0]
-        any_visibility_flag = loot_filter.IsFlaskRuleEnabledFor(
-                flask_base_type, high_ilvl_flag=False)
-        high_ilvl_visibility_flag = loot_filter.IsFlaskRuleEnabledFor(
-                flask_base_type, high_ilvl_flag=True)
-        output_string = '{} {}'.format(int(any_visibility_flag), int(high_ilvl_visibility_flag))
-    elif (function_name == 'get_all_visible_flasks'):
-        '''
-        get_all_visible_flasks
-         - Output: newline-separated sequence of <flask_basetype>;<high_ilvl_flag: int>
-         - high_ilvl_flag is 1 for only high ilvl flasks, 0 for any flasks
-         - Example: > python3 backend_cli.py get_all_visible_flasks MyProfile
-        '''
-        CheckNumParams(function_params, 0)
-        visible_flask_types_any_ilvl = loot_filter.GetAllVisibleFlaskTypes(high_ilvl_flag=False)
-        visible_flask_types_high_ilvl = loot_filter.GetAllVisibleFlaskTypes(high_ilvl_flag=True)
-        # Compute high ilvl BaseTypes that are not also in any
-        visible_flask_types_high_ilvl_only = list(
-                set(visible_flask_types_high_ilvl) - set(visible_flask_types_any_ilvl))
-        for flask_base_type in visible_flask_types_any_ilvl:
-            output_string += '{};0\n'.format(flask_base_type)
-        for flask_base_type in visible_flask_types_high_ilvl_only:
-            output_string += '{};1\n'.format(flask_base_type)
-        if ((len(output_string) > 0) and (output_string[-1] == '\n')):
-            output_string = output_string[:-1]  # remove final newline
-    # ========================================= Socket Rules =========================================
-    elif (function_name == 'add_remove_socket_rule'):
-        '''
-        add_remove_socket_rule <socket_string: str> <(optional) item_slot: str> <add_flag: bool>
-         - TODO: add socket_string explanation
-         - <item_slot> is one of the following (case insensitive): "Weapons", "Body Armours",
-           "Helmets", "Gloves", "Boots", "Amulets", "Rings", "Belts", or "Any"
-         - add_flag is 1 to add a corresponding rule, 0 to remove the corresponding rule
-         - Output: None
-         - Example: > python3 backend_cli.py add_remove_socket_rule "B-B-G-X" 1 MyProfile
-         - Example: > python3 backend_cli.py add_remove_socket_rule "b-b xx" 1 MyProfile
-        '''
-        if (len(function_params) == 2):
-            function_params.insert(1, 'any')
-        CheckNumParams(function_params, 3)
-        socket_string, item_slot, add_flag_string = function_params
-        add_flag: bool = bool(int(add_flag_string))
-        if (not socket_helper.IsSocketStringValid(socket_string)):
-            raise RuntimeError('Given socket string is invalid: {}'.format(socket_string))
-        if (add_flag):
-            loot_filter.AddSocketRule(socket_string, item_slot)
-        else:
-            loot_filter.RemoveSocketRule(socket_string, item_slot)
-    elif (function_name == 'get_all_added_socket_rules'):
-        '''
-        get_all_added_socket_rules
-         - Output: newline-separated sequence of <socket_string>;<item_slot>
-         - Example: > python3 backend_cli.py get_all_added_socket_rules MyProfile
-        '''
-        CheckNumParams(function_params, 0)
-        lines = [';'.join(string_pair) for string_pair in loot_filter.GetAllAddedSocketRules()]
-        output_string = '\n'.join(lines)
-    # ======================================== Rgb Items ========================================
-    elif (function_name == 'set_rgb_item_max_size'):
-        '''
-        set_rgb_item_max_size <size: {none, small, medium, large}>
-         - Sets the maximum size at which an RGB item is shown
-         - "small" = 4, "medium" = 6, "large" = 8
-         - Output: None
-         - Example: > python3 backend_cli.py set_rgb_item_max_size small MyProfile
-        '''
-        CheckNumParams(function_params, 1)
-        rgb_item_max_size: str = function_params[0]
-        loot_filter.SetRgbItemMaxSize(rgb_item_max_size)
-    elif (function_name == 'get_rgb_item_max_size'):
-        '''
-        get_rgb_item_max_size
-         - Output:  max-size of shown RGB items, one of {none, small, medium, large}
-         - Example: > python3 backend_cli.py get_rgb_item_max_size MyProfile
-        '''
-        CheckNumParams(function_params, 0)
-        output_string = loot_filter.GetRgbItemMaxSize()
-    # =================================== Chaos Recipe Rares ===================================
-    elif (function_name == 'set_chaos_recipe_enabled_for'):
-        '''
-        set_chaos_recipe_enabled_for <item_slot: str> <enable_flag: int>
-         - <item_slot> is one of: "Weapons", "Body Armours", "Helmets", "Gloves",
-           "Boots", "Amulets", "Rings", "Belts"
-         - enable_flag is 1 for True (enable), 0 for False (disable)
-         - Output: None
-         - Example: > python3 backend_cli.py set_chaos_recipe_enabled_for Weapons 0 MyProfile
-        '''
-        CheckNumParams(function_params, 2)
-        item_slot: str = function_params[0]
-        enable_flag: bool = bool(int(function_params[1]))
-        loot_filter.SetChaosRecipeEnabledFor(item_slot, enable_flag)
-    elif (function_name == 'is_chaos_recipe_enabled_for'):
-        '''
-        is_chaos_recipe_enabled_for <item_slot: str>
-         - <item_slot> is one of: "Weapons", "Body Armours", "Helmets", "Gloves",
-           "Boots", "Amulets", "Rings", "Belts"  (defined in consts.py)
-         - Output: "1" if chaos recipe items are showing for the given item_slot, else "0"
-         - Example: > python3 backend_cli.py is_chaos_recipe_enabled_for "Body Armours" MyProfile
-        '''
-        CheckNumParams(function_params, 1)
-        item_slot: str = function_params[0]
-        output_string = str(int(loot_filter.IsChaosRecipeEnabledFor(item_slot)))
-    elif (function_name == 'get_all_chaos_recipe_statuses'):
-        '''
-        get_all_chaos_recipe_statuses
-         - Output: one line formatted as `<item_slot>;<enabled_flag>` for each item slot
-         - <item_slot> is one of: "Weapons", "Body Armours", "Helmets", "Gloves",
-           "Boots", "Amulets", "Rings", "Belts"
-         - <enabled_flag> is "1" if chaos recipe items are showing for given item_slot, else "0"
-         - Example: > python3 backend_cli.py get_all_chaos_recipe_statuses MyProfile
-        '''
-        CheckNumParams(function_params, 0)
-        for item_slot in consts.kItemSlots:
-            enabled_flag_string = str(int(loot_filter.IsChaosRecipeEnabledFor(item_slot)))
-            output_string += item_slot + ';' + enabled_flag_string + '\n'
-        if (output_string[-1] == '\n'): output_string = output_string[:-1]  # remove final newline
-    # ================================= Unmatched Function Name =================================
-    else:
+    global g_function_name
+    g_function_name = function_name
+    handler_function = GetCommandHandler(function_name, in_batch)
+    if (handler_function == None):
         error_message: str = 'command not supported: {} {}'.format(
                 function_name, shlex.join(function_params))
         logger.Log('Error: ' + error_message)
         raise RuntimeError(error_message)
-    # ============================= End Function Call Delegation ================================
+    with stage_timing.TimeStage('dispatch_handler'):
+        output_string = handler_function(loot_filter, function_params)
+    if (output_string == None):
+        output_string = ''
     # Return value is now in output_string
     if (in_batch):
         if (not suppress_output): AppendFunctionOutput(output_string)
@@ -862,17 +1347,20 @@ def DelegateFunctionCall(loot_filter: LootFilter or None,
     # This happens after function call processing, because that code may add default arguments.
     # Note: suppress_output also functioning as an indicator to not save profile data here.
     if (kFunctionInfoMap[function_name]['ModifiesFilter'] and not suppress_output):
-        profile_changes.AddChangeToProfile(
-                function_name, function_params, loot_filter.profile_obj.name)
+        with stage_timing.TimeStage('update_changes_file'):
+            profile_changes.AddChangeToProfile(
+                    function_name, function_params, loot_filter.profile_obj.name)
 # End DelegateFunctionCall
 
+# Parses the given arguments (everything after the script name in a command-line call).
 # Returns function_name, function_params, profile_name.
 # If there is no profile param, returned profile_name is None.
-def ValidateAndParseArguments() -> Tuple[str, List[str], str]:
-    # Always require at least 2 params: script_name, function_name
-    if (len(sys.argv) < 2):
+def ValidateAndParseArguments(arguments_list: List[str]) -> Tuple[str, List[str], str]:
+    CheckType(arguments_list, 'arguments_list', list, str)
+    # Always require at least 1 argument: function_name
+    if (len(arguments_list) < 1):
         Error('No function specified\n' + UsageMessage(None))
-    _, function_name, *remaining_params = sys.argv
+    function_name, *remaining_params = arguments_list
     if (function_name not in kFunctionInfoMap):
         Error('backend function does not exist: ' + function_name)
     function_params = []
@@ -896,30 +1384,168 @@ def ValidateAndParseArguments() -> Tuple[str, List[str], str]:
     return function_name, function_params, profile_name
 # End ValidateAndParseArguments
 
+# Returns the source the loot filter should be parsed from for the given function call.
+def GetInputFilterSource(function_name: str) -> InputFilterSource:
+    CheckType(function_name, 'function_name', str)
+    return (InputFilterSource.kDownload if (function_name == 'import_downloaded_filter')
+            else InputFilterSource.kInput if (function_name == 'load_input_filter')
+            else InputFilterSource.kOutput)
+# End GetInputFilterSource
+
+# Returns a (modification time, size) pair describing the current state of the given file,
+# or None if the file does not exist.  Used to detect files modified outside the daemon.
+def GetFileStamp(filepath: str) -> Tuple[int, int] or None:
+    CheckType(filepath, 'filepath', str)
+    if (not os.path.isfile(filepath)):
+        return None
+    stat_result = os.stat(filepath)
+    return (stat_result.st_mtime_ns, stat_result.st_size)
+# End GetFileStamp
+
+# Returns the stamps of all files a cached LootFilter for the given profile depends on.
+def GetProfileFileStamps(loot_filter: LootFilter) -> Tuple:
+    CheckType(loot_filter, 'loot_filter', LootFilter)
+    return (GetFileStamp(loot_filter.profile_obj.config_values['OutputLootFilterFullpath']),
+            GetFileStamp(loot_filter.profile_obj.config_path))
+# End GetProfileFileStamps
+
+# Returns True if stage timings should be recorded, as determined by the environment variable
+# kRecordTimingsEnvironmentVariable if it is set, and otherwise by general.config.
+def IsTimingRequested(general_config: GeneralConfig) -> bool:
+    CheckType(general_config, 'general_config', GeneralConfig)
+    if (kRecordTimingsEnvironmentVariable in os.environ):
+        return os.environ[kRecordTimingsEnvironmentVariable].strip().lower() in ('1', 'true')
+    return str(general_config[GeneralConfigKeywords.kRecordTimings]).strip().lower() == 'true'
+# End IsTimingRequested
+
 def main_impl():
+    import_seconds = time.perf_counter() - kImportStartTime
     # Initialize log
     logger.InitializeLog(kLogFilename)
     # Clear info file
     file_helper.WriteToFile('', kInfoFilename)
     argv_info_message: str = 'Info: sys.argv = ' + str(sys.argv)
     logger.Log(argv_info_message)
-    function_name, function_params, profile_name = ValidateAndParseArguments()
-    # Set input filter source based on function name
-    input_filter_source = (
-            InputFilterSource.kDownload if (function_name == 'import_downloaded_filter')
-            else InputFilterSource.kInput if (function_name == 'load_input_filter')
-            else InputFilterSource.kOutput)
-    # Delegate function call:
-    # We create the loot filter first and pass in as a parameter, so that
-    # DelegateFunctionCall can call itself recursively in run_batch.
-    loot_filter = LootFilter(profile_name, input_filter_source) if profile_name else None
-    DelegateFunctionCall(loot_filter, function_name, function_params)
+    general_config = GeneralConfig()
+    # The type check level environment variable, if set, takes precedence over general.config
+    # (it was applied on import, and is applied again so an invalid value is logged here).
+    # An unrecognized level in general.config (e.g. the removed first_call) leaves checks on
+    type_check_level = general_config[GeneralConfigKeywords.kTypeCheckLevel]
+    if (type_checker.kTypeCheckLevelEnvironmentVariable in os.environ):
+        type_checker.ApplyTypeCheckLevelEnvironmentVariable()
+    elif (type_check_level in type_checker.TypeCheckLevel.kLevelsList):
+        type_checker.SetTypeCheckLevel(type_check_level)
+    else:
+        logger.Log('Warning: ignoring invalid type check level "{}" in general.config'.format(
+                type_check_level))
+    stage_timing.EnableTiming(IsTimingRequested(general_config))
+    function_name, function_params, profile_name = ValidateAndParseArguments(sys.argv[1:])
+    if (function_name == 'run_daemon'):
+        RunDaemon()
+        return
+    stage_timing.ResetTimings()
+    stage_timing.AddStageTime('import_modules', import_seconds)
+    try:
+        # Delegate function call:
+        # We create the loot filter first and pass in as a parameter, so that
+        # DelegateFunctionCall can call itself recursively in run_batch.
+        with stage_timing.TimeStage('create_loot_filter'):
+            loot_filter = (LootFilter(profile_name, GetInputFilterSource(function_name))
+                           if profile_name else None)
+        DelegateFunctionCall(loot_filter, function_name, function_params)
+    finally:
+        if (stage_timing.IsTimingEnabled()):
+            stage_timing.WriteTimings(sys.argv[1:], time.perf_counter() - kImportStartTime,
+                                      kTimingsFilename)
 # End main_impl
 
+# Handles a single daemon request line, using and updating loot_filter_cache, which maps
+# profile_name -> (loot_filter, profile_file_stamps).
+def HandleDaemonRequest(request_line: str, loot_filter_cache: dict):
+    CheckType(request_line, 'request_line', str)
+    CheckType(loot_filter_cache, 'loot_filter_cache', dict)
+    # Reset log and info file for each request, as they would be in a fresh process
+    logger.InitializeLog(kLogFilename)
+    file_helper.WriteToFile('', kInfoFilename)
+    logger.Log('Info: daemon request = ' + request_line)
+    request_arguments = shlex.split(request_line)
+    function_name, function_params, profile_name = ValidateAndParseArguments(request_arguments)
+    if (function_name == 'run_daemon'):
+        Error('run_daemon cannot be called from within the daemon')
+    stage_timing.ResetTimings()
+    start_time = time.perf_counter()
+    try:
+        loot_filter = None
+        if (profile_name != None):
+            input_filter_source = GetInputFilterSource(function_name)
+            if ((input_filter_source == InputFilterSource.kOutput)
+                    and (profile_name in loot_filter_cache)):
+                cached_loot_filter, cached_stamps = loot_filter_cache[profile_name]
+                if (GetProfileFileStamps(cached_loot_filter) == cached_stamps):
+                    loot_filter = cached_loot_filter
+            if (loot_filter == None):
+                with stage_timing.TimeStage('create_loot_filter'):
+                    loot_filter = LootFilter(profile_name, input_filter_source)
+        # Drop the cache entry before delegating, so a failed call never leaves
+        # a partially modified filter behind
+        loot_filter_cache.pop(profile_name, None)
+        DelegateFunctionCall(loot_filter, function_name, function_params)
+    finally:
+        if (stage_timing.IsTimingEnabled()):
+            stage_timing.WriteTimings(request_arguments, time.perf_counter() - start_time,
+                                      kTimingsFilename)
+    if (loot_filter == None):
+        # Non-profile functions may create, rename, or delete profiles
+        loot_filter_cache.clear()
+    elif (loot_filter.input_filter_source == InputFilterSource.kOutput):
+        loot_filter_cache[profile_name] = (loot_filter, GetProfileFileStamps(loot_filter))
+# End HandleDaemonRequest
+
+def RunDaemon():
+    '''
+    run_daemon
+     - Runs backend_cli as a long-lived process, reading function calls from standard input,
+       one per line, formatted exactly as the command-line arguments:
+       <function_name> <function_params...> <profile_name (if required)>
+     - One parsed LootFilter is kept in memory per profile, and is re-parsed only when
+       the output filter or profile config file is modified by another process
+     - Function outputs are written to backend_cli.output, and errors to backend_cli.log,
+       exactly as for regular command-line calls
+     - After each call, a single status line is written to standard output:
+       "0" on success, "1" on failure (matching the exit code of a command-line call)
+     - Nothing else is written to standard output: anything printed during a call
+       goes to standard error instead
+     - Stops at the end of input, or on the line "exit"
+     - Example: > python3 backend_cli.py run_daemon
+    '''
+    loot_filter_cache = {}
+    status_output = sys.stdout
+    for request_line in sys.stdin:
+        request_line = request_line.strip()
+        if (request_line == ''):
+            continue
+        elif (request_line == 'exit'):
+            break
+        sys.stdout = sys.stderr
+        try:
+            HandleDaemonRequest(request_line, loot_filter_cache)
+            status_code = 0
+        except Exception:
+            logger.Log(traceback.format_exc())
+            status_code = 1
+        finally:
+            sys.stdout = status_output
+        print(status_code, file=status_output, flush=True)
+# End RunDaemon
+
 # Wrap the main_impl in a try-except block, so we can detect and report error messages
 def main():
     try:
-        main_impl()
+        if (os.environ.get(kCProfileOutputEnvironmentVariable, '') != ''):
+            stage_timing.RunWithCProfile(
+                    main_impl, os.environ[kCProfileOutputEnvironmentVariable])
+        else:
+            main_impl()
     except Exception as e:
         logger.Log(traceback.format_exc())
         raise e
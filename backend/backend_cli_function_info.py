@@ -78,11 +78,26 @@ kFunctionInfoMap = {
         'HasProfileParam' : True,
         'ModifiesFilter' : False,
     },
+    'get_filter_snapshot' : {
+        'NumParamsOptions' : [0],
+        'HasProfileParam' : True,
+        'ModifiesFilter' : False,
+    },
+    'run_daemon' : {
+        'NumParamsOptions' : [0],
+        'HasProfileParam' : False,
+        'ModifiesFilter' : False,
+    },
     'get_rule_matching_item' : {
         'NumParamsOptions' : [0],
         'HasProfileParam' : True,
         'ModifiesFilter' : False,
     },
+    'get_rules_matching_items' : {
+        'NumParamsOptions' : [0],
+        'HasProfileParam' : True,
+        'ModifiesFilter' : False,
+    },
     'set_rule_visibility' : {
         'NumParamsOptions' : [3],
         'HasProfileParam' : True,
@@ -1,11 +1,20 @@
+import backend_cli
 from backend_cli import kInputFilename as kBackendCliInputFilename
+from backend_cli import kOutputFilename as kBackendCliOutputFilename
+from backend_cli_function_info import kFunctionInfoMap
 
+import json
 import os
+import subprocess
 
 import file_helper
+from general_config import GeneralConfigKeywords
+import generate_item_test_cases
+from item import Item
+from loot_filter import InputFilterSource, LootFilter
 import profile
 import test_consts
-from test_assertions import AssertEqual, AssertTrue, AssertFalse
+from test_assertions import AssertEqual, AssertTrue, AssertFalse, AssertFailure
 import test_helper
 from type_checker import CheckType
 
@@ -96,6 +105,184 @@ set_chaos_recipe_enabled_for "Belts" 0
 is_chaos_recipe_enabled_for "Weapons"
 get_all_chaos_recipe_statuses'''
 
+# Sends the given function call (profile name omitted) to the daemon process,
+# and returns the status line the daemon responds with.
+def CallBackendCliDaemon(daemon_process: subprocess.Popen, function_call: str) -> str:
+    CheckType(daemon_process, 'daemon_process', subprocess.Popen)
+    CheckType(function_call, 'function_call', str)
+    print('Daemon running: {}'.format(function_call))
+    daemon_process.stdin.write(function_call + ' ' + test_consts.kTestProfileName + '\n')
+    daemon_process.stdin.flush()
+    return daemon_process.stdout.readline().strip()
+# End CallBackendCliDaemon
+
+# Interleaves daemon and regular command-line calls, checking that the daemon produces
+# the same outputs, and picks up filter changes made by other processes.
+def DaemonTest():
+    test_helper.SetUp()
+    CallBackendCli('import_downloaded_filter', test_consts.kTestProfileName)
+    daemon_process = subprocess.Popen(['python', 'backend_cli.py', 'run_daemon'],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+    getter_calls = ['get_tier_of_currency "Chromatic Orb"', 'get_all_currency_tiers',
+                    'get_gem_min_quality', 'get_hide_maps_below_tier']
+    setter_calls = ['set_currency_to_tier "Chromatic Orb" 2', 'set_gem_min_quality 18',
+                    'set_hide_maps_below_tier 13']
+    for setter_call in setter_calls:
+        AssertEqual(CallBackendCliDaemon(daemon_process, setter_call), '0')
+        for getter_call in getter_calls:
+            AssertEqual(CallBackendCliDaemon(daemon_process, getter_call), '0')
+            daemon_output = file_helper.ReadFile(kBackendCliOutputFilename)
+            CallBackendCli(getter_call, test_consts.kTestProfileName)
+            AssertEqual(daemon_output, file_helper.ReadFile(kBackendCliOutputFilename))
+    # Modify the filter from outside the daemon, daemon should re-parse it
+    CallBackendCli('set_currency_to_tier "Chromatic Orb" 4', test_consts.kTestProfileName)
+    AssertEqual(CallBackendCliDaemon(daemon_process, 'get_tier_of_currency "Chromatic Orb"'), '0')
+    AssertEqual(file_helper.ReadFile(kBackendCliOutputFilename, strip=True), ['4'])
+    # Invalid calls should report failure, without stopping the daemon
+    AssertEqual(CallBackendCliDaemon(daemon_process, 'set_gem_min_quality'), '1')
+    AssertEqual(CallBackendCliDaemon(daemon_process, 'get_gem_min_quality'), '0')
+    # Warnings from parsing rules during a call must not be mixed into the status lines
+    output_filter_fullpath = profile.Profile(
+            test_consts.kTestProfileName).config_values['OutputLootFilterFullpath']
+    output_filter_lines = file_helper.ReadFile(output_filter_fullpath, strip=False)
+    show_line_index = next(i for i, line in enumerate(output_filter_lines)
+                           if '$type->currency $tier->t1exalted' in line)
+    output_filter_lines.insert(show_line_index + 1, '\tUnrecognizedKeyword 1\n')
+    file_helper.WriteToFile(output_filter_lines, output_filter_fullpath)
+    AssertEqual(CallBackendCliDaemon(daemon_process, 'set_currency_to_tier "Chromatic Orb" 1'),
+                '0')
+    AssertEqual(CallBackendCliDaemon(daemon_process, 'get_tier_of_currency "Chromatic Orb"'), '0')
+    AssertEqual(file_helper.ReadFile(kBackendCliOutputFilename, strip=True), ['1'])
+    daemon_process.stdin.write('exit\n')
+    daemon_process.stdin.flush()
+    AssertEqual(daemon_process.wait(), 0)
+    print('DaemonTest passed!')
+# End DaemonTest
+
+# Checks get_rules_matching_items output against LootFilter.GetRuleMatchingItem,
+# including an item text that cannot be parsed.
+def RulesMatchingItemsTest():
+    test_helper.SetUp()
+    CallBackendCli('import_downloaded_filter', test_consts.kTestProfileName)
+    item_text_strings = generate_item_test_cases.ParseSampleItemsTxt(test_consts.kTestItemsFullpath)
+    item_text_strings.insert(1, 'Not an item')
+    file_helper.WriteToFile(test_consts.kHorizontalSeparator + '\n'
+            + ('\n' + test_consts.kHorizontalSeparator + '\n').join(item_text_strings),
+            kBackendCliInputFilename)
+    CallBackendCli('get_rules_matching_items', test_consts.kTestProfileName)
+    output_lines = file_helper.ReadFile(kBackendCliOutputFilename, strip=True)
+    AssertEqual(len(output_lines), len(item_text_strings))
+    AssertEqual(output_lines[1], ';')
+    loot_filter = LootFilter(test_consts.kTestProfileName, InputFilterSource.kOutput)
+    for item_text, output_line in zip(item_text_strings[:1] + item_text_strings[2:],
+                                      output_lines[:1] + output_lines[2:]):
+        matched_rule = loot_filter.GetRuleMatchingItem(Item(item_text))
+        AssertEqual(output_line, '{};{}'.format(matched_rule.type_tag, matched_rule.tier_tag))
+    print('RulesMatchingItemsTest passed!')
+# End RulesMatchingItemsTest
+
+# Checks get_filter_snapshot output against the outputs of the corresponding getters,
+# as obtained (and parsed) by the GUI before get_filter_snapshot existed: via run_batch.
+def FilterSnapshotTest():
+    test_helper.SetUp()
+    CallBackendCli('import_downloaded_filter', test_consts.kTestProfileName)
+    CallBackendCli('set_currency_tier_min_visible_stack_size twisdom hide_all',
+                   test_consts.kTestProfileName)
+    CallBackendCli('add_remove_socket_rule "B-B-G-X" 1', test_consts.kTestProfileName)
+    file_helper.WriteToFile('\n'.join(getter_function_name for _, _, getter_function_name
+            in backend_cli.kFilterSnapshotSections), kBackendCliInputFilename)
+    CallBackendCli('run_batch', test_consts.kTestProfileName)
+    batch_output = file_helper.ReadFile(kBackendCliOutputFilename, strip=True)
+    expected_snapshot = {}
+    for section_name, section_kind, _ in backend_cli.kFilterSnapshotSections:
+        separator_index = batch_output.index('@')
+        section_lines, batch_output = (batch_output[:separator_index],
+                                       batch_output[separator_index + 1:])
+        # Empty lines are skipped by the GUI, except as scalar values
+        if (section_kind != backend_cli.kSnapshotScalar):
+            section_lines = [line for line in section_lines if (line != '')]
+        if (section_kind == backend_cli.kSnapshotScalar):
+            expected_snapshot[section_name] = section_lines[0]
+        elif (section_kind == backend_cli.kSnapshotDict):
+            expected_snapshot[section_name] = dict(line.split(';', 1) for line in section_lines)
+        else:
+            expected_snapshot[section_name] = {line : '1' for line in section_lines}
+    AssertEqual([line for line in batch_output if (line != '')], [])
+    CallBackendCli('get_filter_snapshot', test_consts.kTestProfileName)
+    snapshot_lines = file_helper.ReadFile(kBackendCliOutputFilename, strip=True)
+    AssertEqual(snapshot_lines[0], 'version\t{}'.format(backend_cli.kFilterSnapshotVersion))
+    snapshot = {}
+    for line in snapshot_lines[1:]:
+        fields = line.split('\t')
+        if (len(fields) == 1):
+            snapshot[fields[0]] = {}
+        elif (len(fields) == 2):
+            snapshot[fields[0]] = fields[1]
+        else:
+            snapshot[fields[0]][fields[1]] = fields[2]
+    AssertEqual(snapshot, expected_snapshot)
+    AssertEqual(snapshot['currency_tier_min_visible_stack_sizes']['twisdom'], 'hide_all')
+    AssertEqual(len(snapshot['socket_rules']), 1)
+    print('FilterSnapshotTest passed!')
+# End FilterSnapshotTest
+
+# Checks that command handlers are registered consistently with kFunctionInfoMap
+def CommandRegistryTest():
+    for function_name in backend_cli.g_command_handlers:
+        AssertTrue(function_name in kFunctionInfoMap)
+    # run_daemon is handled in main, all other functions are dispatched through handlers
+    for function_name in ('is_first_launch', 'set_currency_to_tier', 'show_basetype',
+                          'disable_basetype', 'import_downloaded_filter', 'run_batch'):
+        AssertTrue(backend_cli.GetCommandHandler(function_name) != None)
+    AssertFalse('run_daemon' in backend_cli.g_command_handlers)
+    # Import and run_batch cannot be called in batch
+    for function_name in ('import_downloaded_filter', 'load_input_filter', 'run_batch'):
+        AssertEqual(backend_cli.GetCommandHandler(function_name, in_batch=True), None)
+    AssertTrue(backend_cli.GetCommandHandler('set_currency_to_tier', in_batch=True) != None)
+    # Registering an unknown or already registered function is an error
+    for function_name in ('not_a_function', 'set_currency_to_tier'):
+        try:
+            backend_cli.Command(function_name)
+        except RuntimeError:  # this should happen
+            pass
+        else:
+            AssertFailure()
+    print('CommandRegistryTest passed!')
+# End CommandRegistryTest
+
+# Checks create_new_profile, which has no profile parameter (so its handler receives no
+# LootFilter), and reads the new profile's config values from the input file.
+def CreateNewProfileTest():
+    test_helper.SetUp(create_profile=False)
+    profile_name = test_consts.kTestProfileName
+    file_helper.WriteToFile(['{}: {}'.format(keyword, value) for keyword, value
+                             in test_consts.kTestProfileConfigValues.items()],
+                            kBackendCliInputFilename)
+    CallBackendCli('create_new_profile {}'.format(profile_name))
+    AssertEqual(file_helper.ReadFile(kBackendCliOutputFilename, strip=True), ['1'])
+    AssertTrue(profile.ProfileExists(profile_name))
+    AssertEqual(profile.Profile(profile_name).config_values['DownloadedLootFilterFilename'],
+                test_consts.kTestProfileDownloadedFilterFilename)
+    # Profile already exists: nothing is created
+    CallBackendCli('create_new_profile {}'.format(profile_name))
+    AssertEqual(file_helper.ReadFile(kBackendCliOutputFilename, strip=True), ['0'])
+    print('CreateNewProfileTest passed!')
+# End CreateNewProfileTest
+
+# set_hotkey may only set hotkeys, not the other general.config values
+def SetHotkeyTest():
+    for keyword in GeneralConfigKeywords.kKeywordsList:
+        if (keyword in GeneralConfigKeywords.kHotkeysList):
+            continue
+        try:
+            backend_cli.g_command_handlers['set_hotkey'](None, [keyword, 'F7'])
+        except RuntimeError:  # this should happen
+            pass
+        else:
+            AssertFailure()
+    print('SetHotkeyTest passed!')
+# End SetHotkeyTest
+
 # Just a simple test to see if the functions can run without error;
 # doesn't verify output is correct.
 def SimpleTest():
@@ -123,7 +310,46 @@ def SimpleTest():
     CallBackendCli('run_batch', profile_name)
     print('SimpleTest passed!')
 
+# Checks that stage timings are recorded when requested by environment variable,
+# and that a cProfile stats file is written when requested.
+def TimingsTest():
+    test_helper.SetUp()
+    kStatsFilename = os.path.join(test_consts.kTestWorkingDirectory, 'backend_cli.prof')
+    file_helper.RemoveFileIfExists(backend_cli.kTimingsFilename)
+    os.environ[backend_cli.kRecordTimingsEnvironmentVariable] = '1'
+    os.environ[backend_cli.kCProfileOutputEnvironmentVariable] = kStatsFilename
+    try:
+        CallBackendCli('import_downloaded_filter', test_consts.kTestProfileName)
+        CallBackendCli('set_gem_min_quality 18', test_consts.kTestProfileName)
+    finally:
+        del os.environ[backend_cli.kRecordTimingsEnvironmentVariable]
+        del os.environ[backend_cli.kCProfileOutputEnvironmentVariable]
+    AssertTrue(os.path.isfile(kStatsFilename))
+    timings_lines = file_helper.ReadFile(
+            backend_cli.kTimingsFilename, strip=True, discard_empty_lines=True)
+    AssertEqual(len(timings_lines), 2)
+    import_stage_names = [stage_name for stage_name, _ in json.loads(timings_lines[0])['stages']]
+    for stage_name in ['import_modules', 'create_loot_filter', 'load_profile',
+                       'read_and_split_blocks', 'parse_blocks', 'parse_rules',
+                       'apply_import_changes', 'dispatch_handler', 'save_filter']:
+        AssertTrue(stage_name in import_stage_names)
+    setter_timings_dict = json.loads(timings_lines[1])
+    AssertEqual(setter_timings_dict['call'],
+                ['set_gem_min_quality', '18', test_consts.kTestProfileName])
+    AssertTrue('update_changes_file' in [stage_name for stage_name, _
+                                         in setter_timings_dict['stages']])
+    file_helper.RemoveFileIfExists(backend_cli.kTimingsFilename)
+    print('TimingsTest passed!')
+# End TimingsTest
+
 def main():
+    CommandRegistryTest()
+    SetHotkeyTest()
+    CreateNewProfileTest()
+    DaemonTest()
+    RulesMatchingItemsTest()
+    FilterSnapshotTest()
+    TimingsTest()
     SimpleTest()
     test_helper.TearDown()
     print('All tests passed!')
@@ -0,0 +1,119 @@
+'''
+This file defines the class BaseTypeIndex, which maps each BaseType to the keys
+(type_tag, tier_tag) of the rules whose BaseType condition lists it.
+
+The index is built from a LootFilter's rule_or_text_block_hll, and registers itself with
+each indexed rule.  Whenever an indexed rule is updated (LootFilterRule.UpdateRuleTextLines
+or ParseRuleTextLines, which every rule modification goes through, e.g. AddBaseType and
+RemoveBaseType), the rule calls UpdateRule, so the index stays current as rules are modified.
+
+Rules that have not been parsed yet (see loot_filter.RuleOrTextBlock) are indexed from the
+BaseType lines of their text, so building the index does not force rules to be parsed.
+An unparsed rule cannot be modified, so its entry stays valid until the rule is parsed, at
+which point RuleOrTextBlock calls RegisterParsedRule to register the index with the new rule.
+
+When rules are added to or removed from the filter, the index must be rebuilt;
+IsCurrent detects this.
+'''
+
+from typing import List, Tuple
+
+from hash_linked_list import HashLinkedList
+from loot_filter_rule import LootFilterRule
+import parse_helper
+from type_checker import CheckType
+
+# Returns the BaseTypes of the (last) BaseType line of the given rule text lines, as
+# LootFilterRule.GetBaseTypeList would after parsing them, without parsing the other lines.
+def ParseBaseTypesFromText(text_lines: List[str]) -> frozenset:
+    show_hide_line_index = parse_helper.FindShowHideLineIndex(text_lines)
+    base_types = frozenset()
+    for line in text_lines[show_hide_line_index + 1:]:
+        if ('BaseType' in line):
+            keyword, _, values_list = parse_helper.ParseRuleLineGeneric(line)
+            if (keyword == 'BaseType'):
+                base_types = frozenset(values_list)
+    return base_types
+# End ParseBaseTypesFromText
+
+class BaseTypeIndex:
+    '''
+    Member variables:
+     - self.rule_or_text_block_hll: HashLinkedList - the indexed filter's rule_or_text_block_hll
+     - self.num_hll_modifications: int - rule_or_text_block_hll.num_modifications when indexed
+     - self.rule_keys_map: dict mapping BaseType to dict of rule key -> None
+        - used as an insertion-ordered set of the keys of the rules containing the BaseType
+     - self.indexed_rules_map: dict mapping id(rule) to (rule_key, base_types) as last indexed
+        - base_types: frozenset of the BaseTypes of the rule
+        - for a rule that is not parsed yet, the key is id(rule_or_text_block) instead
+    '''
+
+    # rule_or_text_block_hll is a LootFilter's HashLinkedList of RuleOrTextBlocks
+    def __init__(self, rule_or_text_block_hll: HashLinkedList):
+        CheckType(rule_or_text_block_hll, 'rule_or_text_block_hll', HashLinkedList)
+        self.rule_or_text_block_hll = rule_or_text_block_hll
+        self.num_hll_modifications = rule_or_text_block_hll.num_modifications
+        self.rule_keys_map = {}
+        self.indexed_rules_map = {}
+        for rule_key, rule_or_text_block in rule_or_text_block_hll:
+            if (not rule_or_text_block.is_rule):
+                continue
+            if (rule_or_text_block.IsParsed()):
+                rule = rule_or_text_block.rule
+                rule.base_type_index = self
+                self.UpdateRule(rule)
+            else:
+                rule_or_text_block.base_type_index = self
+                self.AddEntry(id(rule_or_text_block), rule_key,
+                              ParseBaseTypesFromText(rule_or_text_block.text_lines))
+    # End __init__
+
+    def AddEntry(self, entry_id: int, rule_key: Tuple[str, str], base_types: frozenset):
+        for base_type in base_types:
+            self.rule_keys_map.setdefault(base_type, {})[rule_key] = None
+        self.indexed_rules_map[entry_id] = (rule_key, base_types)
+    # End AddEntry
+
+    # Called when the given indexed rule_or_text_block has just parsed its rule: moves the
+    # block's entry to the rule, and registers the index with the rule.
+    def RegisterParsedRule(self, rule_or_text_block, rule: LootFilterRule):
+        entry = self.indexed_rules_map.pop(id(rule_or_text_block), None)
+        if (entry != None):
+            self.indexed_rules_map[id(rule)] = entry
+        rule.base_type_index = self
+        self.UpdateRule(rule)
+    # End RegisterParsedRule
+
+    # Updates the index to reflect the current BaseType list and tags of the given rule.
+    def UpdateRule(self, rule: LootFilterRule):
+        rule_key = (rule.type_tag, rule.tier_tag)
+        base_types = frozenset(rule.GetBaseTypeList())
+        previous_rule_key, previous_base_types = self.indexed_rules_map.get(
+                id(rule), (rule_key, frozenset()))
+        if ((rule_key == previous_rule_key) and (base_types == previous_base_types)):
+            return
+        for base_type in previous_base_types:
+            rule_keys = self.rule_keys_map[base_type]
+            rule_keys.pop(previous_rule_key, None)
+            if (len(rule_keys) == 0):
+                del self.rule_keys_map[base_type]
+        self.AddEntry(id(rule), rule_key, base_types)
+    # End UpdateRule
+
+    # Returns True if no rules have been added to or removed from the filter since indexing.
+    def IsCurrent(self, rule_or_text_block_hll: HashLinkedList) -> bool:
+        return ((rule_or_text_block_hll is self.rule_or_text_block_hll)
+                and (rule_or_text_block_hll.num_modifications == self.num_hll_modifications))
+    # End IsCurrent
+
+    # Returns the keys (type_tag, tier_tag) of all rules containing the given BaseType.
+    def GetRuleKeys(self, base_type: str) -> List[Tuple[str, str]]:
+        CheckType(base_type, 'base_type', str)
+        return list(self.rule_keys_map.get(base_type, ()))
+    # End GetRuleKeys
+
+    def RuleContainsBaseType(self, rule_key: Tuple[str, str], base_type: str) -> bool:
+        return rule_key in self.rule_keys_map.get(base_type, ())
+    # End RuleContainsBaseType
+
+# End class BaseTypeIndex
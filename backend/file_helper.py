@@ -8,9 +8,14 @@ Note: we will still generate an error if the source file does not exist, as ther
 natural way to recover from such an error - the user must be notified their copy failed.
 
 File read/write functions:
- - ReadFile(filepath: str, *, strip=False, discard_empty_lines=False) -> List[str]
+ - ReadFile(filepath: str, *, strip=False, discard_empty_lines=False, max_num_lines=None)
+   -> List[str]
+ - IterBlocks(filepath: str) -> Iterator[List[str]]
  - ReadFileToDict(filepath) -> dict
  - WriteToFile(data, filepath)
+ - AtomicWriteToFile(data, filepath, *, fsync_flag=False)
+ - AppendToFile(data, filepath)
+ - AppendLineToFile(line, filepath, *, fsync_flag=False)
  - NumLines(filepath) -> int
  - IsFileEmpty(filepath) -> bool
 
@@ -29,24 +34,31 @@ Path-related functions:
 import os
 import os.path
 import shutil
-from typing import List
+import time
+from typing import Iterator, List
+import uuid
 
 from type_checker import CheckType
 
 # ========================== File Reading/Writing ==========================
 
 # Read lines of a file to a list of strings, such that joining this result with newlines
-# yields the exact file contents (as long as additional options are all False).
+# yields the exact file contents (as long as additional options are all False/None).
+# If max_num_lines is given, only the first max_num_lines lines are read.
 # Safe against file not existing.
-def ReadFile(filepath: str, *, strip=False, discard_empty_lines=False) -> List[str]:
+def ReadFile(filepath: str, *, strip=False, discard_empty_lines=False,
+             max_num_lines: int = None) -> List[str]:
     CheckType(filepath, 'filepath', str)
     CheckType(strip, 'strip', bool)
     CheckType(discard_empty_lines, 'discard_empty_lines', bool)
+    CheckType(max_num_lines, 'max_num_lines', (int, type(None)))
     lines: List[str] = []
     try:
         with open(filepath, encoding='utf-8') as input_file:
             ends_with_newline = True
             for line in input_file:
+                if ((max_num_lines != None) and (len(lines) >= max_num_lines)):
+                    break
                 ends_with_newline = line.endswith('\n')
                 line = line.rstrip('\n')
                 line = line.strip() if strip else line
@@ -55,11 +67,33 @@ def ReadFile(filepath: str, *, strip=False, discard_empty_lines=False) -> List[s
             # Append final blank line if file ends with newline
             if (ends_with_newline and not discard_empty_lines):
                 lines.append('')
-            return lines
+            return lines[:max_num_lines]
     except FileNotFoundError:
         return []
 # End ReadFile
 
+# Yields the blocks of the given file, reading the file one line at a time.
+# A block is a list of consecutive non-empty lines, and blocks are separated by one
+# or more empty lines.  Lines are stripped, so whitespace-only lines count as empty.
+# Safe against file not existing (yields no blocks).
+def IterBlocks(filepath: str) -> Iterator[List[str]]:
+    CheckType(filepath, 'filepath', str)
+    try:
+        with open(filepath, encoding='utf-8') as input_file:
+            current_block = []
+            for line in input_file:
+                line = line.strip()
+                if (line != ''):
+                    current_block.append(line)
+                elif (len(current_block) > 0):
+                    yield current_block
+                    current_block = []
+            if (len(current_block) > 0):
+                yield current_block
+    except FileNotFoundError:
+        return
+# End IterBlocks
+
 # Parses each line of the input file as <key>:<value>, or as <key><separator><value>.
 # Ignores empty lines, and lines whose first non-whitespace character is '#'.
 # Strips key and value before inserting into dict.  Ignores lines missing separator.
@@ -79,6 +113,20 @@ def ReadFileToDict(filepath: str, separator=':') -> dict:
         return {}
 # End ReadFile
 
+# Converts data to the string written by the functions below.
+# If data is a non-string iterable type, it is converted to newline-separated items,
+# otherwise, it is converted by str(data).
+def DataToString(data) -> str:
+    if (isinstance(data, str)):
+        return data
+    try:
+        iter(data)
+        data_list = list(data)
+        return '\n'.join(str(x) for x in data_list)
+    except TypeError:
+        return str(data)
+# End DataToString
+
 # Writes data to the file determined by filepath.
 # Overwrites the given file if it already exists.
 # If data is a non-string iterable type, then it is written as newline-separated items,
@@ -90,17 +138,50 @@ def WriteToFile(data, filepath: str):
     if (parent_directory != ''):
         os.makedirs(parent_directory, exist_ok=True)
     with open(filepath, 'w', encoding='utf-8') as f:
-        if (isinstance(data, str)):
-            f.write(data)
-        else:
-            try:
-                iter(data)
-                data_list = list(data)
-                f.write('\n'.join(str(x) for x in data_list))
-            except TypeError:
-                f.write(str(data))
+        f.write(DataToString(data))
 # End WriteToFile
 
+# Number of times, and delay in seconds between attempts, to replace the target file in
+# AtomicWriteToFile.  On Windows, replacing fails while another process has the file open.
+kAtomicReplaceNumAttempts = 10
+kAtomicReplaceRetryDelay = 0.05
+
+# Writes data to the file determined by filepath, such that other processes reading the file
+# see either its previous contents or the complete new contents, never a partially written file.
+# The data is written in a single write to a temporary file in the same directory,
+# which then replaces the target file.  If fsync_flag is True, the data is also flushed
+# to disk before replacing the target file, so the write additionally survives system crashes.
+# Data is converted as in WriteToFile, except bytes, which are written exactly as given.
+# Safe against directory not existing (creates directory if missing).
+def AtomicWriteToFile(data, filepath: str, *, fsync_flag: bool = False):
+    CheckType(filepath, 'filepath', str)
+    CheckType(fsync_flag, 'fsync_flag', bool)
+    parent_directory = os.path.dirname(filepath)
+    if (parent_directory != ''):
+        os.makedirs(parent_directory, exist_ok=True)
+    data_bytes = (data if isinstance(data, bytes)
+            else DataToString(data).replace('\n', os.linesep).encode('utf-8'))
+    temp_filepath = '{}.{}.tmp'.format(filepath, uuid.uuid4().hex[:8])
+    try:
+        with open(temp_filepath, 'xb') as temp_file:
+            temp_file.write(data_bytes)
+            if (fsync_flag):
+                temp_file.flush()
+                os.fsync(temp_file.fileno())
+        if (os.path.isfile(filepath)):
+            shutil.copymode(filepath, temp_filepath)
+        for attempt_index in range(kAtomicReplaceNumAttempts):
+            try:
+                os.replace(temp_filepath, filepath)
+                break
+            except PermissionError:
+                if (attempt_index == kAtomicReplaceNumAttempts - 1):
+                    raise
+                time.sleep(kAtomicReplaceRetryDelay)
+    finally:
+        RemoveFileIfExists(temp_filepath)
+# End AtomicWriteToFile
+
 # Appends data to the file determined by filepath.
 # If data is a non-string iterable type, then it is written as newline-separated items,
 # otherwise str(data) is written directly.
@@ -111,17 +192,33 @@ def AppendToFile(data, filepath):
     if (parent_directory != ''):
         os.makedirs(parent_directory, exist_ok=True)
     with open(filepath, 'a', encoding='utf-8') as f:
-        if (isinstance(data, str)):
-            f.write(data)
-        else:
-            try:
-                iter(data)
-                data_list = list(data)
-                f.write('\n'.join(str(x) for x in data_list))
-            except TypeError:
-                f.write(str(data))
+        f.write(DataToString(data))
 # End AppendToFile
 
+# Appends the given line to the file determined by filepath, in a single write, as a complete
+# line: a line separator is added after the line, and also before it if the file does not
+# already end with one.  If fsync_flag is True, the line is flushed to disk before returning.
+# Safe against file or directory not existing (creates file or directory if missing).
+def AppendLineToFile(line: str, filepath: str, *, fsync_flag: bool = False):
+    CheckType(line, 'line', str)
+    CheckType(filepath, 'filepath', str)
+    CheckType(fsync_flag, 'fsync_flag', bool)
+    parent_directory = os.path.dirname(filepath)
+    if (parent_directory != ''):
+        os.makedirs(parent_directory, exist_ok=True)
+    line_bytes = (line + '\n').replace('\n', os.linesep).encode('utf-8')
+    if (os.path.isfile(filepath) and (os.path.getsize(filepath) > 0)):
+        with open(filepath, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            if (f.read(1) != b'\n'):
+                line_bytes = os.linesep.encode('utf-8') + line_bytes
+    with open(filepath, 'ab') as f:
+        f.write(line_bytes)
+        if (fsync_flag):
+            f.flush()
+            os.fsync(f.fileno())
+# End AppendLineToFile
+
 def NumLines(filepath) -> int:
     num_lines = 0
     with open(filepath) as f:
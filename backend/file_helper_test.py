@@ -47,10 +47,63 @@ def TestAppendRead():
     AssertEqual(read_string, 2 * write_string)
     print('TestAppendRead passed!')
 
+def TestAtomicWrite():
+    test_helper.TearDown()
+    write_string = "The quick brown fox\njumps\nover\n the lazy dog.\n\n"
+    # Test writing string to new file (in missing directory) and overwriting existing file
+    file_helper.AtomicWriteToFile('Old contents', kTestFilepath)
+    file_helper.AtomicWriteToFile(write_string, kTestFilepath, fsync_flag=True)
+    AssertEqual('\n'.join(file_helper.ReadFile(kTestFilepath)), write_string)
+    # Test writing list of lines, should match WriteToFile
+    write_lines = ['Hello', '', 'world']
+    file_helper.AtomicWriteToFile(write_lines, kTestFilepath)
+    AssertEqual(file_helper.ReadFile(kTestFilepath), write_lines)
+    # Test writing bytes, written exactly as given
+    write_bytes = b'Hello\r\nworld\n'
+    file_helper.AtomicWriteToFile(write_bytes, kTestFilepath)
+    with open(kTestFilepath, 'rb') as f:
+        AssertEqual(f.read(), write_bytes)
+    # No temporary files should be left behind
+    AssertEqual(file_helper.ListFilesInDirectory(test_consts.kTestWorkingDirectory),
+                [os.path.basename(kTestFilepath)])
+    print('TestAtomicWrite passed!')
+
+def TestAppendLine():
+    test_helper.TearDown()
+    # Test appending to new file (in missing directory)
+    file_helper.AppendLineToFile('Hello', kTestFilepath)
+    file_helper.AppendLineToFile('world', kTestFilepath, fsync_flag=True)
+    AssertEqual(file_helper.ReadFile(kTestFilepath), ['Hello', 'world', ''])
+    # Test appending to file not ending in a newline
+    file_helper.WriteToFile(['Hello', 'world'], kTestFilepath)
+    file_helper.AppendLineToFile('again', kTestFilepath)
+    AssertEqual(file_helper.ReadFile(kTestFilepath), ['Hello', 'world', 'again', ''])
+    # Test appending to empty file
+    file_helper.WriteToFile('', kTestFilepath)
+    file_helper.AppendLineToFile('Hello', kTestFilepath)
+    AssertEqual(file_helper.ReadFile(kTestFilepath), ['Hello', ''])
+    print('TestAppendLine passed!')
+
+def TestIterBlocks():
+    test_helper.TearDown()
+    AssertEqual(list(file_helper.IterBlocks(kTestFilepath)), [])
+    write_string = '\n  \nShow\n  Class "Boots"\n\n\n# Comment\n \t\nHide\n\nHide'
+    file_helper.WriteToFile(write_string, kTestFilepath)
+    AssertEqual(list(file_helper.IterBlocks(kTestFilepath)),
+                [['Show', 'Class "Boots"'], ['# Comment'], ['Hide'], ['Hide']])
+    # Check that the first lines are read exactly as when reading the whole file
+    for max_num_lines in range(12):
+        AssertEqual(file_helper.ReadFile(kTestFilepath, strip=True, max_num_lines=max_num_lines),
+                    file_helper.ReadFile(kTestFilepath, strip=True)[:max_num_lines])
+    print('TestIterBlocks passed!')
+
 def main():
     TestWriteReadSimple()
     TestWriteRead()
     TestAppendRead()
+    TestAtomicWrite()
+    TestAppendLine()
+    TestIterBlocks()
     test_helper.TearDown()
     print('All tests passed!')
 
@@ -0,0 +1,165 @@
+'''
+Snapshot cache for parsed loot filters.
+
+Parsing a large filter into LootFilterRule objects is by far the most expensive part of
+most backend_cli calls, even though the output filter rarely changes between calls.
+A snapshot stores the parsed state of a LootFilter in the cache directory, along with a
+fingerprint of the filter file it was parsed from.  The next LootFilter constructed from
+the same (unchanged) output filter loads the snapshot instead of re-parsing the filter.
+
+A snapshot is only used if all of the following match the current state:
+ - DLF version and snapshot code fingerprint (source of the modules whose objects are stored)
+ - filter file size and modification time
+ - filter file content hash
+Otherwise (or if the snapshot is corrupt in any way), the filter is parsed normally.
+
+Functions:
+ - FilterFingerprint(filter_fullpath, content_bytes=None) -> dict
+ - ContentHasher() -> hasher object
+ - ContentHash(content_bytes) -> str
+ - SaveSnapshot(loot_filter, filter_fingerprint)
+ - LoadSnapshot(loot_filter, filter_fingerprint) -> bool
+ - RemoveSnapshot(profile_name)
+
+Fingerprints should always be taken *before* reading a filter, and *after* writing a filter,
+so that a filter modified concurrently can never be matched to a snapshot of other contents.
+'''
+
+import hashlib
+import os
+import os.path
+import pickle
+
+import consts
+import file_helper
+import logger
+from type_checker import CheckType
+
+kSnapshotFileExtension = '.snapshot'
+
+# LootFilter member variables (other than profile_obj and input_filter_source)
+# which are fully determined by parsing the output filter
+kSnapshotMemberNames = [
+    'rule_or_text_block_hll',
+    'dlf_rules_successor_key',
+    'base_type_section_key',
+    'base_type_rule_tier_tags',
+    'socket_pattern_section_key',
+    'socket_rule_tier_tags',
+    'num_raw_text_blocks',
+    'num_untagged_rules',
+    'output_filter_layout',
+]
+
+# Source files defining the classes stored in a snapshot or how filters are parsed,
+# so that snapshots written by a different version of the code are never loaded.
+kSnapshotSourceFilenames = [
+    'filter_snapshot.py',
+    'hash_linked_list.py',
+    'loot_filter.py',
+    'loot_filter_rule.py',
+    'ordered_set.py',
+    'parse_helper.py',
+    'simple_parser.py',
+    'consts.py',
+]
+
+def SnapshotFullpath(profile_name: str) -> str:
+    CheckType(profile_name, 'profile_name', str)
+    return os.path.join(consts.kCacheDirectory, profile_name + kSnapshotFileExtension)
+# End SnapshotFullpath
+
+# Computed once per process by CodeFingerprint
+g_code_fingerprint = None
+
+# Returns a hash of the source files listed in kSnapshotSourceFilenames.
+def CodeFingerprint() -> str:
+    global g_code_fingerprint
+    if (g_code_fingerprint == None):
+        hasher = hashlib.sha1()
+        for source_filename in kSnapshotSourceFilenames:
+            with open(os.path.join(consts.kBackendDirectory, source_filename), 'rb') as source_file:
+                hasher.update(source_file.read())
+        g_code_fingerprint = hasher.hexdigest()
+    return g_code_fingerprint
+# End CodeFingerprint
+
+# Returns a hasher whose hexdigest() after update() calls with the pieces of content_bytes
+# equals ContentHash(content_bytes), for hashing content that is never held in one piece.
+def ContentHasher():
+    return hashlib.sha1()
+# End ContentHasher
+
+def ContentHash(content_bytes: bytes) -> str:
+    CheckType(content_bytes, 'content_bytes', bytes)
+    content_hasher = ContentHasher()
+    content_hasher.update(content_bytes)
+    return content_hasher.hexdigest()
+# End ContentHash
+
+# Returns a dict describing the current state of the given filter file,
+# or None if the file does not exist.
+# content_bytes may be given just after writing it to the filter file, to avoid re-reading the
+# file.  (If the file is modified in between, the hash will not match it, so the fingerprint
+# can never be matched to the modified file.)
+def FilterFingerprint(filter_fullpath: str, content_bytes: bytes = None) -> dict or None:
+    CheckType(filter_fullpath, 'filter_fullpath', str)
+    if (not os.path.isfile(filter_fullpath)):
+        return None
+    stat_result = os.stat(filter_fullpath)
+    if (content_bytes == None):
+        with open(filter_fullpath, 'rb') as filter_file:
+            content_bytes = filter_file.read()
+    content_hash = ContentHash(content_bytes)
+    return {'dlf_version' : consts.kDlfVersion,
+            'code_fingerprint' : CodeFingerprint(),
+            'filter_size' : stat_result.st_size,
+            'filter_mtime_ns' : stat_result.st_mtime_ns,
+            'filter_hash' : content_hash}
+# End FilterFingerprint
+
+# Saves the parsed state of the given LootFilter, which must be exactly the state obtained by
+# parsing the filter described by filter_fingerprint.  Failures are logged, not raised,
+# since the snapshot is only an optimization.
+def SaveSnapshot(loot_filter, filter_fingerprint: dict):
+    CheckType(filter_fingerprint, 'filter_fingerprint', dict)
+    snapshot_fullpath = SnapshotFullpath(loot_filter.profile_obj.name)
+    try:
+        state = {name : getattr(loot_filter, name) for name in kSnapshotMemberNames}
+        # The fingerprint is stored first, so it can be validated without loading the state
+        snapshot_bytes = (pickle.dumps(filter_fingerprint, protocol=pickle.HIGHEST_PROTOCOL)
+                + pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL))
+        file_helper.AtomicWriteToFile(snapshot_bytes, snapshot_fullpath)
+    except Exception as e:
+        logger.Log('Warning: failed to save filter snapshot {}: {}'.format(snapshot_fullpath, e))
+        file_helper.RemoveFileIfExists(snapshot_fullpath)
+# End SaveSnapshot
+
+# Loads the snapshot corresponding to the given LootFilter's profile into loot_filter,
+# if the snapshot was saved for the filter described by filter_fingerprint.
+# Returns True if the snapshot was loaded, False otherwise (loot_filter is then unmodified).
+def LoadSnapshot(loot_filter, filter_fingerprint: dict) -> bool:
+    CheckType(filter_fingerprint, 'filter_fingerprint', dict)
+    snapshot_fullpath = SnapshotFullpath(loot_filter.profile_obj.name)
+    if (not os.path.isfile(snapshot_fullpath)):
+        return False
+    try:
+        with open(snapshot_fullpath, 'rb') as snapshot_file:
+            snapshot_fingerprint = pickle.load(snapshot_file)
+            if (snapshot_fingerprint != filter_fingerprint):
+                return False
+            state = pickle.load(snapshot_file)
+        if (set(state.keys()) != set(kSnapshotMemberNames)):
+            return False
+    except Exception as e:
+        logger.Log('Warning: failed to load filter snapshot {}: {}'.format(snapshot_fullpath, e))
+        return False
+    for name, value in state.items():
+        setattr(loot_filter, name, value)
+    return True
+# End LoadSnapshot
+
+def RemoveSnapshot(profile_name: str):
+    CheckType(profile_name, 'profile_name', str)
+    file_helper.RemoveFileIfExists(SnapshotFullpath(profile_name))
+# End RemoveSnapshot
@@ -0,0 +1,108 @@
+import filter_snapshot
+from loot_filter import InputFilterSource, LootFilter
+
+import os.path
+
+import file_helper
+import test_consts
+from test_assertions import AssertEqual, AssertTrue, AssertFalse
+import test_helper
+
+# Returns everything in the LootFilter that is saved in a snapshot, in comparable form.
+def GetFilterState(loot_filter: LootFilter) -> dict:
+    filter_state = {name : getattr(loot_filter, name)
+            for name in filter_snapshot.kSnapshotMemberNames}
+    filter_state['rule_or_text_block_hll'] = [
+            (key, rule_or_text_block.GetTextLines(), rule_or_text_block.byte_offset,
+                  rule_or_text_block.byte_length)
+            for key, rule_or_text_block in loot_filter.rule_or_text_block_hll]
+    # Number of modifications depends on the history of the HashLinkedList, not its contents
+    if (loot_filter.output_filter_layout != None):
+        filter_state['output_filter_layout'] = loot_filter.output_filter_layout[:2]
+    return filter_state
+# End GetFilterState
+
+# Imports the test filter, and returns the (not yet snapshotted) output filter fullpath.
+def ImportTestFilter() -> str:
+    test_helper.SetUp()
+    filter_snapshot.RemoveSnapshot(test_consts.kTestProfileName)
+    loot_filter = LootFilter(test_consts.kTestProfileName, InputFilterSource.kDownload)
+    loot_filter.SaveToFile()
+    return loot_filter.profile_obj.config_values['OutputLootFilterFullpath']
+# End ImportTestFilter
+
+def TestSnapshotMatchesParse():
+    ImportTestFilter()
+    snapshot_fullpath = filter_snapshot.SnapshotFullpath(test_consts.kTestProfileName)
+    # Import should not generate a snapshot, only parsing the output filter should
+    AssertFalse(os.path.isfile(snapshot_fullpath))
+    parsed_loot_filter = LootFilter(test_consts.kTestProfileName, InputFilterSource.kOutput)
+    AssertTrue(os.path.isfile(snapshot_fullpath))
+    loaded_loot_filter = LootFilter(test_consts.kTestProfileName, InputFilterSource.kOutput)
+    AssertEqual(GetFilterState(loaded_loot_filter), GetFilterState(parsed_loot_filter))
+    print('TestSnapshotMatchesParse passed!')
+# End TestSnapshotMatchesParse
+
+# Snapshot saved after modifying the filter should match parsing the saved filter.
+def TestSnapshotAfterModification():
+    ImportTestFilter()
+    loot_filter = LootFilter(test_consts.kTestProfileName, InputFilterSource.kOutput)
+    loot_filter.SetCurrencyToTier('Chromatic Orb', 1)
+    loot_filter.AddSocketRule('r-g-b', 'Gloves')
+    loot_filter.AddSocketRule('B-B-B-B', 'Body Armours')
+    loot_filter.RemoveSocketRule('r-g-b', 'Gloves')
+    loot_filter.AddBaseTypeRule('Hubris Circlet', True, 75, 100)
+    loot_filter.AddBaseTypeRule('Sorcerer Boots', False, 84, 100)
+    loot_filter.RemoveBaseTypeRule('Hubris Circlet', True, 75, 100)
+    loot_filter.SaveToFile()
+    # Fingerprint from the written bytes matches fingerprint from re-reading the file
+    output_filter_fullpath = loot_filter.profile_obj.config_values['OutputLootFilterFullpath']
+    with open(output_filter_fullpath, 'rb') as output_file:
+        output_bytes = output_file.read()
+    AssertEqual(filter_snapshot.FilterFingerprint(output_filter_fullpath, output_bytes),
+                filter_snapshot.FilterFingerprint(output_filter_fullpath))
+    loaded_loot_filter = LootFilter(test_consts.kTestProfileName, InputFilterSource.kOutput)
+    AssertEqual(loaded_loot_filter.GetTierOfCurrency('Chromatic Orb'), 1)
+    AssertEqual(loaded_loot_filter.GetAllAddedSocketRules(),
+            loot_filter.GetAllAddedSocketRules())
+    filter_snapshot.RemoveSnapshot(test_consts.kTestProfileName)
+    parsed_loot_filter = LootFilter(test_consts.kTestProfileName, InputFilterSource.kOutput)
+    AssertEqual(GetFilterState(loaded_loot_filter), GetFilterState(parsed_loot_filter))
+    AssertEqual(len(parsed_loot_filter.GetAllAddedSocketRules()), 1)
+    print('TestSnapshotAfterModification passed!')
+# End TestSnapshotAfterModification
+
+def TestStaleSnapshot():
+    output_filter_fullpath = ImportTestFilter()
+    LootFilter(test_consts.kTestProfileName, InputFilterSource.kOutput)  # generates snapshot
+    # Modify output filter externally, snapshot should not be used
+    file_helper.AppendToFile('Show # $type->external_rule $tier->t1\n\n', output_filter_fullpath)
+    loot_filter = LootFilter(test_consts.kTestProfileName, InputFilterSource.kOutput)
+    AssertTrue(('external_rule', 't1') in loot_filter.rule_or_text_block_hll)
+    print('TestStaleSnapshot passed!')
+# End TestStaleSnapshot
+
+def TestCorruptSnapshot():
+    ImportTestFilter()
+    parsed_loot_filter = LootFilter(test_consts.kTestProfileName, InputFilterSource.kOutput)
+    snapshot_fullpath = filter_snapshot.SnapshotFullpath(test_consts.kTestProfileName)
+    # Keep the valid fingerprint, but truncate the parsed state
+    with open(snapshot_fullpath, 'rb') as snapshot_file:
+        snapshot_bytes = snapshot_file.read()
+    with open(snapshot_fullpath, 'wb') as snapshot_file:
+        snapshot_file.write(snapshot_bytes[:len(snapshot_bytes) // 2])
+    loaded_loot_filter = LootFilter(test_consts.kTestProfileName, InputFilterSource.kOutput)
+    AssertEqual(GetFilterState(loaded_loot_filter), GetFilterState(parsed_loot_filter))
+    print('TestCorruptSnapshot passed!')
+# End TestCorruptSnapshot
+
+def main():
+    TestSnapshotMatchesParse()
+    TestSnapshotAfterModification()
+    TestStaleSnapshot()
+    TestCorruptSnapshot()
+    test_helper.TearDown()
+    print('All tests passed!')
+
+if (__name__ == '__main__'):
+    main()
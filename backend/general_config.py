@@ -2,6 +2,7 @@ import os.path
 
 import consts
 import file_helper
+from type_checker import TypeCheckLevel
 
 kGeneralConfigPath = os.path.join(consts.kConfigDirectory, 'general.config')
 
@@ -10,25 +11,38 @@ class GeneralConfigKeywords:
     kToggleGuiHotkey = 'Toggle GUI Hotkey'
     kWriteFilterHotkey = 'Write Filter Hotkey'
     kReloadFilterHotkey = 'Reload Filter Hotkey'
+    kTypeCheckLevel = 'Type Check Level'
+    kRecordTimings = 'Record Timings'
 
-    kKeywordsList = [kActiveProfile, kToggleGuiHotkey, kWriteFilterHotkey, kReloadFilterHotkey]
+    kKeywordsList = [kActiveProfile, kToggleGuiHotkey, kWriteFilterHotkey, kReloadFilterHotkey,
+                     kTypeCheckLevel, kRecordTimings]
+    # Keywords that set_hotkey may set (the other keywords are not hotkeys)
+    kHotkeysList = [kToggleGuiHotkey, kWriteFilterHotkey, kReloadFilterHotkey]
 # End class GeneralConfigKeywords
 
 kDefaultConfigValues = {
     GeneralConfigKeywords.kActiveProfile: None,
     GeneralConfigKeywords.kToggleGuiHotkey: 'F7',
     GeneralConfigKeywords.kWriteFilterHotkey: 'F8',
-    GeneralConfigKeywords.kReloadFilterHotkey: 'F9'
+    GeneralConfigKeywords.kReloadFilterHotkey: 'F9',
+    GeneralConfigKeywords.kTypeCheckLevel: TypeCheckLevel.kFull,
+    GeneralConfigKeywords.kRecordTimings: 'False'
 }
 
 kGeneralConfigTemplateTemplate = \
 '''# Profile
-{0}: {4}
+{0}: {6}
 
 # Hotkeys
-{1}: {4}
-{2}: {4}
-{3}: {4}
+{1}: {6}
+{2}: {6}
+{3}: {6}
+
+# Type checking of backend function arguments: full or disabled
+{4}: {6}
+
+# Record the time spent in each stage of backend calls to cache/backend_cli.timings: True or False
+{5}: {6}
 '''
 
 kGeneralConfigTemplate = kGeneralConfigTemplateTemplate.format(
@@ -13,7 +13,9 @@ kTestGeneralConfigValues = [
     (GeneralConfigKeywords.kActiveProfile, 'TestProfile', 'OtherProfile'),
     (GeneralConfigKeywords.kToggleGuiHotkey, '^F1', '!H'),
     (GeneralConfigKeywords.kWriteFilterHotkey, '+a', '+2'),
-    (GeneralConfigKeywords.kReloadFilterHotkey, '!^F12', 'Tab')]
+    (GeneralConfigKeywords.kReloadFilterHotkey, '!^F12', 'Tab'),
+    (GeneralConfigKeywords.kTypeCheckLevel, 'disabled', 'full'),
+    (GeneralConfigKeywords.kRecordTimings, 'True', 'False')]
 
 def TestParseGeneralConfig():
     general_config_string = kGeneralConfigTemplate.format(
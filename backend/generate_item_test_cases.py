@@ -1,25 +1,14 @@
 from typing import List
 
 import file_helper
-from item import Item
+from item import Item, SplitItemTexts
 from loot_filter import InputFilterSource, LootFilter
 import test_consts
 import test_helper
 
 # Returns a list of strings, each of which is the item text for an item.
 def ParseSampleItemsTxt(input_filepath: str) -> List[str]:
-    item_text_strings = []
-    current_item_text_lines = []
-    for line in file_helper.ReadFile(input_filepath, strip=True):
-        if (line == ''):
-            continue
-        if (line.startswith(test_consts.kHorizontalSeparator[:8])):
-            if (len(current_item_text_lines) > 0):
-                item_text_strings.append('\n'.join(current_item_text_lines))
-            current_item_text_lines = []
-        else:
-            current_item_text_lines.append(line)
-    return item_text_strings
+    return SplitItemTexts(file_helper.ReadFile(input_filepath, strip=True))
 # End ParseSampleItemsTxt
 
 def main():
@@ -1,4 +1,10 @@
+# Classes in this file use __slots__: each rule has its own HashLinkedMultimap (parsed_lines_hll),
+# so a parsed filter has tens of thousands of these objects, and slotted objects are
+# considerably smaller and faster to create than objects with a __dict__.
+
 class HllNode:
+    __slots__ = ('previous_node', 'next_node', 'key', 'value')
+
     def __init__(self, previous_node, next_node, key, value):
         self.previous_node = previous_node
         self.next_node = next_node
@@ -8,6 +14,8 @@ class HllNode:
 
 # Yields (key, value) pairs
 class HashLinkedListIterator:
+    __slots__ = ('hash_linked_list', 'current_node')
+
     def __init__(self, hash_linked_list):
         self.hash_linked_list = hash_linked_list
         self.current_node = hash_linked_list.head
@@ -19,16 +27,21 @@ class HashLinkedListIterator:
         raise StopIteration
 # End class HashLinkedListIterator
 
-# Note: HashLinkedList currently has a bug that's acting as a "feature"
-# for rule parsing: multiple items with the same key can be inserted.
-# This inadvertently allows rules with conditions like
-# "ItemLevel >= 60", "ItemLevel < 75" to function correctly.
+# Multiple nodes with the same key may be inserted, but only the most recently inserted one
+# is accessible by key (and the others cannot be removed).  Use HashLinkedMultimap when keys
+# may legitimately repeat, as in rules with conditions like "ItemLevel >= 60", "ItemLevel < 75".
 class HashLinkedList:
     # Member variables:
     #  - self.head: HllNode
     #  - self.tail: HllNode
     #  - self.size: int
     #  - self.key_to_node_map: dict {key : node}
+    #  - self.num_modifications: int - incremented on every insertion, removal, or value change
+    __slots__ = ('head', 'tail', 'size', 'key_to_node_map', 'num_modifications')
+
+    # Class of the nodes created by insertions (overridden by HashLinkedMultimap)
+    kNodeClass = HllNode
+
     def __init__(self):
         self.head = HllNode(None, None, None, None)
         self.tail = HllNode(None, None, None, None)
@@ -36,30 +49,47 @@ class HashLinkedList:
         self.tail.previous_node = self.head
         self.size = 0
         self.key_to_node_map = {}
+        self.num_modifications = 0
 
     # A successor_key of None indicates to insert at the end
     def insert_before(self, key, value, successor_key):
         next_node = (self.key_to_node_map[successor_key] if successor_key != None
                 else self.tail)
-        previous_node = next_node.previous_node
-        new_node = HllNode(previous_node, next_node, key, value)
-        previous_node.next_node = new_node
-        next_node.previous_node = new_node
-        self.key_to_node_map[key] = new_node
-        self.size += 1
+        self.insert_before_node(key, value, next_node)
 
     # A predecessor_key of None indicates to insert at the beginning
     def insert_after(self, key, value, predecessor_key):
         previous_node = (self.key_to_node_map[predecessor_key] if predecessor_key != None
                 else self.head)
-        self.insert_before(key, value, previous_node.next_node.key)
+        self.insert_before_node(key, value, previous_node.next_node)
+
+    # Inserts the new node directly before next_node (which may be the tail node)
+    def insert_before_node(self, key, value, next_node: HllNode):
+        previous_node = next_node.previous_node
+        new_node = self.kNodeClass(previous_node, next_node, key, value)
+        previous_node.next_node = new_node
+        next_node.previous_node = new_node
+        self.key_to_node_map[key] = new_node
+        self.size += 1
+        self.num_modifications += 1
 
     # Time complexity: O(index)
     # If index > size, appends to the end of the list.
     def insert_at_index(self, key, value, index: int):
-        # Get nth item of iterator: https://stackoverflow.com/a/54333239
-        successor_key, _ = next((x for i, x in enumerate(self) if i==index), (None, None))
-        self.insert_before(key, value, successor_key)
+        next_node = self.head.next_node
+        for _ in range(index):
+            if (next_node == self.tail):
+                break
+            next_node = next_node.next_node
+        self.insert_before_node(key, value, next_node)
+
+    # Time complexity: O(1)
+    def insert_first(self, key, value):
+        self.insert_before_node(key, value, self.head.next_node)
+
+    # Time complexity: O(1)
+    def insert_last(self, key, value):
+        self.insert_before_node(key, value, self.tail)
 
     def append(self, key, value):
         self.insert_before(key, value, successor_key=None)
@@ -72,6 +102,7 @@ class HashLinkedList:
         node.next_node.previous_node = node.previous_node
         self.key_to_node_map.pop(key)
         self.size -= 1
+        self.num_modifications += 1
 
     def get_node(self, key):
         return self.key_to_node_map[key]
@@ -86,7 +117,143 @@ class HashLinkedList:
     # If node with specified key does not exist, raises a KeyError.
     def __setitem__(self, key, value):
         self.key_to_node_map[key].value = value
+        self.num_modifications += 1
 
     def __iter__(self):
         return HashLinkedListIterator(self)
-# End class HashLinkedList
\ No newline at end of file
+
+    # Pickle support: the default implementation recurses through the chain of nodes,
+    # which exceeds the recursion limit for long lists.  Instead, the nodes are stored
+    # as a flat list of (key, value, is_mapped) triples in list order, where is_mapped
+    # indicates whether the node is the one key_to_node_map refers to for its key.
+    def __getstate__(self):
+        node_triples = []
+        current_node = self.head.next_node
+        while (current_node != self.tail):
+            is_mapped = self.key_to_node_map.get(current_node.key) is current_node
+            node_triples.append((current_node.key, current_node.value, is_mapped))
+            current_node = current_node.next_node
+        return node_triples, self.num_modifications
+
+    def __setstate__(self, state):
+        node_triples, num_modifications = state
+        self.__init__()
+        for key, value, is_mapped in node_triples:
+            previous_node = self.tail.previous_node
+            new_node = HllNode(previous_node, self.tail, key, value)
+            previous_node.next_node = new_node
+            self.tail.previous_node = new_node
+            if (is_mapped):
+                self.key_to_node_map[key] = new_node
+            self.size += 1
+        self.num_modifications = num_modifications
+# End class HashLinkedList
+
+class MultimapHllNode(HllNode):
+    __slots__ = ('previous_same_key_node', 'next_same_key_node')
+
+    def __init__(self, previous_node, next_node, key, value):
+        super().__init__(previous_node, next_node, key, value)
+        self.previous_same_key_node = None
+        self.next_same_key_node = None
+# End class MultimapHllNode
+
+# A HashLinkedList in which each key may have any number of nodes.  The nodes of each key are
+# chained together in insertion order (through the nodes themselves, so no per-key container
+# is allocated), and key_to_node_map refers to the most recently inserted node of each key.
+# Single-value access (get_node, [], in) therefore behaves exactly as in HashLinkedList,
+# while get_all/get_all_nodes return every node of a key, and any node can be removed in O(1).
+class HashLinkedMultimap(HashLinkedList):
+    __slots__ = ()
+
+    kNodeClass = MultimapHllNode
+
+    def insert_before_node(self, key, value, next_node: HllNode):
+        previous_same_key_node = self.key_to_node_map.get(key)
+        super().insert_before_node(key, value, next_node)
+        if (previous_same_key_node != None):
+            new_node = self.key_to_node_map[key]
+            new_node.previous_same_key_node = previous_same_key_node
+            previous_same_key_node.next_same_key_node = new_node
+
+    # Returns the nodes of the given key in insertion order (empty if the key is not present)
+    def get_all_nodes(self, key) -> list:
+        nodes = []
+        node = self.key_to_node_map.get(key)
+        while (node != None):
+            nodes.append(node)
+            node = node.previous_same_key_node
+        nodes.reverse()
+        return nodes
+
+    # Returns the values of the given key in insertion order (empty if the key is not present)
+    def get_all(self, key) -> list:
+        return [node.value for node in self.get_all_nodes(key)]
+
+    def count(self, key) -> int:
+        return len(self.get_all_nodes(key))
+
+    # Removes the most recently inserted node of the given key
+    def remove(self, key):
+        if (key not in self.key_to_node_map):
+            raise KeyError(key)
+        self.remove_node(self.key_to_node_map[key])
+
+    # Removes all nodes of the given key
+    def remove_all(self, key):
+        if (key not in self.key_to_node_map):
+            raise KeyError(key)
+        for node in self.get_all_nodes(key):
+            self.remove_node(node)
+
+    # Removes the given node, which must be in this list.  Time complexity: O(1)
+    def remove_node(self, node: MultimapHllNode):
+        node.previous_node.next_node = node.next_node
+        node.next_node.previous_node = node.previous_node
+        if (node.next_same_key_node != None):
+            node.next_same_key_node.previous_same_key_node = node.previous_same_key_node
+        if (node.previous_same_key_node != None):
+            node.previous_same_key_node.next_same_key_node = node.next_same_key_node
+        if (self.key_to_node_map[node.key] is node):
+            if (node.previous_same_key_node != None):
+                self.key_to_node_map[node.key] = node.previous_same_key_node
+            else:
+                self.key_to_node_map.pop(node.key)
+        node.previous_same_key_node = node.next_same_key_node = None
+        self.size -= 1
+        self.num_modifications += 1
+
+    # Pickle support: as in HashLinkedList, but each node is stored with its index among the
+    # nodes of its key (in insertion order), from which the per-key chains are rebuilt.
+    def __getstate__(self):
+        node_triples = []
+        current_node = self.head.next_node
+        while (current_node != self.tail):
+            same_key_index = 0
+            same_key_node = current_node.previous_same_key_node
+            while (same_key_node != None):
+                same_key_index += 1
+                same_key_node = same_key_node.previous_same_key_node
+            node_triples.append((current_node.key, current_node.value, same_key_index))
+            current_node = current_node.next_node
+        return node_triples, self.num_modifications
+
+    def __setstate__(self, state):
+        node_triples, num_modifications = state
+        self.__init__()
+        key_to_indexed_nodes = {}
+        for key, value, same_key_index in node_triples:
+            previous_node = self.tail.previous_node
+            new_node = MultimapHllNode(previous_node, self.tail, key, value)
+            previous_node.next_node = new_node
+            self.tail.previous_node = new_node
+            key_to_indexed_nodes.setdefault(key, []).append((same_key_index, new_node))
+            self.size += 1
+        for key, indexed_nodes in key_to_indexed_nodes.items():
+            indexed_nodes.sort(key=lambda indexed_node : indexed_node[0])
+            for (_, previous_node), (_, node) in zip(indexed_nodes, indexed_nodes[1:]):
+                previous_node.next_same_key_node = node
+                node.previous_same_key_node = previous_node
+            self.key_to_node_map[key] = indexed_nodes[-1][1]
+        self.num_modifications = num_modifications
+# End class HashLinkedMultimap
@@ -1,6 +1,8 @@
-from hash_linked_list import HashLinkedList
+from hash_linked_list import HashLinkedList, HashLinkedMultimap
 
-from test_assertions import AssertEqual, AssertFailure
+import pickle
+
+from test_assertions import AssertEqual, AssertFalse, AssertFailure
 
 def SimpleTest():
     # Build HashLinkedList mapping int keys to their corresponding strings as values
@@ -94,12 +96,81 @@ def TestRemove():
     AssertEqual(hll.size, len(reference_key_list))
     print('TestRemove passed!')
 
+def TestInsertFirstLast():
+    hll = HashLinkedList()
+    hll.insert_first(1, '1')
+    hll.insert_last(2, '2')
+    hll.insert_first(0, '0')
+    hll.insert_last(3, '3')
+    AssertEqual(list(hll), [(0, '0'), (1, '1'), (2, '2'), (3, '3')])
+    # Duplicate key: inserted at the front even though the key's mapped node is elsewhere
+    hll.insert_first(2, 'duplicate')
+    AssertEqual([key for key, _ in hll], [2, 0, 1, 2, 3])
+    AssertEqual(hll[2], 'duplicate')
+    AssertEqual(hll.size, 5)
+    print('TestInsertFirstLast passed!')
+
+def TestMultimap():
+    hll = HashLinkedMultimap()
+    hll.append('ItemLevel', '>= 60')
+    hll.append('Class', 'Rings')
+    hll.append('ItemLevel', '< 75')
+    hll.insert_first('ItemLevel', '! 70')
+    AssertEqual(hll['ItemLevel'], '! 70')
+    AssertEqual(hll.get_all('ItemLevel'), ['>= 60', '< 75', '! 70'])
+    AssertEqual(hll.get_all('Quality'), [])
+    AssertEqual(hll.count('ItemLevel'), 3)
+    # Removing a specific node keeps the other nodes of its key
+    hll.remove_node(hll.get_all_nodes('ItemLevel')[1])
+    AssertEqual(hll.get_all('ItemLevel'), ['>= 60', '! 70'])
+    AssertEqual(list(hll), [('ItemLevel', '! 70'), ('ItemLevel', '>= 60'), ('Class', 'Rings')])
+    # Removing by key removes the most recently inserted node
+    hll.remove('ItemLevel')
+    AssertEqual(hll['ItemLevel'], '>= 60')
+    hll.append('ItemLevel', '<= 80')
+    hll['ItemLevel'] = '< 80'
+    AssertEqual(hll.get_all('ItemLevel'), ['>= 60', '< 80'])
+    # Pickling preserves insertion order of each key, which may differ from list order
+    hll.insert_first('ItemLevel', '! 65')
+    loaded_hll = pickle.loads(pickle.dumps(hll))
+    AssertEqual(list(loaded_hll), list(hll))
+    AssertEqual(loaded_hll.get_all('ItemLevel'), ['>= 60', '< 80', '! 65'])
+    loaded_hll.remove_all('ItemLevel')
+    AssertFalse('ItemLevel' in loaded_hll)
+    AssertEqual(list(loaded_hll), [('Class', 'Rings')])
+    AssertEqual(loaded_hll.size, 1)
+    try:
+        loaded_hll.remove('ItemLevel')
+    except KeyError:  # this should happen
+        pass
+    else:
+        AssertFailure()
+    print('TestMultimap passed!')
+
+def TestPickle():
+    num_items = 10000  # long enough to exceed the recursion limit with default pickling
+    hll = HashLinkedList()
+    for key in range(num_items):
+        hll.append(key, str(key))
+    # Duplicate key: the second node is the one accessible by key
+    hll.append(0, 'duplicate')
+    loaded_hll = pickle.loads(pickle.dumps(hll))
+    AssertEqual(list(loaded_hll), list(hll))
+    AssertEqual(loaded_hll.size, hll.size)
+    AssertEqual(loaded_hll[0], 'duplicate')
+    loaded_hll.remove(0)
+    AssertEqual(len(list(loaded_hll)), num_items)
+    print('TestPickle passed!')
+
 def main():
     SimpleTest()
     LargerTest()
     TestInsertAtIndex()
     TestBracketAccess()
     TestRemove()
+    TestInsertFirstLast()
+    TestMultimap()
+    TestPickle()
     print('All tests passed!')
 
 if (__name__ == '__main__'):
@@ -1,8 +1,11 @@
 '''
 This file defines the class Item.
 
-It also defines the free function:
+It also defines the free functions:
+ - SplitItemTexts(text_lines: List[str]) -> List[str]
  - RuleMatchesItem(rule: LootFilterRule, item: Item) -> bool
+ - CompileRuleConditions(rule: LootFilterRule) -> Tuple[bool, tuple]
+ - CompileBoundsCondition(keyword: str, bounds_list: List[Tuple[str, List[str]]])
 '''
 
 from typing import List, Tuple
@@ -49,6 +52,9 @@ Nearby Enemies have -9% to Cold Resistance
 
 kBlockDivider = '--------'
 
+# Lines beginning with this separate item texts in files containing multiple items
+kItemTextSeparator = '========'
+
 kBinaryProperties = {'Alternate Quality', 'Unidentified', 'Mirrored', 'Corrupted', 'Synthesised Item', 'Fractured Item',
         'Split', 'Veiled Prefix', 'Veiled Suffix', 'Searing Exarch Item', 'Eater of Worlds Item', 'Shaped Map'}
 
@@ -63,6 +69,9 @@ class Item:
       - self.text_lines: List[str]
       - self.properties_map: dict mapping keyword -> value
     '''
+
+    __slots__ = ('text_lines', 'properties_map')
+
     def __init__(self, text_lines: List[str] or str):
         if (isinstance(text_lines, str)):
             text_lines = text_lines.split('\n')
@@ -210,6 +219,24 @@ class Item:
 
 # End class Item
 
+# Splits text lines containing any number of item texts, separated by lines beginning with
+# kItemTextSeparator, into a list of item text strings.  Blank lines are ignored.
+def SplitItemTexts(text_lines: List[str]) -> List[str]:
+    CheckType(text_lines, 'text_lines', list, str)
+    item_text_strings = []
+    current_item_text_lines = []
+    for line in text_lines + [kItemTextSeparator]:
+        if (line == ''):
+            continue
+        if (line.startswith(kItemTextSeparator)):
+            if (len(current_item_text_lines) > 0):
+                item_text_strings.append('\n'.join(current_item_text_lines))
+            current_item_text_lines = []
+        else:
+            current_item_text_lines.append(line)
+    return item_text_strings
+# End SplitItemTexts
+
 # ==================================== Rule-Item Matching ====================================
 
 '''
@@ -236,8 +263,12 @@ def EmptyOpFunc(item_value, rule_value):
 # EmptyOpFunc
 
 def OperatorFunc(op_string: str, item_value, rule_value) -> bool:
-    item_value = simple_parser.ParseValueDynamic(item_value)
-    rule_value = simple_parser.ParseValueDynamic(rule_value)
+    return ParsedOperatorFunc(op_string, simple_parser.ParseValueDynamic(item_value),
+            simple_parser.ParseValueDynamic(rule_value))
+# End OperatorFunc
+
+# OperatorFunc for values already parsed by simple_parser.ParseValueDynamic
+def ParsedOperatorFunc(op_string: str, item_value, rule_value) -> bool:
     CheckTypesMatch(item_value, 'item_value', rule_value, 'rule_value')
     # Convert from Rarity string to int if possible
     if ((item_value in kRarityToIntMap) and (rule_value in kRarityToIntMap)):
@@ -248,46 +279,183 @@ def OperatorFunc(op_string: str, item_value, rule_value) -> bool:
     elif (op_string == ''):
         return EmptyOpFunc(item_value, rule_value)
     raise RuntimeError('Unrecognized operator encountered: {}'.format(op_string))
-# End OperatorFunc
+# End ParsedOperatorFunc
+
+# Returns a function taking a single item value (already parsed by ParseValueDynamic),
+# which returns True if the item value matches any of the rule values under op_string,
+# with exactly the semantics (and errors) of calling ParsedOperatorFunc on each rule value.
+# Rule values are parsed (and Rarity values converted) once, here.  If all rule values have
+# the same type, item values of that type are compared directly, otherwise ParsedOperatorFunc
+# is used as a fallback.
+def CompileValuesPredicate(op_string: str, values_list: List[str]):
+    parsed_values = tuple(simple_parser.ParseValueDynamic(value) for value in values_list)
+    def GenericPredicate(item_value) -> bool:
+        return any(ParsedOperatorFunc(op_string, item_value, rule_value)
+                   for rule_value in parsed_values)
+    value_types = set(type(rule_value) for rule_value in parsed_values)
+    if ((len(value_types) != 1) or not ((op_string in consts.kOperatorMap) or (op_string == ''))):
+        return GenericPredicate
+    [value_type] = value_types
+    # Empty operator: substring for strings, otherwise equality.  (Distinct rarities are never
+    # substrings of one another, so Rarity conversion does not affect the result.)
+    if (op_string == ''):
+        if (value_type == str):
+            values_set = frozenset(parsed_values)
+            def StringPredicate(item_value) -> bool:
+                if (type(item_value) != str):
+                    return GenericPredicate(item_value)
+                return ((item_value in values_set)
+                        or any(rule_value in item_value for rule_value in parsed_values))
+            return StringPredicate
+        values_set = frozenset(parsed_values)
+        def EqualityPredicate(item_value) -> bool:
+            if (type(item_value) != value_type):
+                return GenericPredicate(item_value)
+            return item_value in values_set
+        return EqualityPredicate
+    operator_func = consts.kOperatorMap[op_string]
+    if (value_type == str):
+        # Pair each value with its Rarity int, or None if it is not a Rarity
+        values_and_rarities = tuple((rule_value, kRarityToIntMap.get(rule_value))
+                                    for rule_value in parsed_values)
+        def ComparisonPredicate(item_value) -> bool:
+            if (type(item_value) != str):
+                return GenericPredicate(item_value)
+            item_rarity = kRarityToIntMap.get(item_value)
+            for rule_value, rule_rarity in values_and_rarities:
+                if ((item_rarity != None) and (rule_rarity != None)):
+                    if (operator_func(item_rarity, rule_rarity)):
+                        return True
+                elif (operator_func(item_value, rule_value)):
+                    return True
+            return False
+        return ComparisonPredicate
+    def NumericPredicate(item_value) -> bool:
+        if (type(item_value) != value_type):
+            return GenericPredicate(item_value)
+        return any(operator_func(item_value, rule_value) for rule_value in parsed_values)
+    return NumericPredicate
+# End CompileValuesPredicate
+
+# Returns a function taking an Item, which returns True if the item satisfies the condition
+# described by keyword, op_string, and values_list (see RuleMatchesItem for the semantics).
+def CompileCondition(keyword: str, op_string: str, values_list: List[str]):
+    # Handle sockets - for now just count number of total sockets
+    # Example socket rules:
+    #  - 'Sockets == 6' -> Check item has 6 sockets
+    #  - 'Sockets >= 5GGG' -> Unsupported, don't match to any item
+    if (keyword == 'Sockets'):
+        if ((len(values_list) == 1) and (simple_parser.IsInt(values_list[0]))):
+            num_sockets_predicate = CompileValuesPredicate(op_string, values_list)
+            def SocketsCondition(item) -> bool:
+                return (('Sockets' in item.properties_map)
+                        and num_sockets_predicate(item.properties_map['NumSockets']))
+            return SocketsCondition
+        return lambda item : False
+    # Check if any item property matches any of the values in the rule condition
+    # Example:
+    #  - item: HasInfluence Crusader, Redeemer (has Crusader AND Redeemer Influence)
+    #  - rule: HasInfluence Warlord, Crusader (matches items with Warlord OR Crusader Influence)
+    #  - (To create AND conditions in rules, place conditions on separate lines)
+    #  -> Rule matches item, because item has Crusader Influence
+    values_predicate = CompileValuesPredicate(op_string, values_list)
+    def Condition(item) -> bool:
+        # If we encounter an unexpected or missing keyword, never match
+        if (keyword not in item.properties_map):
+            return False
+        item_value = item.properties_map[keyword]
+        if (isinstance(item_value, list)):
+            return any(values_predicate(simple_parser.ParseValueDynamic(value))
+                       for value in item_value)
+        return values_predicate(simple_parser.ParseValueDynamic(item_value))
+    return Condition
+# End CompileCondition
+
+# Keywords whose conditions are typically repeated to bound a range of values,
+# e.g. "ItemLevel >= 60" and "ItemLevel < 75"
+kBoundsConditionKeywords = {'ItemLevel', 'AreaLevel'}
 
+# Integer bounds are converted to inclusive [lower, upper] bounds by these functions
+kLowerBoundFunctions = {'>=' : lambda value : value, '>' : lambda value : value + 1,
+                        '==' : lambda value : value}
+kUpperBoundFunctions = {'<=' : lambda value : value, '<' : lambda value : value - 1,
+                        '==' : lambda value : value}
+
+# Returns a function taking an Item, which returns True if the item satisfies all of the
+# conditions on keyword described by bounds_list, a list of (op_string, values_list) pairs.
+# The item value is looked up and parsed once for all conditions.  If every condition is
+# a comparison with a single int, the conditions are combined into one inclusive range.
+def CompileBoundsCondition(keyword: str, bounds_list: List[Tuple[str, List[str]]]):
+    if (len(bounds_list) == 1):
+        [(op_string, values_list)] = bounds_list
+        return CompileCondition(keyword, op_string, values_list)
+    values_predicates = tuple(CompileValuesPredicate(op_string, values_list)
+                              for op_string, values_list in bounds_list)
+    def GenericBoundsPredicate(item_value) -> bool:
+        return all(values_predicate(item_value) for values_predicate in values_predicates)
+    bounds_predicate = GenericBoundsPredicate
+    if (all(((op_string in kLowerBoundFunctions) or (op_string in kUpperBoundFunctions))
+            and (len(values_list) == 1) and simple_parser.IsInt(values_list[0])
+            for op_string, values_list in bounds_list)):
+        lower_bound, upper_bound = float('-inf'), float('inf')
+        for op_string, [value_string] in bounds_list:
+            value = int(value_string)
+            if (op_string in kLowerBoundFunctions):
+                lower_bound = max(lower_bound, kLowerBoundFunctions[op_string](value))
+            if (op_string in kUpperBoundFunctions):
+                upper_bound = min(upper_bound, kUpperBoundFunctions[op_string](value))
+        def RangePredicate(item_value) -> bool:
+            if (type(item_value) != int):
+                return GenericBoundsPredicate(item_value)
+            return lower_bound <= item_value <= upper_bound
+        bounds_predicate = RangePredicate
+    def BoundsCondition(item) -> bool:
+        if (keyword not in item.properties_map):
+            return False
+        item_value = item.properties_map[keyword]
+        if (isinstance(item_value, list)):
+            return all(any(values_predicate(simple_parser.ParseValueDynamic(value))
+                           for value in item_value)
+                       for values_predicate in values_predicates)
+        return bounds_predicate(simple_parser.ParseValueDynamic(item_value))
+    return BoundsCondition
+# End CompileBoundsCondition
+
+# Returns ignore_rule_flag, compiled_conditions, where compiled_conditions is a tuple of
+# functions as returned by CompileCondition, one for each condition of the rule (in order),
+# except that all lines of a keyword in kBoundsConditionKeywords are compiled into a single
+# condition by CompileBoundsCondition, at the position of the first such line.
+def CompileRuleConditions(rule: LootFilterRule) -> Tuple[bool, tuple]:
+    CheckType(rule, 'rule', LootFilterRule)
+    ignore_rule_flag, rule_conditions_list = rule.GetConditions()
+    if (ignore_rule_flag):
+        return True, ()
+    compiled_conditions = []
+    compiled_bounds_keywords = set()
+    for keyword, op_string, values_list in rule_conditions_list:
+        if (keyword in kBoundsConditionKeywords):
+            if (keyword not in compiled_bounds_keywords):
+                compiled_bounds_keywords.add(keyword)
+                compiled_conditions.append(CompileBoundsCondition(
+                        keyword, rule.parsed_lines_hll.get_all(keyword)))
+        else:
+            compiled_conditions.append(CompileCondition(keyword, op_string, values_list))
+    return False, tuple(compiled_conditions)
+# End CompileRuleConditions
+
+# Rules are compiled by CompileRuleConditions on first use; the compiled conditions are
+# stored in the rule, which discards them whenever its text lines are parsed or updated.
+# The rule matches the item if all of its conditions match the item.
 def RuleMatchesItem(rule: LootFilterRule, item: Item) -> bool:
     CheckType(rule, 'rule', LootFilterRule)
     CheckType(item, 'item', Item)
-    ignore_rule_flag, rule_conditions_list = rule.GetConditions()
+    if (rule.compiled_conditions == None):
+        rule.compiled_conditions = CompileRuleConditions(rule)
+    ignore_rule_flag, compiled_conditions = rule.compiled_conditions
     if (ignore_rule_flag):
         return False
-    # Check if each line of the rule matches the corresponding properties of the item
-    # If any rule line does not match, return False. If all match, return True.
-    for keyword, op_string, values_list in rule_conditions_list:
-        # If we encounter an unexpected or missing keyword, never match
-        if (keyword not in item.properties_map):
-            return False
-        # Handle sockets - for now just count number of total sockets
-        # Example socket rules:
-        #  - 'Sockets == 6' -> Check item has 6 sockets
-        #  - 'Sockets >= 5GGG' -> Unsupported, don't match to any item
-        elif (keyword == 'Sockets'):
-            if ((len(values_list) == 1) and (simple_parser.IsInt(values_list[0]))):
-                rule_num_sockets = int(values_list[0])
-                item_num_sockets = item.properties_map['NumSockets']
-                if (not OperatorFunc(op_string, item_num_sockets, rule_num_sockets)):
-                    return False
-                continue
-            else:
-                return False
-        # Check if any item property matches any of the values in the rule condition
-        # Example:
-        #  - item: HasInfluence Crusader, Redeemer (has Crusader AND Redeemer Influence)
-        #  - rule: HasInfluence Warlord, Crusader (matches items with Warlord OR Crusader Influence)
-        #  - (To create AND conditions in rules, place conditions on separate lines)
-        #  -> Rule matches item, because item has Crusader Influence
-        item_value_list = item.properties_map[keyword]
-        if (not isinstance(item_value_list, list)):
-            item_value_list = [item_value_list]
-        match = any(OperatorFunc(op_string, item_value, rule_value)
-                    for item_value in item_value_list
-                    for rule_value in values_list)
-        if (not match):
+    for condition in compiled_conditions:
+        if (not condition(item)):
             return False
     return True
-# End RuleMatchesItem
\ No newline at end of file
+# End RuleMatchesItem
@@ -1,4 +1,4 @@
-from item import Item
+from item import Item, SplitItemTexts
 
 from enum import Enum
 from typing import List, Tuple
@@ -70,10 +70,27 @@ def TestParseItemText():
             AssertEqual(str(item.properties_map[keyword]), expected_item_properties_map[keyword])
     print('TestParseItemText passed!')
 
+def TestSplitItemTexts():
+    item_text_lines = ['Item Class: Wands', 'Rarity: Normal', 'Imbued Wand']
+    other_item_text_lines = ['Item Class: Stackable Currency', 'Rarity: Currency', 'Chaos Orb']
+    AssertEqual(SplitItemTexts([]), [])
+    # Separator lines are optional for the first and after the last item, blank lines ignored
+    AssertEqual(SplitItemTexts(item_text_lines), ['\n'.join(item_text_lines)])
+    text_lines = (['', test_consts.kHorizontalSeparator, ''] + item_text_lines
+            + ['', test_consts.kHorizontalSeparator, test_consts.kHorizontalSeparator]
+            + other_item_text_lines + [''])
+    AssertEqual(SplitItemTexts(text_lines),
+            ['\n'.join(item_text_lines), '\n'.join(other_item_text_lines)])
+    # Same results as reading the test case file in the test case format
+    item_text_strings = SplitItemTexts(file_helper.ReadFile(test_consts.kTestItemsFullpath, strip=True))
+    AssertEqual(len(item_text_strings), len(ParseTestCases(test_consts.kItemTestCasesInputFullpath)))
+    print('TestSplitItemTexts passed!')
+
 # Note: item.RuleMatchesItem is tested in rule_matching_test.py.
 
 def main():
     TestParseItemText()
+    TestSplitItemTexts()
     print('All tests passed!')
 
 if (__name__ == '__main__'):
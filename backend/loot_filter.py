@@ -2,17 +2,22 @@ from enum import Enum
 from typing import List, Tuple
 
 import base_type_helper
+from base_type_index import BaseTypeIndex, ParseBaseTypesFromText
 import consts
 import file_helper
+import filter_snapshot
 from hash_linked_list import HllNode, HashLinkedList
-from item import Item, RuleMatchesItem
+from item import Item
 import logger
 from loot_filter_rule import RuleVisibility, LootFilterRule
+from ordered_set import OrderedSet
 import os.path
 import parse_helper
 from profile import Profile
+from rule_match_index import RuleMatchIndex
 import simple_parser
 import socket_helper
+import stage_timing
 from type_checker import CheckType
 
 kTextBlockKey = 'text_block'
@@ -29,25 +34,108 @@ class DlFCustomRuleType(Enum):
     kSocketPattern = 2
 # End class DlfCustomRuleType
 
+# Returns the exact bytes SaveToFile writes for the given block of text lines,
+# including the blank line separating it from the next block.
+def EncodeTextBlock(text_lines: List[str]) -> bytes:
+    return ('\n'.join(text_lines) + '\n\n').replace('\n', os.linesep).encode('utf-8')
+# End EncodeTextBlock
+
+# Returns (is_rule, tags) for the given non-empty block, where tags is the (type_tag, tier_tag)
+# pair of a rule with both tags, and None for an untagged rule or a text block.
+def ClassifyBlock(block: List[str]) -> Tuple[bool, Tuple[str, str]]:
+    if (not LootFilterRule.IsParsableAsRule(block)):
+        return False, None
+    tags = parse_helper.ParseTypeTierTags(block)
+    return True, (tags if ((tags != None) and tags[0] and tags[1]) else None)
+# End ClassifyBlock
+
 # Holds either a LootFilterRule or a list of strings
+# A rule may be given as its text lines, in which case it is parsed on first access of self.rule.
+# (Loading a filter only needs each rule's type and tier tags, so most rules are never parsed.)
 class RuleOrTextBlock:
     '''
     Member variables:
      - self.is_rule: bool
-     - self.rule: LootFilterRule
-     - self.text_lines: List[str]
+     - self.rule: LootFilterRule - parsed from self.text_lines on first access, if needed
+     - self.text_lines: List[str] - the lines of a text block or of a not yet parsed rule
+        - None once the rule has been parsed
+     - self.byte_offset: int - position of the block in the output filter, None if unknown
+     - self.byte_length: int - size of the block in the output filter, None if unknown
+        - only meaningful while LootFilter.output_filter_layout is not None
+     - self.base_type_index: BaseTypeIndex or None - the index containing this not yet parsed
+       rule, if any, which is registered with the rule once it is parsed
     '''
 
+    # A filter has about a thousand blocks, so blocks are slotted to keep them compact
+    __slots__ = ('is_rule', '_rule', 'text_lines', 'byte_offset', 'byte_length',
+                 'base_type_index')
+
+    # If is_rule is True, rule_or_text_block may be a LootFilterRule or its text lines
     def __init__(self, rule_or_text_block, is_rule: bool):
         CheckType(is_rule, 'is_rule', bool)
         self.is_rule = is_rule
-        if (is_rule):
-            CheckType(rule_or_text_block, 'rule_or_text_block', LootFilterRule)
-            self.rule = rule_or_text_block
+        self._rule = None
+        self.text_lines = None
+        if (is_rule and isinstance(rule_or_text_block, LootFilterRule)):
+            self._rule = rule_or_text_block
         else:
             CheckType(rule_or_text_block, 'rule_or_text_block', list, str)
             self.text_lines = rule_or_text_block
+        self.byte_offset = None
+        self.byte_length = None
+        self.base_type_index = None
     # End __init__
+
+    # The BaseTypeIndex belongs to the owning LootFilter, so it is not pickled
+    def __getstate__(self):
+        state = {slot : getattr(self, slot) for slot in RuleOrTextBlock.__slots__}
+        state['base_type_index'] = None
+        return state
+    # End __getstate__
+
+    def __setstate__(self, state):
+        for slot, value in state.items():
+            setattr(self, slot, value)
+    # End __setstate__
+
+    @property
+    def rule(self) -> LootFilterRule:
+        if (not self.is_rule):
+            raise RuntimeError('RuleOrTextBlock is a text block, not a rule')
+        if (self._rule == None):
+            with stage_timing.TimeStage('parse_rules'):
+                self._rule = LootFilterRule(self.text_lines)
+            self.text_lines = None
+            if (self.base_type_index != None):
+                self.base_type_index.RegisterParsedRule(self, self._rule)
+                self.base_type_index = None
+        return self._rule
+    # End rule getter
+
+    # Returns True if the block is a rule that has been parsed into a LootFilterRule.
+    def IsParsed(self) -> bool:
+        return self._rule != None
+    # End IsParsed
+
+    # An unparsed rule's text is exactly the text of the rule it parses to, so
+    # neither GetTextLines, IsDirty, nor SetSaved needs to parse the rule.
+    def GetTextLines(self) -> List[str]:
+        return self._rule.GetTextLines() if self.IsParsed() else self.text_lines
+    # End GetTextLines
+
+    # Returns True if the block's text has changed since it was parsed or last saved.
+    # (Text blocks are never modified after parsing.)
+    def IsDirty(self) -> bool:
+        return self.IsParsed() and self._rule.is_dirty
+    # End IsDirty
+
+    # Records that the block was written to the output filter at the given byte offset.
+    def SetSaved(self, byte_offset: int, byte_length: int):
+        self.byte_offset = byte_offset
+        self.byte_length = byte_length
+        if (self.IsParsed()):
+            self._rule.is_dirty = False
+    # End SetSaved
 # End class RuleOrTextLines
 
 class LootFilter:
@@ -70,6 +158,12 @@ class LootFilter:
         - used to create unique tags for untagged rules
      - self.socket_rule_tier_tags: List[str] - technically not the optimal data structure, but
        size is small and preserving ordering will yield a better user experience than using a set
+     - self.output_filter_layout: (mtime_ns, size, num_hll_modifications) or None
+        - if not None, the byte_offset and byte_length of every block describe the output filter
+          with the given modification time and size, as long as rule_or_text_block_hll.num_modifications
+          is still num_hll_modifications (i.e. no blocks have been added or removed since)
+     - self.rule_match_index: RuleMatchIndex or None - built on demand by GetRuleMatchIndex
+     - self.base_type_index: BaseTypeIndex or None - built on demand by GetBaseTypeIndex
     '''
 
     # ================================= Public API =================================
@@ -95,8 +189,9 @@ class LootFilter:
     def __init__(self, profile_param: Profile or str, input_filter_source: InputFilterSource):
         CheckType(profile_param, 'profile_param', (Profile, str))
         CheckType(input_filter_source, 'input_filter_source', InputFilterSource)
-        self.profile_obj = (profile_param if isinstance(profile_param, Profile)
-                else Profile(profile_param))
+        with stage_timing.TimeStage('load_profile'):
+            self.profile_obj = (profile_param if isinstance(profile_param, Profile)
+                    else Profile(profile_param))
         # Copy/move Download filter to Input filter if appropriate
         config_values = self.profile_obj.config_values
         self.input_filter_source = input_filter_source
@@ -114,18 +209,101 @@ class LootFilter:
         self.socket_rule_tier_tags = []
         self.num_raw_text_blocks = 0
         self.num_untagged_rules = 0
+        self.output_filter_layout = None
+        self.rule_match_index = None
+        self.base_type_index = None
         self.ParseInputFilterFile()
     # End __init__
 
+    # Writes the output filter, re-encoding only the blocks modified since it was last parsed or
+    # saved, if possible (see SaveModifiedBlocksToFile), otherwise re-encoding every block.
+    # The output filter is always replaced by a single atomic write, so the game never reads a
+    # partially written filter.  For this reason modified blocks are never patched in place, and
+    # the whole file is read and written either way: the only saving is not re-encoding
+    # unmodified blocks (about 2 ms of 4 ms per save of a fully parsed 360 KB filter).
+    # Also saves a snapshot of the parsed filter if the filter was parsed from the output filter,
+    # so the next LootFilter constructed from the output filter does not need to re-parse it.
     def SaveToFile(self):
-        with open(self.profile_obj.config_values['OutputLootFilterFullpath'],
-                'w', encoding='utf-8') as output_file:
-            for key, rule_or_text_block in self.rule_or_text_block_hll:
-                text_lines = (rule_or_text_block.rule.GetTextLines()
-                        if rule_or_text_block.is_rule else rule_or_text_block.text_lines)
-                output_file.write('\n'.join(text_lines) + '\n\n')
+        output_filter_fullpath = self.profile_obj.config_values['OutputLootFilterFullpath']
+        with stage_timing.TimeStage('save_filter'):
+            output_bytes = self.SaveModifiedBlocksToFile(output_filter_fullpath)
+            if (output_bytes == None):
+                output_bytes = self.SaveAllBlocksToFile(output_filter_fullpath)
+        if (self.input_filter_source == InputFilterSource.kOutput):
+            # Keep tier tag lists exactly as they would be after parsing the saved filter
+            self.UpdateCustomRuleTierTags()
+            # The written bytes are hashed, rather than re-reading the output filter
+            filter_fingerprint = filter_snapshot.FilterFingerprint(
+                    output_filter_fullpath, output_bytes)
+            # Only save the snapshot if the file has not been modified since we wrote it
+            if ((filter_fingerprint != None) and (self.output_filter_layout != None)
+                    and ((filter_fingerprint['filter_mtime_ns'], filter_fingerprint['filter_size'])
+                         == self.output_filter_layout[:2])):
+                with stage_timing.TimeStage('save_snapshot'):
+                    filter_snapshot.SaveSnapshot(self, filter_fingerprint)
     # End SaveToFile
 
+    # Encodes and writes every block, and returns the bytes written.
+    def SaveAllBlocksToFile(self, output_filter_fullpath: str) -> bytes:
+        CheckType(output_filter_fullpath, 'output_filter_fullpath', str)
+        blocks = [rule_or_text_block for _, rule_or_text_block in self.rule_or_text_block_hll]
+        output_blocks = [EncodeTextBlock(block.GetTextLines()) for block in blocks]
+        return self.WriteBlocksToFile(blocks, output_blocks, output_filter_fullpath)
+    # End SaveAllBlocksToFile
+
+    # Encodes only the blocks modified since the output filter was last parsed or saved, copies
+    # all other blocks from the existing output filter, and writes the result.
+    # Returns the bytes of the output filter, which is left as is if no blocks were modified.
+    # Returns None without writing anything if the output filter layout is unknown, blocks have
+    # been added or removed, or the output filter was modified externally.
+    def SaveModifiedBlocksToFile(self, output_filter_fullpath: str) -> bytes or None:
+        CheckType(output_filter_fullpath, 'output_filter_fullpath', str)
+        if ((self.output_filter_layout == None) or not os.path.isfile(output_filter_fullpath)):
+            return None
+        mtime_ns, size, num_hll_modifications = self.output_filter_layout
+        stat_result = os.stat(output_filter_fullpath)
+        if ((num_hll_modifications != self.rule_or_text_block_hll.num_modifications)
+                or ((stat_result.st_mtime_ns, stat_result.st_size) != (mtime_ns, size))):
+            return None
+        with open(output_filter_fullpath, 'rb') as output_file:
+            existing_bytes = output_file.read()
+        if (len(existing_bytes) != size):
+            return None
+        blocks = [rule_or_text_block for _, rule_or_text_block in self.rule_or_text_block_hll]
+        if (not any(block.IsDirty() for block in blocks)):
+            return existing_bytes
+        output_blocks = [
+                EncodeTextBlock(block.GetTextLines()) if block.IsDirty()
+                else existing_bytes[block.byte_offset : block.byte_offset + block.byte_length]
+                for block in blocks]
+        return self.WriteBlocksToFile(blocks, output_blocks, output_filter_fullpath)
+    # End SaveModifiedBlocksToFile
+
+    # Writes output_blocks (the encoded blocks, in order) to the output filter, then records each
+    # block's new position.  Returns the bytes written.
+    def WriteBlocksToFile(self, blocks: List[RuleOrTextBlock], output_blocks: List[bytes],
+                          output_filter_fullpath: str) -> bytes:
+        CheckType(output_blocks, 'output_blocks', list, bytes)
+        CheckType(output_filter_fullpath, 'output_filter_fullpath', str)
+        output_bytes = b''.join(output_blocks)
+        file_helper.AtomicWriteToFile(output_bytes, output_filter_fullpath)
+        byte_offset = 0
+        for block, block_bytes in zip(blocks, output_blocks):
+            block.SetSaved(byte_offset, len(block_bytes))
+            byte_offset += len(block_bytes)
+        self.UpdateOutputFilterLayout(output_filter_fullpath)
+        return output_bytes
+    # End WriteBlocksToFile
+
+    # Call after writing blocks to the output filter, records that the blocks' byte offsets
+    # now describe the output filter in its current state.
+    def UpdateOutputFilterLayout(self, output_filter_fullpath: str):
+        CheckType(output_filter_fullpath, 'output_filter_fullpath', str)
+        stat_result = os.stat(output_filter_fullpath)
+        self.output_filter_layout = (stat_result.st_mtime_ns, stat_result.st_size,
+                                     self.rule_or_text_block_hll.num_modifications)
+    # End UpdateOutputFilterLayout
+
     # Note: when parsing, we create unique tags for rules missing tags.
     # Rules not missing tags are assumed to have unique (type_tag, tier_tag) keys.
     def GetRule(self, type_tag: str, tier_tag: str) -> LootFilterRule:
@@ -139,23 +317,59 @@ class LootFilter:
     # Returns the first non-Continue rule in the filter matching the given item,
     # None if no rule matches the item, or the last matched Continue rule otherwise.
     # If a rule has an AreaLevel requirement, it will never match any item.
+    # Uses a RuleMatchIndex, which is built on first use and rebuilt whenever rules
+    # have been added, removed, or modified since it was built.
     def GetRuleMatchingItem(self, item: Item) -> LootFilterRule:
         CheckType(item, 'item', Item)
-        matched_continue_rule = None
-        for tags, rule_or_text_block in self.rule_or_text_block_hll:
-            if (rule_or_text_block.is_rule):
-                rule = rule_or_text_block.rule
-                if (not RuleVisibility.IsDisabled(rule.visibility)
-                        and RuleMatchesItem(rule, item)):
-                    if ('Continue' in rule.parsed_lines_hll):
-                        matched_continue_rule = rule
-                    else:
-                        return rule
-        if (matched_continue_rule):
-            return matched_continue_rule
-        return None
+        return self.GetRuleMatchIndex().GetRuleMatchingItem(item)
     # End GetRuleMatchingItem
 
+    # Returns a list containing the rule matching each item (or None if no rule matches it),
+    # in the same order as the given items.
+    def GetRulesMatchingItems(self, items: List[Item]) -> List[LootFilterRule]:
+        CheckType(items, 'items', list, Item)
+        rule_match_index = self.GetRuleMatchIndex()
+        return [rule_match_index.GetRuleMatchingItem(item) for item in items]
+    # End GetRulesMatchingItems
+
+    # Returns the RuleMatchIndex of this filter, first rebuilding it if it is out of date.
+    def GetRuleMatchIndex(self) -> RuleMatchIndex:
+        if ((self.rule_match_index == None)
+                or not self.rule_match_index.IsCurrent(self.rule_or_text_block_hll)):
+            self.rule_match_index = RuleMatchIndex(self.rule_or_text_block_hll)
+        return self.rule_match_index
+    # End GetRuleMatchIndex
+
+    # Returns the BaseTypeIndex of this filter, first rebuilding it if it is out of date.
+    # (Rules keep the index up to date as they are modified, so it only needs to be rebuilt
+    # when rules are added or removed.  Building the index does not parse any rules.)
+    # Building the index scans every rule, so it is only worth it for queries over all rules:
+    # lookups in a few known rules should use RuleContainsBaseType instead.
+    def GetBaseTypeIndex(self) -> BaseTypeIndex:
+        if ((self.base_type_index == None)
+                or not self.base_type_index.IsCurrent(self.rule_or_text_block_hll)):
+            self.base_type_index = BaseTypeIndex(self.rule_or_text_block_hll)
+        return self.base_type_index
+    # End GetBaseTypeIndex
+
+    # Returns the keys (type_tag, tier_tag) of all rules whose BaseType list contains base_type.
+    def GetRuleKeysWithBaseType(self, base_type: str) -> List[Tuple[str, str]]:
+        CheckType(base_type, 'base_type', str)
+        return self.GetBaseTypeIndex().GetRuleKeys(base_type)
+    # End GetRuleKeysWithBaseType
+
+    # Returns True if the BaseType list of the given rule contains base_type.
+    # Does not parse the rule if it has not been parsed yet.
+    def RuleContainsBaseType(self, type_tag: str, tier_tag: str, base_type: str) -> bool:
+        CheckType(type_tag, 'type_tag', str)
+        CheckType(tier_tag, 'tier_tag', str)
+        CheckType(base_type, 'base_type', str)
+        rule_or_text_block = self.rule_or_text_block_hll[(type_tag, tier_tag)]
+        if (rule_or_text_block.IsParsed()):
+            return base_type in rule_or_text_block.rule.GetBaseTypeList()
+        return base_type in ParseBaseTypesFromText(rule_or_text_block.GetTextLines())
+    # End RuleContainsBaseType
+
     # =========================== Map-Related Functions ===========================
 
     def SetHideMapsBelowTierTier(self, tier: int) -> int:
@@ -277,7 +491,7 @@ class LootFilter:
         rule = self.GetRule(type_tag, tier_tag)
         if (rule.visibility != RuleVisibility.kShow):
             return False
-        return flask_base_type in rule.GetBaseTypeList()
+        return self.RuleContainsBaseType(type_tag, tier_tag, flask_base_type)
     # End IsFlaskRuleEnabledFor
 
     def GetAllVisibleFlaskTypes(self, high_ilvl_flag: bool) -> List[str]:
@@ -287,7 +501,7 @@ class LootFilter:
         rule = self.GetRule(type_tag, tier_tag)
         if (rule.visibility != RuleVisibility.kShow):
             return []
-        return rule.GetBaseTypeList()
+        return list(rule.GetBaseTypeList())  # returns a copy
     # End GetAllVisibleFlaskTypes
 
     # =========================== Socket Pattern Functions ==========================
@@ -361,11 +575,11 @@ class LootFilter:
     # consistency is enforced, this is only an implementation detail.)
     def GetTierOfCurrency(self, currency_name: str) -> int:
         CheckType(currency_name, 'currency_name', str)
+        base_type_name = parse_helper.UnquotedString(currency_name)
         for tier in range(1, consts.kNumCurrencyTiersIncludingScrolls + 1):
             stack_size = 1
             type_tag, tier_tag = consts.kUnifiedCurrencyTags[tier][stack_size]
-            rule = self.GetRule(type_tag, tier_tag)
-            if (currency_name in rule.GetBaseTypeList()):
+            if (self.RuleContainsBaseType(type_tag, tier_tag, base_type_name)):
                 return tier
         logger.Log('Warning: currency "{}" not found in normal currency tiers'.format(
                            currency_name))
@@ -412,6 +626,75 @@ class LootFilter:
             rule.Enable()
     # End MoveCurrencyFromTierToTier
 
+    # Equivalent to calling SetCurrencyToTier(currency_name, target_tier) for each pair of
+    # currency_tier_pairs in order, but regenerates the text of each affected rule only once.
+    # The moves are first applied to working copies of the currency rules' BaseType lists and
+    # visibilities, and only the rules the sequential calls would have updated are written back.
+    # Raises (without modifying the filter) if any currency rule is missing.
+    def SetCurrenciesToTiers(self, currency_tier_pairs: List[Tuple[str, int]]):
+        CheckType(currency_tier_pairs, 'currency_tier_pairs', list, tuple)
+        # Working state: rule key -> [rule, base_type_set, visibility, touched_flag]
+        rule_states = {}
+        tier_rule_keys = {}
+        for tier in range(1, consts.kNumCurrencyTiersIncludingScrolls + 1):
+            tier_rule_keys[tier] = []
+            for stack_size in consts.kCurrencyStackSizesByTier[tier]:
+                rule_key = consts.kUnifiedCurrencyTags[tier][stack_size]
+                tier_rule_keys[tier].append(rule_key)
+                if (rule_key not in rule_states):
+                    rule = self.GetRule(*rule_key)
+                    rule_states[rule_key] = [
+                            rule, OrderedSet(rule.GetBaseTypeList()), rule.visibility, False]
+        disabled_visibility_map = {RuleVisibility.kShow : RuleVisibility.kDisabledShow,
+                                   RuleVisibility.kHide : RuleVisibility.kDisabledHide}
+        enabled_visibility_map = {v : k for k, v in disabled_visibility_map.items()}
+        # Each step below mirrors the corresponding step of MoveCurrencyFromTierToTier
+        def RemoveFromRule(rule_state, base_type_name: str):
+            if (rule_state[1].remove(base_type_name)):
+                if (len(rule_state[1]) == 0):
+                    rule_state[2] = disabled_visibility_map.get(rule_state[2], rule_state[2])
+                rule_state[3] = True
+        # End RemoveFromRule
+        for currency_name, target_tier in currency_tier_pairs:
+            CheckType(currency_name, 'currency_name', str)
+            CheckType(target_tier, 'target_tier', int)
+            base_type_name = parse_helper.UnquotedString(currency_name)
+            original_tier = -1
+            for tier in range(1, consts.kNumCurrencyTiersIncludingScrolls + 1):
+                if (base_type_name in rule_states[tier_rule_keys[tier][0]][1]):
+                    original_tier = tier
+                    break
+            if (original_tier == -1):
+                logger.Log('Warning: currency "{}" not found in normal currency tiers'.format(
+                                   currency_name))
+            if (not (1 <= target_tier <= consts.kNumCurrencyTiersExcludingScrolls)):
+                logger.Log(('Warning: currency "{}" could not be moved from tier {} to tier {}, '
+                            'target tier is out of the valid currency tier range: [1, {}]').format(
+                                    currency_name, original_tier, target_tier,
+                                    consts.kNumCurrencyTiersExcludingScrolls))
+                continue
+            if (original_tier != -1):
+                for rule_key in tier_rule_keys[original_tier]:
+                    RemoveFromRule(rule_states[rule_key], base_type_name)
+            for rule_key in tier_rule_keys[target_tier]:
+                rule_state = rule_states[rule_key]
+                RemoveFromRule(rule_state, base_type_name)
+                if (rule_state[1].insert(base_type_name)):
+                    rule_state[3] = True
+                if (rule_state[2] in enabled_visibility_map):
+                    rule_state[2] = enabled_visibility_map[rule_state[2]]
+                    rule_state[3] = True
+        # Write back the final state of each modified rule
+        for rule, base_type_set, visibility, touched_flag in rule_states.values():
+            if (not touched_flag):
+                continue
+            rule.SetBaseTypes(base_type_set)
+            if (RuleVisibility.IsEnabled(visibility)):
+                rule.Enable()
+            elif (RuleVisibility.IsDisabled(visibility)):
+                rule.Disable()
+    # End SetCurrenciesToTiers
+
     def SetCurrencyTierMinVisibleStackSize(self, tier_param: str or int, min_stack_size_param: str or int):
         if (isinstance(tier_param, int)):
             tier_param = str(tier_param)
@@ -479,7 +762,7 @@ class LootFilter:
         type_tag = consts.kDlfSplintersTypeTag
         for stack_size in consts.kDlfSplinterStackSizes:
             tier_tag = consts.kDlfSplintersTierTagTemplate.format(stack_size)
-            if (splinter_base_type in self.GetRule(type_tag, tier_tag).GetBaseTypeList()):
+            if (self.RuleContainsBaseType(type_tag, tier_tag, splinter_base_type)):
                 return stack_size
         # Splinter base_type not found, so all stack sizes are visible.
         return 1
@@ -833,14 +1116,19 @@ class LootFilter:
                 else self.rule_or_text_block_hll.insert_after)
         if (len(block) == 0):
             return None
-        elif (LootFilterRule.IsParsableAsRule(block)):
-            rule = LootFilterRule(block)
+        is_rule, tags = ClassifyBlock(block)
+        if (is_rule and (tags != None)):
+            # Only the tags are needed for the key, so tagged rules are parsed on first access
+            key = tags
+            insert_function(key, RuleOrTextBlock(block, is_rule=True), adjacent_key)
+            return key
+        elif (is_rule):
+            # Untagged rules are parsed immediately to assign their tags
+            with stage_timing.TimeStage('parse_rules'):
+                rule = LootFilterRule(block)
             key = rule.type_tag, rule.tier_tag
-            if ((not rule.type_tag) or (not rule.tier_tag)):
-                self.num_untagged_rules += 1
-                rule.SetTypeTierTags(consts.kUntaggedRuleTypeTag, str(self.num_untagged_rules))
-            elif (rule.type_tag == consts.kSocketsTypeTag):
-                self.socket_rule_tier_tags.append(rule.tier_tag)
+            self.num_untagged_rules += 1
+            rule.SetTypeTierTags(consts.kUntaggedRuleTypeTag, str(self.num_untagged_rules))
             insert_function(key, RuleOrTextBlock(rule, is_rule=True), adjacent_key)
             return key
         else:  # not parsable as rule
@@ -850,6 +1138,8 @@ class LootFilter:
             return key
         # End AddBlockToHllImpl
 
+    # Loads the parsed filter from its snapshot if the filter is parsed from the output filter
+    # and the snapshot is up to date; otherwise parses the input filter file.
     def ParseInputFilterFile(self) -> None:
         input_filter_fullpath = self.profile_obj.config_values[
                 'OutputLootFilterFullpath'
@@ -857,35 +1147,82 @@ class LootFilter:
                 else 'InputLootFilterFullpath']
         if (not os.path.isfile(input_filter_fullpath)):
             raise RuntimeError('Input filter {} does not exist'.format(input_filter_fullpath))
-        input_lines = file_helper.ReadFile(input_filter_fullpath, strip=True)
+        # Fingerprint must be taken before reading the filter (see filter_snapshot.py)
+        filter_fingerprint = None
+        if (self.input_filter_source == InputFilterSource.kOutput):
+            with stage_timing.TimeStage('load_snapshot'):
+                filter_fingerprint = filter_snapshot.FilterFingerprint(input_filter_fullpath)
+                snapshot_loaded_flag = ((filter_fingerprint != None)
+                        and filter_snapshot.LoadSnapshot(self, filter_fingerprint))
+            if (snapshot_loaded_flag):
+                return
         # Check that input filter is a FilterBlade filter
-        if (not parse_helper.IsSubstringInLines(
-                consts.kFilterBladeHeaderIdentifier, input_lines[:100])):
+        header_lines = file_helper.ReadFile(input_filter_fullpath, strip=True, max_num_lines=100)
+        if (not parse_helper.IsSubstringInLines(consts.kFilterBladeHeaderIdentifier, header_lines)):
             raise RuntimeError('Filter "{}" does not appear to be a FilterBlade filter.'
                     ' DLF requires a FilterBlade input filter.'.format(input_filter_fullpath))
         # Break input lines into "blocks". A block is a group of consecutive lines
         # of text without any empty (whitespace-only) lines.
-        # Each block will then be parsed into a RuleOrTextLines object.
-        current_block = []
-        for input_line in input_lines:
-            if (input_line == ''):
-                self.AddBlockToHllBefore(current_block, successor_key=None)
-                current_block = []
-            else:
-                current_block.append(input_line)
+        # Each block will then be parsed into a RuleOrTextBlock object.
+        # (Reading blocks from the file is timed separately, but is included in "parse_blocks".)
+        blocks_iterator = stage_timing.TimedIterator(
+                'read_and_split_blocks', file_helper.IterBlocks(input_filter_fullpath))
+        # For the output filter, also record where SaveToFile would write each block, and hash
+        # what it would write, to initialize the output filter layout
+        byte_offset = 0
+        content_hasher = filter_snapshot.ContentHasher()
+        with stage_timing.TimeStage('parse_blocks'):
+            for block in blocks_iterator:
+                key = self.AddBlockToHllImpl(block, None, insert_before_flag=True)
+                if ((filter_fingerprint != None) and (key != None)):
+                    block_bytes = EncodeTextBlock(block)
+                    content_hasher.update(block_bytes)
+                    rule_or_text_block = self.rule_or_text_block_hll[key]
+                    rule_or_text_block.byte_offset = byte_offset
+                    rule_or_text_block.byte_length = len(block_bytes)
+                    byte_offset += len(block_bytes)
+        if (filter_fingerprint != None):
+            self.InitializeOutputFilterLayout(filter_fingerprint, content_hasher.hexdigest())
         # Find DLF rules successor key before applying import changes
         self.dlf_rules_successor_key = self.GetFilterBladeRulesStartKey()
         # Apply import changes if needed
         if (self.input_filter_source != InputFilterSource.kOutput):
-            self.ApplyImportChanges()
-        # Update self.base_type_rule_tier_tags and self.socket_rule_tier_tags
+            with stage_timing.TimeStage('apply_import_changes'):
+                self.ApplyImportChanges()
+        self.UpdateCustomRuleTierTags()
+        if (filter_fingerprint != None):
+            with stage_timing.TimeStage('save_snapshot'):
+                filter_snapshot.SaveSnapshot(self, filter_fingerprint)
+    # End ParseLootFilterFile()
+
+    # Called after parsing the output filter, before any blocks are added or removed, with the
+    # hash of what SaveToFile would write for the parsed blocks (whose positions in that output
+    # were recorded while parsing).  If the output filter described by filter_fingerprint has
+    # the same hash, the recorded positions are its actual layout, so later saves can re-encode
+    # only modified blocks.  (Otherwise, the first save re-encodes the whole output filter.)
+    def InitializeOutputFilterLayout(self, filter_fingerprint: dict, parsed_blocks_hash: str):
+        CheckType(filter_fingerprint, 'filter_fingerprint', dict)
+        CheckType(parsed_blocks_hash, 'parsed_blocks_hash', str)
+        if (parsed_blocks_hash != filter_fingerprint['filter_hash']):
+            return
+        # Use the stat values from before the filter was read, so any concurrent modification
+        # results in a full rewrite on the next save
+        self.output_filter_layout = (filter_fingerprint['filter_mtime_ns'],
+                filter_fingerprint['filter_size'], self.rule_or_text_block_hll.num_modifications)
+    # End InitializeOutputFilterLayout
+
+    # Rebuilds self.base_type_rule_tier_tags and self.socket_rule_tier_tags
+    # from the rules in self.rule_or_text_block_hll, in filter order.
+    def UpdateCustomRuleTierTags(self):
+        self.base_type_rule_tier_tags = []
+        self.socket_rule_tier_tags = []
         for (type_tag, tier_tag), rule_or_text_block in self.rule_or_text_block_hll:
             if rule_or_text_block.is_rule:
                 if (type_tag == consts.kBaseTypeTypeTag):
                     self.base_type_rule_tier_tags.append(tier_tag)
                 elif (type_tag == consts.kSocketsTypeTag):
                     self.socket_rule_tier_tags.append(tier_tag)
-    # End ParseLootFilterFile()
+    # End UpdateCustomRuleTierTags
 
     # Returns the key pair for the comment block indicating the start of FilterBlade rules.
     # Raises a runtime error if not found.
@@ -1024,8 +1361,8 @@ class LootFilter:
         dlf_header_string = consts.kDlfHeaderTemplate.format(consts.kDlfVersion)
         dlf_header_rule_or_text_block = RuleOrTextBlock(
                 dlf_header_string.split('\n'), is_rule=False)
-        self.rule_or_text_block_hll.insert_at_index(
-                consts.kDlfHeaderKey, dlf_header_rule_or_text_block, index=0)
+        self.rule_or_text_block_hll.insert_first(
+                consts.kDlfHeaderKey, dlf_header_rule_or_text_block)
         # Add DLF-generated rules and custom user rules
         self.AddDlfRules()
         # Make all stacked currency tiers match their unstacked counterparts
@@ -2,8 +2,9 @@ from collections import OrderedDict
 from enum import Enum
 from typing import List, Tuple
 
-from hash_linked_list import HashLinkedList
+from hash_linked_list import HashLinkedMultimap
 import logger
+from ordered_set import OrderedSet
 import parse_helper
 import profile
 from type_checker import CheckType
@@ -35,6 +36,14 @@ kRuleActionKeywords = {
     'MinimapIcon', 'PlayEffect'}
 
 kAllRuleKeywords = kRuleConditionKeywords | kRuleActionKeywords | {'Continue'}  # set union
+parse_helper.SeedInternedStrings(kAllRuleKeywords)
+
+# Incremented whenever any LootFilterRule is updated, so that structures derived from rule
+# contents (e.g. RuleMatchIndex) can cheaply detect that they are stale.  Constructing a rule
+# is not a modification: a new rule is either not in any filter yet (adding it to a filter
+# modifies the filter's HashLinkedList instead), or is the lazy parse of a rule already in a
+# filter, whose contents are exactly those of its unparsed text.
+g_num_rule_modifications = 0
 
 class RuleVisibility(Enum):
     kShow = 1
@@ -77,14 +86,33 @@ class LootFilterRule:
     Member variables:
      - self.header_comment_lines: List[str] - all lines before the Show/Hide/Disable line
      - self.rule_text_lines: List[str] - text lines excluding header comment lines
-     - self.parsed_lines_hll: hash_linked_list mapping keyword to (operator, values_list) pairs
+        - this is a property: after the rule is modified, the text lines are regenerated
+          on first access (see UpdateRuleTextLines)
+     - self.rule_text_lines_outdated: bool - True if the rule has been modified since
+       rule_text_lines were last generated
+     - self.parsed_lines_hll: HashLinkedMultimap mapping keyword to (operator, values_list) pairs
         - keyword: str, operator: str, value_list: List[str]
+        - for the BaseType keyword, value_list is an OrderedSet of (unquoted) BaseType names
+        - a keyword may have several lines (e.g. "ItemLevel >= 60" and "ItemLevel < 75"):
+          parsed_lines_hll[keyword] is the last one, parsed_lines_hll.get_all(keyword) all of them
      - self.visibility: RuleVisibility
      - self.type_tag: str - identifier found after "$type->" in the first line of the rule
      - self.tier_tag: str - identifier found after "$tier->" in the first line of the rule
         - Tags will be None (but contructor will not error) if tags do not exist in input text
+     - self.is_dirty: bool - True if rule_text_lines have been regenerated since the rule was
+       parsed (or since the owner last cleared the flag after saving the rule)
+     - self.compiled_conditions: (ignore_rule_flag, tuple of functions) or None - set by
+       item.RuleMatchesItem on first use, reset to None whenever the rule is parsed or updated
+     - self.base_type_index: BaseTypeIndex or None - the index containing this rule, if any,
+       which is notified whenever the rule is parsed or updated
     '''
 
+    # Slotted to keep rules compact (see hash_linked_list.py); this also means rules have no
+    # __dict__, so __getstate__ and __setstate__ below handle pickling
+    __slots__ = ('header_comment_lines', '_rule_text_lines', 'rule_text_lines_outdated',
+                 'parsed_lines_hll', 'visibility', 'type_tag', 'tier_tag', 'is_dirty',
+                 'compiled_conditions', 'base_type_index')
+
     # We define a block of text lines to be parsable as a LootFilterRule
     # if it contains a Show/Hide line, as defined by parse_helper.FindShowHideLineIndex.
     # If this function returns True, the LootFilterRule constructor is guaranteed not to
@@ -100,6 +128,7 @@ class LootFilterRule:
         if (isinstance(text_lines, str)):
             text_lines = text_lines.split('\n')
         CheckType(text_lines, 'text_lines', list, str)
+        self.base_type_index = None
         if (not LootFilterRule.IsParsableAsRule(text_lines)):
             raise RuntimeError('given text_lines cannot be parsed as a LootFilterRule:\n'
                     '{}'.format(text_lines))
@@ -116,23 +145,43 @@ class LootFilterRule:
         tags = parse_helper.ParseTypeTierTags(self.rule_text_lines)
         self.type_tag, self.tier_tag = tags if (tags != None) else (None, None)
         self.ParseRuleTextLines()
+        self.is_dirty = False
         # Check if there are any unrecognized keywords
         for keyword, _ in self.parsed_lines_hll:
             if (keyword not in kAllRuleKeywords):
-                print('Warning: rule "$type->{} $tier->{}" encountered unrecognized keyword '
+                logger.Log('Warning: rule "$type->{} $tier->{}" encountered unrecognized keyword '
                         '"{}"'.format(self.type_tag, self.tier_tag, keyword))
     # End __init__
 
+    # Compiled conditions are functions, which cannot be pickled, so they are not stored
+    # (they are recompiled on first use after unpickling).  The BaseTypeIndex belongs to the
+    # owning LootFilter, and is rebuilt when needed, so it is not stored either.
+    def __getstate__(self):
+        state = {slot : getattr(self, slot) for slot in LootFilterRule.__slots__}
+        state['compiled_conditions'] = None
+        state['base_type_index'] = None
+        return state
+    # End __getstate__
+
+    def __setstate__(self, state):
+        for slot, value in state.items():
+            setattr(self, slot, value)
+    # End __setstate__
+
     # Call in constructor or when self.rule_text_lines changes.
     # Updates the rest of the member variables to be consistent with rule_text_lines.
     def ParseRuleTextLines(self):
-        # Generate self.parsed_lines_hll HashLinkedList
-        self.parsed_lines_hll = HashLinkedList()
+        self.is_dirty = True
+        self.compiled_conditions = None
+        # Generate self.parsed_lines_hll HashLinkedMultimap
+        self.parsed_lines_hll = HashLinkedMultimap()
         # We don't save the Show/Hide line in the hll, because it would add complexity to update
         for line in self.rule_text_lines[1:]:
             if (line == ''):
                 continue
             keyword, operator, values_list = parse_helper.ParseRuleLineGeneric(line)
+            if (keyword == 'BaseType'):
+                values_list = OrderedSet(values_list)
             self.parsed_lines_hll.append(keyword, (operator, values_list))
         # Parse rule visibility
         cleaned_show_hide_line = parse_helper.UncommentedLine(self.rule_text_lines[0]).strip()
@@ -149,18 +198,46 @@ class LootFilterRule:
             self.visibility = RuleVisibility.kDisabledShow
         elif (not is_show and not is_enabled):
             self.visibility = RuleVisibility.kDisabledHide
+        if (self.base_type_index != None):
+            self.base_type_index.UpdateRule(self)
     # End ParseTextLines
 
+    @property
+    def rule_text_lines(self) -> List[str]:
+        if (self.rule_text_lines_outdated):
+            self.GenerateRuleTextLines()
+        return self._rule_text_lines
+    # End rule_text_lines getter
+
+    @rule_text_lines.setter
+    def rule_text_lines(self, text_lines: List[str]):
+        self._rule_text_lines = text_lines
+        self.rule_text_lines_outdated = False
+    # End rule_text_lines setter
+
     # Call when a change is made to the object's state (other than rule_text_lines).
-    # Updates self.rule_text_lines to be consistent with the rest of the member variables.
+    # Marks self.rule_text_lines as outdated, so that they are regenerated to be consistent
+    # with the rest of the member variables the next time they are accessed.  This way,
+    # a sequence of modifications to a rule regenerates its text only once.
     def UpdateRuleTextLines(self):
-        self.rule_text_lines = []
+        global g_num_rule_modifications
+        g_num_rule_modifications += 1
+        self.is_dirty = True
+        self.compiled_conditions = None
+        self.rule_text_lines_outdated = True
+        if (self.base_type_index != None):
+            self.base_type_index.UpdateRule(self)
+    # End UpdateRuleTextLines
+
+    # Regenerates self.rule_text_lines from the rest of the member variables.
+    def GenerateRuleTextLines(self):
+        text_lines = []
         # The Show/Hide line is not in the hll, so we first add it directly
         tag_line = '# ' if RuleVisibility.IsDisabled(self.visibility) else ''
         tag_line += 'Show' if RuleVisibility.IsShow(self.visibility) else 'Hide'
         tag_line += ' # ' + kTypeIdentifier + self.type_tag
         tag_line += ' ' + kTierIdentifier + self.tier_tag
-        self.rule_text_lines.append(tag_line)
+        text_lines.append(tag_line)
         # Construct and append all lines from hll
         # If rule is Hide, disable beams, minimap icons, and drop sounds
         keywords_to_disable = (['PlayEffect', 'MinimapIcon', 'PlayAlertSound', 'CustomAlertSound']
@@ -174,7 +251,8 @@ class LootFilterRule:
             values_string = parse_helper.ConvertValuesListToString(values_list)
             if (values_string != ''):
                 line += ' ' + values_string
-            self.rule_text_lines.append(line)
+            text_lines.append(line)
+        self.rule_text_lines = text_lines
     # End GenerateRuleTextLines
 
     def __repr__(self):
@@ -244,62 +322,86 @@ class LootFilterRule:
                     '{}'.format(visibility))
     # End SetVisibility
 
-    def GetBaseTypeList(self) -> List[str]:
+    # Returns the set of BaseType names on this rule's BaseType line (empty if there is no
+    # BaseType line).  The returned OrderedSet is this rule's own BaseType set if the rule
+    # has a BaseType line, so callers should not modify it (use the functions below).
+    def GetBaseTypeList(self) -> OrderedSet:
         if ('BaseType' not in self.parsed_lines_hll):
-            return []
-        op, base_type_list = self.parsed_lines_hll['BaseType']
-        return base_type_list
+            return OrderedSet()
+        op, base_type_set = self.parsed_lines_hll['BaseType']
+        return base_type_set
     # End GetBaseTypeList
 
+    # Returns this rule's BaseType set, first adding an empty BaseType line if there is none.
+    def GetOrAddBaseTypeSet(self) -> OrderedSet:
+        if ('BaseType' not in self.parsed_lines_hll):
+            self.parsed_lines_hll.insert_first('BaseType', ('', OrderedSet()))
+        return self.GetBaseTypeList()
+    # End GetOrAddBaseTypeSet
+
     # Adds base_type_name to this rule's BaseType line, if it's not there already.
     # Does not enable the rule if it is disabled. Callers should call Enable() after
     # if they expect the rule to be enabled.
-    # Note: BaseType names are *not* quoted in base_type_list.
+    # Note: BaseType names are *not* quoted in the BaseType set (quotes are removed if given).
     def AddBaseType(self, base_type_name: str):
         CheckType(base_type_name, 'base_type_name', str)
-        if ('BaseType' not in self.parsed_lines_hll):
-            self.parsed_lines_hll.insert_at_index('BaseType', ('', []), index=0)
-        base_type_list = self.GetBaseTypeList()
-        if (base_type_name in base_type_list):
-            return
-        base_type_list.append(base_type_name)
-        self.UpdateRuleTextLines()
+        self.AddBaseTypes([base_type_name])
     # End AddBaseType
 
-    def AddBaseTypes(self, base_type_list: list):
-        CheckType(base_type_list, 'base_type_list', list, str)
-        for base_type_name in base_type_list:
-            self.AddBaseType(base_type_name)
+    # Adds all the given BaseType names (in order) that are not on the BaseType line already.
+    # Regenerates the rule text at most once.  Does not enable the rule if it is disabled.
+    def AddBaseTypes(self, base_type_names: List[str] or OrderedSet):
+        CheckType(base_type_names, 'base_type_names', (list, OrderedSet), str)
+        if (len(base_type_names) == 0):
+            return
+        base_type_set = self.GetOrAddBaseTypeSet()
+        if (base_type_set.insert_all([parse_helper.UnquotedString(base_type_name)
+                                      for base_type_name in base_type_names])):
+            self.UpdateRuleTextLines()
     # End AddBaseTypes
 
+    # Replaces the contents of this rule's BaseType line with the given BaseType names,
+    # adding a BaseType line if the rule does not have one.  Regenerates the rule text once.
+    # Does not enable or disable the rule: callers should ensure the rule is disabled if
+    # base_type_names is empty.
+    def SetBaseTypes(self, base_type_names: List[str] or OrderedSet):
+        CheckType(base_type_names, 'base_type_names', (list, OrderedSet), str)
+        base_type_set = self.GetOrAddBaseTypeSet()
+        base_type_set.clear()
+        base_type_set.insert_all([parse_helper.UnquotedString(base_type_name)
+                                  for base_type_name in base_type_names])
+        self.UpdateRuleTextLines()
+    # End SetBaseTypes
+
     # Removes base_type_name from this rule's BaseType line, if it's there.
     # Does nothing if given base_type_name is not present, or rule does not have a BaseType line.
     # If this results in an empty base type list, disables the rule (otherwise PoE generates error).
     def RemoveBaseType(self, base_type_name: str):
         CheckType(base_type_name, 'base_type_name', str)
+        self.RemoveBaseTypes([base_type_name])
+    # End RemoveBaseType
+
+    # Removes all the given BaseType names that are on this rule's BaseType line.
+    # Regenerates the rule text at most once.  If this results in an empty base type list,
+    # disables the rule (otherwise PoE generates error).
+    def RemoveBaseTypes(self, base_type_names: List[str] or OrderedSet):
+        CheckType(base_type_names, 'base_type_names', (list, OrderedSet), str)
         if ('BaseType' not in self.parsed_lines_hll):
             return
-        base_type_list = self.GetBaseTypeList()
-        quoted_base_type_name = '"' + base_type_name + '"'
-        # Check raw (unquoted) BaseType name
-        if (base_type_name in base_type_list):
-            base_type_list.remove(base_type_name)
-        # Check quoted BaseType name
-        elif (quoted_base_type_name in base_type_list):
-            base_type_list.remove(quoted_base_type_name)
-        else:
+        base_type_set = self.GetBaseTypeList()
+        removed_flags = [base_type_set.remove(parse_helper.UnquotedString(base_type_name))
+                         for base_type_name in base_type_names]
+        if (not any(removed_flags)):
             return
         # If we didn't return (i.e. made a change), check for empty BaseType list and update rules text
-        if (len(base_type_list) == 0):
+        if (len(base_type_set) == 0):
             self.Disable()
         self.UpdateRuleTextLines()
-    # End RemoveBaseType
+    # End RemoveBaseTypes
 
     # Note: This disables the rule, since an empty BaseType line generates an error in PoE.
     def ClearBaseTypeList(self):
-        base_type_list = self.GetBaseTypeList()
-        while (len(base_type_list) > 0):
-            self.RemoveBaseType(base_type_list[-1])
+        self.RemoveBaseTypes(list(self.GetBaseTypeList()))
     # End ClearBaseTypeList
 
     # Generates a list containing the elements of self.parsed_lines_hll to be used for
@@ -330,6 +432,8 @@ class LootFilterRule:
             return False
         new_values = (new_value_or_values if isinstance(new_value_or_values, list)
                 else [str(new_value_or_values)])
+        if (keyword == 'BaseType'):
+            new_values = OrderedSet(parse_helper.UnquotedString(value) for value in new_values)
         self.parsed_lines_hll[keyword] = (new_operator, new_values)
         self.UpdateRuleTextLines()
         return True
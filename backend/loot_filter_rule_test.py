@@ -123,6 +123,47 @@ def TestRemoveAllBaseTypes():
     AssertTrue(all(line.strip().startswith('#') for line in rule.rule_text_lines))
     print('TestRemoveAllBaseTypes passed!')
 
+# Bulk operations should give the same results as the corresponding one-at-a-time operations
+def TestBulkBaseTypeOperations():
+    added_base_types = ['Simulacrum Splinter', 'Splinter of Esh', '"Splinter of Tul"']
+    removed_base_types = ['Splinter of Chayula', '"Splinter of Uul-Netol"', 'Not a Splinter']
+    rule = LootFilterRule(kInputRuleText)
+    bulk_rule = LootFilterRule(kInputRuleText)
+    for base_type in added_base_types:
+        rule.AddBaseType(base_type)
+    bulk_rule.AddBaseTypes(added_base_types)
+    AssertEqual(bulk_rule.rule_text_lines, rule.rule_text_lines)
+    for base_type in removed_base_types:
+        rule.RemoveBaseType(base_type)
+    bulk_rule.RemoveBaseTypes(removed_base_types)
+    AssertEqual(bulk_rule.rule_text_lines, rule.rule_text_lines)
+    # Quotes are normalized: BaseType names are stored unquoted
+    AssertTrue('Splinter of Tul' in bulk_rule.GetBaseTypeList())
+    AssertFalse('Splinter of Uul-Netol' in bulk_rule.GetBaseTypeList())
+    # SetBaseTypes replaces the list, preserving the given order and dropping duplicates
+    bulk_rule.SetBaseTypes(['Splinter of Xoph', 'Splinter of Esh', 'Splinter of Xoph'])
+    AssertEqual(list(bulk_rule.GetBaseTypeList()), ['Splinter of Xoph', 'Splinter of Esh'])
+    AssertTrue('BaseType "Splinter of Xoph" "Splinter of Esh"' in bulk_rule.rule_text_lines)
+    print('TestBulkBaseTypeOperations passed!')
+
+# Rule text should only be regenerated when it is accessed after a modification
+def TestLazyTextRegeneration():
+    rule = LootFilterRule(kInputRuleText)
+    AssertFalse(rule.rule_text_lines_outdated)
+    rule.AddBaseType('Simulacrum Splinter')
+    rule.Hide()
+    rule.ModifyLine('StackSize', '>=', 3)
+    rule.SetTypeTierTags('currency->stackedsplinters', 't4')
+    AssertTrue(rule.rule_text_lines_outdated)
+    AssertTrue(rule.is_dirty)
+    text_lines = rule.GetTextLines()
+    AssertFalse(rule.rule_text_lines_outdated)
+    AssertTrue('Hide # $type->currency->stackedsplinters $tier->t4' in text_lines)
+    AssertTrue('StackSize >= 3' in text_lines)
+    # Regenerated text should parse back to the same rule
+    AssertEqual(LootFilterRule(text_lines).rule_text_lines, rule.rule_text_lines)
+    print('TestLazyTextRegeneration passed!')
+
 def TestChangeVisibility():
     rule = LootFilterRule(kInputRuleText)
     # Use Show/Hide/Disable funtions
@@ -203,6 +244,8 @@ def main():
     TestBasicRuleParse()
     TestAddRemoveBaseTypes()
     TestRemoveAllBaseTypes()
+    TestBulkBaseTypeOperations()
+    TestLazyTextRegeneration()
     TestChangeVisibility()
     TestChangeTags()
     TestModifyLine()
@@ -1,4 +1,4 @@
-from loot_filter import InputFilterSource, LootFilter
+from loot_filter import EncodeTextBlock, InputFilterSource, LootFilter
 from loot_filter_rule import RuleVisibility
 
 import filecmp
@@ -35,6 +35,87 @@ def TestParseWriteFilter():
     AssertTrue(num_output_filter_lines - num_input_filter_lines > 20)
     print('TestParseWriteFilter passed!')
 
+# Checks that the output filter contains exactly the text of all the blocks in loot_filter.
+def AssertOutputFilterMatches(loot_filter: LootFilter):
+    expected_bytes = b''.join(EncodeTextBlock(rule_or_text_block.GetTextLines())
+            for _, rule_or_text_block in loot_filter.rule_or_text_block_hll)
+    output_filter_fullpath = loot_filter.profile_obj.config_values['OutputLootFilterFullpath']
+    with open(output_filter_fullpath, 'rb') as output_file:
+        AssertEqual(output_file.read(), expected_bytes)
+
+# Rules are parsed only when accessed, and unparsed rules are saved unchanged.
+def TestLazyRuleParsing():
+    test_helper.SetUp()
+    LootFilter(test_consts.kTestProfileName, InputFilterSource.kDownload).SaveToFile()
+    loot_filter = LootFilter(test_consts.kTestProfileName, InputFilterSource.kOutput)
+    rule_blocks = [rule_or_text_block for _, rule_or_text_block
+                   in loot_filter.rule_or_text_block_hll if rule_or_text_block.is_rule]
+    num_parsed_rules = sum(rule_block.IsParsed() for rule_block in rule_blocks)
+    AssertTrue(num_parsed_rules < len(rule_blocks) // 10)
+    # Accessing a rule parses only that rule
+    type_tag, tier_tag = consts.kStackedCurrencyTags[1][0]
+    rule_block = loot_filter.rule_or_text_block_hll[(type_tag, tier_tag)]
+    AssertFalse(rule_block.IsParsed())
+    unparsed_text_lines = rule_block.GetTextLines()
+    rule = loot_filter.GetRule(type_tag, tier_tag)
+    AssertTrue(rule_block.IsParsed())
+    AssertEqual((rule.type_tag, rule.tier_tag), (type_tag, tier_tag))
+    AssertEqual(rule.GetTextLines(), unparsed_text_lines)
+    AssertEqual(sum(rule_block.IsParsed() for rule_block in rule_blocks), num_parsed_rules + 1)
+    loot_filter.SaveToFile()
+    AssertOutputFilterMatches(loot_filter)
+    print('TestLazyRuleParsing passed!')
+
+def TestIncrementalSave():
+    test_helper.SetUp()
+    LootFilter(test_consts.kTestProfileName, InputFilterSource.kDownload).SaveToFile()
+    loot_filter = LootFilter(test_consts.kTestProfileName, InputFilterSource.kOutput)
+    output_filter_fullpath = loot_filter.profile_obj.config_values['OutputLootFilterFullpath']
+    AssertTrue(loot_filter.output_filter_layout != None)
+    # No modifications: output filter is not rewritten
+    original_mtime_ns = os.stat(output_filter_fullpath).st_mtime_ns
+    loot_filter.SaveToFile()
+    AssertEqual(os.stat(output_filter_fullpath).st_mtime_ns, original_mtime_ns)
+    # Same-size modification: only the modified block is re-encoded
+    original_size = os.path.getsize(output_filter_fullpath)
+    type_tag, tier_tag = consts.kStackedCurrencyTags[1][0]
+    loot_filter.GetRule(type_tag, tier_tag).ModifyLine('StackSize', '>=', 3)
+    loot_filter.SaveToFile()
+    AssertOutputFilterMatches(loot_filter)
+    AssertEqual(os.path.getsize(output_filter_fullpath), original_size)
+    # Size-changing modifications: blocks after the first modified block move
+    loot_filter.SetGemMinQuality(19)
+    loot_filter.SetCurrencyToTier('Chromatic Orb', 1)
+    loot_filter.SetHideMapsBelowTierTier(14)
+    loot_filter.SaveToFile()
+    AssertOutputFilterMatches(loot_filter)
+    AssertTrue(not any(rule_or_text_block.IsDirty()
+            for _, rule_or_text_block in loot_filter.rule_or_text_block_hll))
+    # Structure change: full rewrite
+    loot_filter.AddSocketRule('r-g-b', 'Gloves')
+    loot_filter.SaveToFile()
+    AssertOutputFilterMatches(loot_filter)
+    # External modification: full rewrite
+    file_helper.AppendToFile('# External comment\n', output_filter_fullpath)
+    loot_filter.SetGemMinQuality(12)
+    loot_filter.SaveToFile()
+    AssertOutputFilterMatches(loot_filter)
+    # Reloaded filter should match in-memory filter
+    reloaded_loot_filter = LootFilter(test_consts.kTestProfileName, InputFilterSource.kOutput)
+    AssertEqual(reloaded_loot_filter.GetGemMinQuality(), 12)
+    AssertEqual(reloaded_loot_filter.GetTierOfCurrency('Chromatic Orb'), 1)
+    AssertEqual(reloaded_loot_filter.GetHideMapsBelowTierTier(), 14)
+    AssertOutputFilterMatches(reloaded_loot_filter)
+    # Output filter not exactly as SaveToFile would write it: layout unknown after parsing
+    file_helper.AppendToFile('# External comment', output_filter_fullpath)
+    reparsed_loot_filter = LootFilter(test_consts.kTestProfileName, InputFilterSource.kOutput)
+    AssertEqual(reparsed_loot_filter.output_filter_layout, None)
+    reparsed_loot_filter.SetGemMinQuality(13)
+    reparsed_loot_filter.SaveToFile()
+    AssertOutputFilterMatches(reparsed_loot_filter)
+    AssertTrue(reparsed_loot_filter.output_filter_layout != None)
+    print('TestIncrementalSave passed!')
+
 # TODO: check rules with DLF tags all exist
 def TestAddDlfRules():
     print('TestAddDlfRules TODO!')
@@ -197,6 +278,93 @@ def TestCurrencyTiers():
         AssertFalse(currency_base_type in rule.GetBaseTypeList())
     print('TestCurrencyTiers passed!')
 
+# SetCurrenciesToTiers should have exactly the same effect as sequential SetCurrencyToTier calls
+def TestSetCurrenciesToTiers():
+    test_helper.SetUp()
+    currency_tier_pairs = [('Chromatic Orb', 2), ('Orb of Fusing', 1), ('Chromatic Orb', 5),
+                           ('Nonexistent Orb', 3), ('Orb of Alchemy', 0), ('Orb of Alchemy', 99)]
+    # Move all tier 1 currency out of tier 1 (disabling its rules), then move one back
+    currency_tier_pairs += [(currency_name, 3) for currency_name in kT1CurrencyBaseTypeList]
+    currency_tier_pairs += [('Mirror Shard', 1), ('Chromatic Orb', 5)]
+    # Quoted currency names are moved out of their original tier as well
+    currency_tier_pairs += [('"Vaal Orb"', 2)]
+    sequential_loot_filter = LootFilter(test_consts.kTestProfileName, InputFilterSource.kDownload)
+    for currency_name, target_tier in currency_tier_pairs:
+        sequential_loot_filter.SetCurrencyToTier(currency_name, target_tier)
+    batch_loot_filter = LootFilter(test_consts.kTestProfileName, InputFilterSource.kInput)
+    batch_loot_filter.SetCurrenciesToTiers(currency_tier_pairs)
+    for tier, tags_map in consts.kUnifiedCurrencyTags.items():
+        for tags in tags_map.values():
+            sequential_rule = sequential_loot_filter.GetRule(*tags)
+            batch_rule = batch_loot_filter.GetRule(*tags)
+            AssertEqual(batch_rule.rule_text_lines, sequential_rule.rule_text_lines)
+            AssertEqual(batch_rule.visibility, sequential_rule.visibility)
+            AssertEqual(batch_rule.is_dirty, sequential_rule.is_dirty)
+    AssertTrue(RuleVisibility.IsEnabled(batch_loot_filter.GetRule(
+            *consts.kUnifiedCurrencyTags[1][1]).visibility))
+    AssertEqual(batch_loot_filter.GetAllCurrencyInTier(1), ['Orb of Fusing', 'Mirror Shard'])
+    AssertEqual([tier for tier in range(1, consts.kNumCurrencyTiersIncludingScrolls + 1)
+                 if 'Vaal Orb' in batch_loot_filter.GetAllCurrencyInTier(tier)], [2])
+    AssertEqual(batch_loot_filter.GetTierOfCurrency('"Vaal Orb"'), 2)
+    print('TestSetCurrenciesToTiers passed!')
+
+# Returns a dict mapping each BaseType to the sorted keys of the rules containing it,
+# computed by checking every rule of the filter.
+def GetRuleKeysByBaseTypeLinear(loot_filter: LootFilter) -> dict:
+    rule_keys_map = {}
+    for _, rule_or_text_block in loot_filter.rule_or_text_block_hll:
+        if (rule_or_text_block.is_rule):
+            rule = rule_or_text_block.rule
+            for base_type in rule.GetBaseTypeList():
+                rule_keys_map.setdefault(base_type, set()).add((rule.type_tag, rule.tier_tag))
+    return {base_type : sorted(rule_keys) for base_type, rule_keys in rule_keys_map.items()}
+# End GetRuleKeysByBaseTypeLinear
+
+def AssertBaseTypeIndexCorrect(loot_filter: LootFilter):
+    expected_rule_keys_map = GetRuleKeysByBaseTypeLinear(loot_filter)
+    for base_type, expected_rule_keys in expected_rule_keys_map.items():
+        AssertEqual(sorted(loot_filter.GetRuleKeysWithBaseType(base_type)), expected_rule_keys)
+    AssertEqual(len(loot_filter.GetBaseTypeIndex().rule_keys_map), len(expected_rule_keys_map))
+# End AssertBaseTypeIndexCorrect
+
+# The BaseType index should stay consistent with the rules as they are modified
+def TestBaseTypeIndex():
+    test_helper.SetUp()
+    loot_filter = LootFilter(test_consts.kTestProfileName, InputFilterSource.kDownload)
+    AssertBaseTypeIndexCorrect(loot_filter)
+    AssertEqual(loot_filter.GetRuleKeysWithBaseType('Not a BaseType'), [])
+    # Modify rules in place
+    loot_filter.SetCurrencyToTier('Chromatic Orb', 2)
+    loot_filter.SetCurrenciesToTiers(
+            [(currency_name, 3) for currency_name in kT1CurrencyBaseTypeList])
+    loot_filter.SetFlaskRuleEnabledFor(
+            'Quicksilver Flask', enable_flag=True, high_ilvl_only_flag=False)
+    loot_filter.SetSplinterMinVisibleStackSize('Splinter of Esh', 4)
+    AssertEqual(loot_filter.GetTierOfCurrency('Chromatic Orb'), 2)
+    AssertEqual(loot_filter.GetTierOfCurrency('Mirror Shard'), 3)
+    AssertBaseTypeIndexCorrect(loot_filter)
+    # Add rules to the filter
+    loot_filter.AddBaseTypeRule('Hubris Circlet', True, 84, 100)
+    AssertBaseTypeIndexCorrect(loot_filter)
+    # Lookups in known rules neither build the index nor parse rules, building the index
+    # does not parse rules, and rules parsed and modified afterwards keep the index up to date
+    loot_filter.SaveToFile()
+    loot_filter = LootFilter(test_consts.kTestProfileName, InputFilterSource.kOutput)
+    rule_blocks = [rule_or_text_block for _, rule_or_text_block
+                   in loot_filter.rule_or_text_block_hll if rule_or_text_block.is_rule]
+    num_parsed_rules = sum(rule_block.IsParsed() for rule_block in rule_blocks)
+    AssertEqual(loot_filter.GetTierOfCurrency('Chromatic Orb'), 2)
+    AssertEqual(loot_filter.GetSplinterMinVisibleStackSize('Splinter of Esh'), 4)
+    AssertEqual(loot_filter.base_type_index, None)
+    loot_filter.GetBaseTypeIndex()
+    AssertEqual(sum(rule_block.IsParsed() for rule_block in rule_blocks), num_parsed_rules)
+    loot_filter.SetCurrencyToTier('Chromatic Orb', 5)
+    loot_filter.SetSplinterMinVisibleStackSize('Splinter of Esh', 2)
+    AssertEqual(loot_filter.GetTierOfCurrency('Chromatic Orb'), 5)
+    AssertEqual(loot_filter.GetSplinterMinVisibleStackSize('Splinter of Esh'), 2)
+    AssertBaseTypeIndexCorrect(loot_filter)
+    print('TestBaseTypeIndex passed!')
+
 def TestCurrencyStackSizeVisibility():
     test_helper.SetUp()
     loot_filter = LootFilter(test_consts.kTestProfileName, InputFilterSource.kDownload)
@@ -421,6 +589,8 @@ def TestImportNonFilterBladeFilter():
 
 def main():
     TestParseWriteFilter()
+    TestIncrementalSave()
+    TestLazyRuleParsing()
     TestAddDlfHeader()
     TestAddDlfRules()
     TestHideMapsBelowTier()
@@ -430,6 +600,8 @@ def main():
     TestStandardizeCurrencyTiers()
     TestApplyDlfCurrencyStackSizes()
     TestCurrencyTiers()
+    TestSetCurrenciesToTiers()
+    TestBaseTypeIndex()
     TestCurrencyStackSizeVisibility()
     TestSplinters()
     TestEssences()
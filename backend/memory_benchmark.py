@@ -0,0 +1,55 @@
+'''
+This script measures the memory used by a fully parsed filter: every block of the test filter
+is added to a HashLinkedList of RuleOrTextBlocks, and every rule is parsed into a
+LootFilterRule (as if each rule had been accessed after loading the filter).
+
+Reports the retained memory per rule and the parse time.
+
+Usage: python memory_benchmark.py
+'''
+
+import time
+import tracemalloc
+
+import file_helper
+from hash_linked_list import HashLinkedList
+from loot_filter import ClassifyBlock, RuleOrTextBlock
+import test_consts
+
+# Returns the HashLinkedList of RuleOrTextBlocks of the given filter, with all rules parsed
+def ParseFilterFully(filter_fullpath: str) -> HashLinkedList:
+    rule_or_text_block_hll = HashLinkedList()
+    for i, block in enumerate(file_helper.IterBlocks(filter_fullpath)):
+        is_rule, _ = ClassifyBlock(block)
+        rule_or_text_block = RuleOrTextBlock(block, is_rule=is_rule)
+        if (is_rule):
+            rule_or_text_block.rule  # parses the rule
+        rule_or_text_block_hll.append(i, rule_or_text_block)
+    return rule_or_text_block_hll
+# End ParseFilterFully
+
+def main():
+    filter_fullpath = test_consts.kTestBaseFilterFullpath
+    # Warm up (e.g. compiled templates and regular expressions), then measure memory
+    ParseFilterFully(filter_fullpath)
+    tracemalloc.start()
+    rule_or_text_block_hll = ParseFilterFully(filter_fullpath)
+    retained_bytes, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    num_rules = sum(rule_or_text_block.is_rule for _, rule_or_text_block in rule_or_text_block_hll)
+    # Measure time without tracemalloc overhead
+    parse_times = []
+    for _ in range(5):
+        start_time = time.perf_counter()
+        ParseFilterFully(filter_fullpath)
+        parse_times.append(time.perf_counter() - start_time)
+    print('Filter: {}'.format(filter_fullpath))
+    print('Rules: {}'.format(num_rules))
+    print('Retained memory: {:.0f} bytes per rule ({:.2f} MB total, {:.2f} MB peak)'.format(
+            retained_bytes / num_rules, retained_bytes / 1e6, peak_bytes / 1e6))
+    print('Full parse time: {:.1f} ms (best of {})'.format(
+            min(parse_times) * 1000, len(parse_times)))
+# End main
+
+if (__name__ == '__main__'):
+    main()
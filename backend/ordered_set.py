@@ -0,0 +1,61 @@
+'''
+Defines a very simple insertion-ordered set class for Python 3.
+'''
+
+class OrderedSet:
+    '''
+    Stores the given values in a dictionary mapping each value to None.  Since Python
+    dictionaries preserve insertion order, iterating over the set always lists the values
+    in the order they were first inserted (among those not since removed).
+
+    Member variables:
+     - self.value_dict: dict mapping value to None
+    '''
+
+    def __init__(self, iterable_container=()):
+        self.value_dict = dict.fromkeys(iterable_container)
+
+    # Inserts the given value at the end of the set if it is not already in the set.
+    # Returns True if the value was inserted, False otherwise.
+    def insert(self, value) -> bool:
+        if (value in self.value_dict):
+            return False
+        self.value_dict[value] = None
+        return True
+
+    # Inserts each of the given values that is not already in the set, in order.
+    # Returns True if any value was inserted, False otherwise.
+    def insert_all(self, iterable_container) -> bool:
+        original_size = len(self.value_dict)
+        for value in iterable_container:
+            self.value_dict.setdefault(value, None)
+        return len(self.value_dict) > original_size
+
+    # Removes the given value, if it exists in the set.
+    # Returns True if the value was removed, False otherwise.
+    def remove(self, value) -> bool:
+        if (value not in self.value_dict):
+            return False
+        del self.value_dict[value]
+        return True
+
+    def clear(self):
+        self.value_dict.clear()
+
+    # Note: order is not considered when comparing sets
+    def __eq__(self, other):
+        if isinstance(other, OrderedSet):
+            return self.value_dict.keys() == other.value_dict.keys()
+        return False
+
+    def __contains__(self, value):
+        return value in self.value_dict
+
+    def __len__(self):
+        return len(self.value_dict)
+
+    def __iter__(self):
+        return iter(self.value_dict)
+
+    def __repr__(self):
+        return 'OrderedSet({})'.format(list(self.value_dict))
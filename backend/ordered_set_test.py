@@ -0,0 +1,41 @@
+from ordered_set import OrderedSet
+
+from test_assertions import AssertEqual, AssertTrue, AssertFalse
+
+def TestInsertRemoveContains():
+    s = OrderedSet(['b', 'a', 'c', 'a'])
+    AssertEqual(list(s), ['b', 'a', 'c'])
+    AssertFalse(s.insert('a'))
+    AssertTrue(s.insert('d'))
+    AssertTrue(s.remove('b'))
+    AssertFalse(s.remove('b'))
+    AssertEqual(list(s), ['a', 'c', 'd'])
+    AssertTrue('c' in s)
+    AssertFalse('b' in s)
+    AssertEqual(len(s), 3)
+    AssertFalse(s.insert_all(['c', 'd']))
+    AssertTrue(s.insert_all(['e', 'c', 'b']))
+    AssertEqual(list(s), ['a', 'c', 'd', 'e', 'b'])
+    s.clear()
+    AssertEqual(len(s), 0)
+    print('TestInsertRemoveContains passed!')
+
+# Re-inserting a removed value should place it at the end of the iteration order,
+# and equality should not depend on order.
+def TestOrderAndEquality():
+    s = OrderedSet(range(5))
+    s.remove(2)
+    s.insert(2)
+    AssertEqual(list(s), [0, 1, 3, 4, 2])
+    AssertEqual(s, OrderedSet(range(5)))
+    AssertFalse(s == OrderedSet(range(4)))
+    AssertFalse(s == list(range(5)))
+    print('TestOrderAndEquality passed!')
+
+def main():
+    TestInsertRemoveContains()
+    TestOrderAndEquality()
+    print('All tests passed!')
+
+if (__name__ == '__main__'):
+    main()
@@ -5,6 +5,7 @@ General parsing functions:
  - FindFirstMatchingPredicate(s: str, predicate) -> int
  - MakeUniqueId(new_id: str, used_ids) -> str
  - ParseNumberFromString(input_string: str, starting_index: int = 0) -> int
+ - SeedInternedStrings(strings: Iterable[str])
 
 Loot filter related functions:
  - CommentedLine(line: str)
@@ -16,11 +17,13 @@ Loot filter related functions:
  - ParseRuleLineGeneric(line: str) -> Tuple[str, str, List[str]]
  - ParseTypeTierTags(rule_text_lines: List[str]) -> Tuple(str, str)
  - ConvertValuesStringToList(values_string: str) -> List[str]
+ - UnquotedString(s: str) -> str
  - ConvertValuesListToString(values_list: List[str]) -> str
 '''
 
 import re
-from typing import List, Tuple
+import sys
+from typing import Iterable, List, Tuple
 
 import consts
 import simple_parser
@@ -28,6 +31,18 @@ from type_checker import CheckType
 
 kShowHideLinePattern = re.compile(r'^\s*#?\s*(Show|Hide)')
 
+# Rule keywords, operators, and many values (e.g. "Stackable Currency") repeat thousands of times
+# across a filter, so the strings parsed from rule lines are interned (see sys.intern):
+# duplicates share a single object, and dict lookups and comparisons between them take the
+# identity fast path.  Interning a string before any equal string is parsed (seeding) makes
+# that string the shared object, e.g. the kOperatorMap keys are seeded below.
+def SeedInternedStrings(strings: Iterable[str]):
+    for s in strings:
+        sys.intern(s)
+# End SeedInternedStrings
+
+SeedInternedStrings(consts.kOperatorMap)
+
 # ========================== Generic Helper Methods ==========================
 
 # Returns the index of the element in the collection if present,
@@ -172,15 +187,16 @@ def ParseRuleLineGeneric(line: str) -> Tuple[str, str, List[str]]:
     line = UncommentedLine(line).strip()
     # Split into keyword, (optional) op_string, values_string
     if (' ' not in line):
-        keyword = line
+        keyword = sys.intern(line)
         return keyword, '', []
     keyword, op_and_values = line.split(' ', maxsplit=1)
+    keyword = sys.intern(keyword)
     op_string = ''
     values_string = ''
     # Parse and update op_string if input line contains an operator
     split_result = op_and_values.split(' ', maxsplit=1)
     if (split_result[0] in consts.kOperatorMap):
-        op_string = split_result[0]
+        op_string = sys.intern(split_result[0])
         if (len(split_result) > 1):
             values_string = split_result[1]
     else:  # no operator
@@ -197,18 +213,29 @@ def ParseTypeTierTags(rule_text_lines: List[str]) -> Tuple[str, str]:
     tag_line = rule_text_lines[tag_line_index]
     success, tag_list = simple_parser.ParseFromTemplate(
         tag_line + ' ', template='{~}$type->{} $tier->{} {~}')
-    return tuple(tag_list) if success else None
+    return tuple(sys.intern(tag) for tag in tag_list) if success else None
 # End ParseTypeTierTags
 
 # Convert a string of values to a list of strings.  For example:
 #  - '"Orb of Chaos" "Orb of Alchemy"' -> ['Orb of Chaos', 'Orb of Alchemy']
 #  - 'Boots Gloves Helmets "Body Armours"' -> ['Boots', 'Gloves', 'Helmets', "Body Armours"]
 #  - '"Alteration.mp3" 300' -> ['Alteration.mp3', '300']
+# The values are interned (see SeedInternedStrings).
 def ConvertValuesStringToList(values_string: str) -> List[str]:
     CheckType(values_string, 'values_string', str)
-    return simple_parser.ParseEnclosedByOrSplitBy(values_string, '"', ' ')
+    return [sys.intern(value)
+            for value in simple_parser.ParseEnclosedByOrSplitBy(values_string, '"', ' ')]
 # End ConvertValuesStringToList
 
+# Returns s without its enclosing double quotes, if it has them.  Otherwise, returns s.
+# (Values parsed by ConvertValuesStringToList never have enclosing quotes.)
+def UnquotedString(s: str) -> str:
+    CheckType(s, 's', str)
+    if ((len(s) >= 2) and s.startswith('"') and s.endswith('"')):
+        return s[1:-1]
+    return s
+# End UnquotedString
+
 # Returns double-quoted string if s contrains any of period, single quote, or space.
 # Otherwise, returns s.
 def QuoteStringIfRequired(s: str) -> str:
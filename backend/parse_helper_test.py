@@ -88,10 +88,26 @@ def TestParseRuleLineGeneric():
     AssertEqual(parse_helper.ParseRuleLineGeneric(rule_line), expected_parse_result)
     print('TestParseRuleLineGeneric passed!')
 
+# Equal keywords, operators and values parsed from different lines are the same objects
+def TestParsedStringsInterned():
+    # Build the lines at runtime, so their substrings are not shared constants
+    rule_lines = [' '.join(['Class', '>' + '=', '"Stackable' + ' Currency"', 'Maps'])
+                  for i in range(2)]
+    (keyword1, op1, values1), (keyword2, op2, values2) = (
+            parse_helper.ParseRuleLineGeneric(rule_line) for rule_line in rule_lines)
+    AssertEqual((keyword1, op1, values1), ('Class', '>=', ['Stackable Currency', 'Maps']))
+    AssertTrue(keyword1 is keyword2)
+    AssertTrue(all(value1 is value2 for value1, value2 in zip(values1, values2)))
+    # Operators are the keys of kOperatorMap
+    AssertTrue(op1 is op2)
+    AssertTrue(op1 is next(op for op in consts.kOperatorMap if op == '>='))
+    print('TestParsedStringsInterned passed!')
+
 def main():
     TestIsSubstringInLines()
     TestFindShowHideLineIndex()
     TestParseRuleLineGeneric()
+    TestParsedStringsInterned()
     print('All tests passed!')
 
 if (__name__ == '__main__'):
@@ -3,6 +3,7 @@ Auxiliary free functions:
  - GetProfileConfigFullpath(profile_name: str) -> str
  - GetProfileChangesFullpath(profile_name: str) -> str
  - GetProfileRulesFullpath(profile_name: str) -> str
+ - GetProfileChangesCompactedSizeFullpath(profile_name: str) -> str
  - ListProfilesRaw() -> List[str]
  - ProfileExists(profile_name: str) -> bool
  - GetActiveProfileName() -> str
@@ -28,6 +29,7 @@ from typing import Any, List, Tuple
 
 from consts import kProfileDirectory
 import file_helper
+import filter_snapshot
 from general_config import GeneralConfig, GeneralConfigKeywords, kGeneralConfigPath
 import simple_parser
 from type_checker import CheckType
@@ -44,6 +46,11 @@ def GetProfileRulesFullpath(profile_name: str) -> str:
     return os.path.join(kProfileDirectory, profile_name + '.rules')
 # End GetProfileRulesFullpath
 
+# Records the size of the profile's changes file after its last compaction (see profile_changes.py)
+def GetProfileChangesCompactedSizeFullpath(profile_name: str) -> str:
+    return os.path.join(kProfileDirectory, profile_name + '.changes_compacted_size')
+# End GetProfileChangesCompactedSizeFullpath
+
 # Returns a list of profile names as defined by:
 #  - files of extensions 'config' whose name is not 'general.config'
 # Does not perform any additional validation or modification of general.config.
@@ -347,6 +354,7 @@ def RenameProfile(original_profile_name: str, new_profile_name: str):
             source_path = os.path.join(kProfileDirectory, filename)
             target_path = os.path.join(kProfileDirectory, new_profile_name + extension)
             file_helper.MoveFile(source_path, target_path)
+    filter_snapshot.RemoveSnapshot(original_profile_name)
 # End RenameProfile
 
 # Raises an error if the profile does not exist.
@@ -358,6 +366,7 @@ def DeleteProfile(profile_name: str):
     for filepath in file_helper.ListFilesInDirectory(kProfileDirectory, fullpath=True):
         if (file_helper.FilenameWithoutExtension(filepath) == profile_name):
             os.remove(filepath)
+    filter_snapshot.RemoveSnapshot(profile_name)
     # Update general.config if we deleted the active profile
     if (GetActiveProfileName() == profile_name):
         # A little hacky, since GetAllProfileNames enforces the consistency
@@ -1,12 +1,31 @@
+'''
+A profile's .changes file records the mutator function calls applied to its filter, which are
+re-applied when the filter is imported or reloaded.
+
+The .changes file is an append-only journal: AddChangeToProfile appends each new function call.
+CompactProfileChanges rewrites the journal without the function calls rendered obsolete by later
+ones (see AddFunctionCallTokensToChangesDict).  Compaction happens on filter import/reload,
+where changes are applied as given by GetCompactedProfileChanges, and whenever the journal grows
+past its compaction threshold (see GetCompactionThresholdSize).
+'''
+
 from collections import OrderedDict
+import os.path
 import shlex
 from typing import List
 
 from backend_cli_function_info import kFunctionInfoMap
 import file_helper
+import logger
 import profile
 from type_checker import CheckType
 
+# Size in bytes of a .changes file below which AddChangeToProfile never compacts it
+kCompactionThresholdSize = 64 * 1024
+# Otherwise, AddChangeToProfile compacts a .changes file once it has grown to more than
+# kCompactionGrowthFactor times its size after the previous compaction
+kCompactionGrowthFactor = 2
+
 # ============================= Helper Functions =============================
 
 # Encloses the string in double quotes if it contains a space or single quote, otherwise just
@@ -57,14 +76,26 @@ def AddFunctionCallStringToChangesDict(function_call_string: str, changes_dict:
     AddFunctionCallTokensToChangesDict(shlex.split(function_call_string), changes_dict)
 # End AddFunctionCallStringToChangesDict
 
+# Returns a chain of OrderedDicts representing the given function call strings.
+# Lines that are not valid mutator function calls are logged and skipped.
+def ParseChangesLines(changes_lines: List[str]) -> OrderedDict:
+    CheckType(changes_lines, 'changes_lines', list, str)
+    changes_dict = OrderedDict()
+    for function_call_string in changes_lines:
+        if (function_call_string.strip() == ''):
+            continue
+        try:
+            AddFunctionCallStringToChangesDict(function_call_string, changes_dict)
+        except (ValueError, IndexError, KeyError):
+            logger.Log('Warning: invalid change skipped: {}'.format(function_call_string))
+    return changes_dict
+# End ParseChangesLines
+
 # Returns a chain of OrderedDicts representing the given profile's changes file
 def ParseProfileChanges(profile_name) -> OrderedDict:
-    changes_dict = OrderedDict()
     changes_lines = file_helper.ReadFile(profile.GetProfileChangesFullpath(profile_name),
                                          strip=True, discard_empty_lines=True)
-    for function_call_string in changes_lines:
-        AddFunctionCallStringToChangesDict(function_call_string, changes_dict)
-    return changes_dict
+    return ParseChangesLines(changes_lines)
 # End ParseProfileChanges
 
 # Returns list of lists of function tokens, for example:
@@ -98,19 +129,58 @@ def ConvertChangesDictToFunctionCallStringList(changes_dict: OrderedDict) -> Lis
     return function_list
 # End ConvertChangesDictToFunctionList
 
-# Adds the given change to the given profile's changes file, removing any previous changes that this
-# function call renders obselete.
+# Returns the given profile's changes as a list of function call strings,
+# with all changes rendered obsolete by later changes removed.
+# This is exactly the list of changes the changes file would contain if it had been compacted
+# after every change, so changes should always be applied in this order.
+def GetCompactedProfileChanges(profile_name: str) -> List[str]:
+    CheckType(profile_name, 'profile_name', str)
+    return ConvertChangesDictToFunctionCallStringList(ParseProfileChanges(profile_name))
+# End GetCompactedProfileChanges
+
+# Rewrites the given profile's changes file, removing all changes rendered obsolete by later changes.
+def CompactProfileChanges(profile_name: str):
+    CheckType(profile_name, 'profile_name', str)
+    file_helper.AtomicWriteToFile(GetCompactedProfileChanges(profile_name),
+            profile.GetProfileChangesFullpath(profile_name), fsync_flag=True)
+    RecordCompactedSize(profile_name)
+# End CompactProfileChanges
+
+# Call after the given profile's changes file has been compacted (or otherwise rewritten
+# without obsolete changes): records its current size for GetCompactionThresholdSize.
+def RecordCompactedSize(profile_name: str):
+    CheckType(profile_name, 'profile_name', str)
+    compacted_size = os.path.getsize(profile.GetProfileChangesFullpath(profile_name))
+    file_helper.AtomicWriteToFile(str(compacted_size),
+            profile.GetProfileChangesCompactedSizeFullpath(profile_name))
+# End RecordCompactedSize
+
+# Returns the size in bytes above which AddChangeToProfile compacts the given profile's changes
+# file.  Relative to the size after the previous compaction, so that a compacted changes file
+# larger than kCompactionThresholdSize is not re-compacted on every change: this keeps the
+# cost of compaction amortized O(1) per change.
+def GetCompactionThresholdSize(profile_name: str) -> int:
+    CheckType(profile_name, 'profile_name', str)
+    compacted_size = 0  # unknown (e.g. never compacted): use kCompactionThresholdSize
+    try:
+        with open(profile.GetProfileChangesCompactedSizeFullpath(profile_name)) as size_file:
+            compacted_size = int(size_file.read())
+    except (OSError, ValueError):
+        pass
+    return max(kCompactionThresholdSize, kCompactionGrowthFactor * compacted_size)
+# End GetCompactionThresholdSize
+
+# Appends the given change to the given profile's changes file.
+# Compacts the changes file if it has grown larger than its compaction threshold.
 def AddChangeToProfile(new_function_name: str,
                            new_function_params: List[str],
                            profile_name: str,):
     CheckType(new_function_name, 'new_function_name', str)
     CheckType(new_function_params, 'new_function_params', list, str)
     CheckType(profile_name, 'profile_name', str)
-    # Generate changes_dict by parsing changes file and adding new function call
     changes_path = profile.GetProfileChangesFullpath(profile_name)
-    changes_dict = ParseProfileChanges(profile_name)
-    AddFunctionCallTokensToChangesDict([new_function_name] + new_function_params, changes_dict)
-    # Write changes_dict to changes file
-    changes_list = ConvertChangesDictToFunctionCallStringList(changes_dict)
-    file_helper.WriteToFile(changes_list, changes_path)
+    file_helper.AppendLineToFile(JoinParamsDoubleQuotes([new_function_name] + new_function_params),
+            changes_path, fsync_flag=True)
+    if (os.path.getsize(changes_path) > GetCompactionThresholdSize(profile_name)):
+        CompactProfileChanges(profile_name)
 # End AddChangeToProfile
@@ -1,6 +1,7 @@
 import profile_changes
 
 from collections import OrderedDict
+import os.path
 import shlex
 from typing import List
 
@@ -8,7 +9,7 @@ import file_helper
 import profile
 import test_consts
 import test_helper
-from test_assertions import AssertEqual, AssertFailure
+from test_assertions import AssertEqual, AssertTrue, AssertFailure
 from type_checker import CheckType
 
 kProfileChangesTestCaseInput = [
@@ -138,6 +139,90 @@ def TestAddChangeToChangesFile():
     AssertEqual(parsed_changes_dict, expected_changes_dict)
     print('TestAddChangeToChangesFile passed!')
 
+kJournalTestCaseInput = [
+    'set_currency_to_tier "Chromatic Orb" 5',
+    'set_hide_maps_below_tier 11',
+    'set_currency_to_tier "Orb of Alchemy" 3',
+    'set_currency_to_tier "Chromatic Orb" 6',
+    'set_hide_maps_below_tier 16',
+    'set_flask_visibility "Divine Life Flask" 1 1']
+
+kJournalTestCaseFinal = [
+    'set_currency_to_tier "Chromatic Orb" 6',
+    'set_currency_to_tier "Orb of Alchemy" 3',
+    'set_hide_maps_below_tier 16',
+    'set_flask_visibility "Divine Life Flask" 1 1']
+
+# Tests that changes are appended to the changes file, and removed when obsolete by compaction
+def TestChangesJournal():
+    test_helper.SetUp()
+    changes_path = profile.GetProfileChangesFullpath(test_consts.kTestProfileName)
+    for function_call_string in kJournalTestCaseInput:
+        function_name, *function_params = shlex.split(function_call_string)
+        profile_changes.AddChangeToProfile(
+                function_name, function_params, test_consts.kTestProfileName)
+    AssertEqual(file_helper.ReadFile(changes_path, strip=True, discard_empty_lines=True),
+                kJournalTestCaseInput)
+    AssertEqual(profile_changes.GetCompactedProfileChanges(test_consts.kTestProfileName),
+                kJournalTestCaseFinal)
+    # Invalid lines are skipped by compaction
+    file_helper.AppendToFile('\nnot_a_function 1\nset_hide_maps_below_tier "13', changes_path)
+    profile_changes.CompactProfileChanges(test_consts.kTestProfileName)
+    AssertEqual(file_helper.ReadFile(changes_path, strip=True, discard_empty_lines=True),
+                kJournalTestCaseFinal)
+    # Appending past the size threshold triggers compaction
+    threshold_size = profile_changes.kCompactionThresholdSize
+    growth_factor = profile_changes.kCompactionGrowthFactor
+    profile_changes.kCompactionThresholdSize = 0
+    profile_changes.kCompactionGrowthFactor = 0
+    profile_changes.AddChangeToProfile('set_currency_to_tier', ['Chromatic Orb', '2'],
+            test_consts.kTestProfileName)
+    profile_changes.kCompactionThresholdSize = threshold_size
+    profile_changes.kCompactionGrowthFactor = growth_factor
+    AssertEqual(file_helper.ReadFile(changes_path, strip=True, discard_empty_lines=True),
+                ['set_currency_to_tier "Chromatic Orb" 2'] + kJournalTestCaseFinal[1:])
+    print('TestChangesJournal passed!')
+
+# Tests that a compacted changes file larger than kCompactionThresholdSize is only compacted
+# again once it has grown by kCompactionGrowthFactor, not on every change
+def TestLargeChangesJournal():
+    test_helper.SetUp()
+    changes_path = profile.GetProfileChangesFullpath(test_consts.kTestProfileName)
+    # Incompressible: every change is to a different currency
+    changes_lines = []
+    num_changes = 0
+    while (len('\n'.join(changes_lines)) <= profile_changes.kCompactionThresholdSize):
+        changes_lines.append('set_currency_to_tier "Currency {}" 3'.format(num_changes))
+        num_changes += 1
+    file_helper.WriteToFile(changes_lines, changes_path)
+    profile_changes.CompactProfileChanges(test_consts.kTestProfileName)
+    compacted_size = os.path.getsize(changes_path)
+    AssertTrue(compacted_size > profile_changes.kCompactionThresholdSize)
+    # Count compactions performed by AddChangeToProfile
+    num_compactions = 0
+    compact_profile_changes_function = profile_changes.CompactProfileChanges
+    def CountingCompactProfileChanges(profile_name: str):
+        nonlocal num_compactions
+        num_compactions += 1
+        compact_profile_changes_function(profile_name)
+    profile_changes.CompactProfileChanges = CountingCompactProfileChanges
+    try:
+        for i in range(20):
+            profile_changes.AddChangeToProfile('set_currency_to_tier', ['Currency 0', '4'],
+                    test_consts.kTestProfileName)
+        AssertEqual(num_compactions, 0)
+        # Compacted once the changes file grows past twice its compacted size
+        while (num_compactions == 0):
+            AssertTrue(os.path.getsize(changes_path) <= 2 * compacted_size)
+            profile_changes.AddChangeToProfile('set_currency_to_tier', ['Currency 0', '5'],
+                    test_consts.kTestProfileName)
+    finally:
+        profile_changes.CompactProfileChanges = compact_profile_changes_function
+    AssertEqual(os.path.getsize(changes_path), compacted_size)
+    AssertEqual(len(file_helper.ReadFile(changes_path, strip=True, discard_empty_lines=True)),
+                num_changes)
+    print('TestLargeChangesJournal passed!')
+
 def main():
     TestCreateOrderedDictChains()
     TestJoinParamsDoubleQuotes()
@@ -146,6 +231,8 @@ def main():
     TestParseChangesFile()
     TestConvertChangesDictTo()
     TestAddChangeToChangesFile()
+    TestChangesJournal()
+    TestLargeChangesJournal()
     test_helper.TearDown()
     print('All tests passed!')
 
@@ -0,0 +1,131 @@
+'''
+This file defines the class RuleMatchIndex, which finds the rule matching an item without
+checking every rule of the filter.
+
+Every rule with a Class or BaseType condition using the '' (substring) or '==' operator is
+bucketed by the values of that condition (BaseType preferred, since it is more selective).
+Such a rule can only match an item if one of its values is a substring of the item's value,
+so the candidate rules for an item are found by looking up every substring of the item's
+BaseType and Class (of the lengths present in the buckets).  All other rules are candidates
+for every item.  Candidates are then checked with RuleMatchesItem in filter order, so results
+are exactly those of checking every rule in order.
+
+The index must be rebuilt when rules are added, removed, or modified; IsCurrent detects this.
+'''
+
+from typing import List
+
+from hash_linked_list import HashLinkedList
+from item import Item, RuleMatchesItem
+import loot_filter_rule
+from loot_filter_rule import RuleVisibility, LootFilterRule
+import simple_parser
+from type_checker import CheckType
+
+# Indexed condition keywords, in order of preference
+kIndexedKeywords = ['BaseType', 'Class']
+
+kIndexedOperators = {'', '=='}
+
+class RuleMatchIndex:
+    '''
+    Member variables:
+     - self.rule_or_text_block_hll: HashLinkedList - the indexed filter's rule_or_text_block_hll
+     - self.num_hll_modifications: int - rule_or_text_block_hll.num_modifications when indexed
+     - self.num_rule_modifications: int - loot_filter_rule.g_num_rule_modifications when indexed
+     - self.rules: List[LootFilterRule] - all rules that could match any item, in filter order
+     - self.continue_flags: List[bool] - whether each rule in self.rules has a Continue line
+     - self.unindexed_rule_indices: List[int] - indices of rules that are candidates for all items
+     - self.buckets_map: dict mapping keyword to dict of value -> List[int] (rule indices)
+     - self.value_lengths_map: dict mapping keyword to sorted list of distinct value lengths
+    '''
+
+    # rule_or_text_block_hll is a LootFilter's HashLinkedList of RuleOrTextBlocks
+    def __init__(self, rule_or_text_block_hll: HashLinkedList):
+        CheckType(rule_or_text_block_hll, 'rule_or_text_block_hll', HashLinkedList)
+        self.rule_or_text_block_hll = rule_or_text_block_hll
+        self.num_hll_modifications = rule_or_text_block_hll.num_modifications
+        self.num_rule_modifications = loot_filter_rule.g_num_rule_modifications
+        self.rules = []
+        self.continue_flags = []
+        self.unindexed_rule_indices = []
+        self.buckets_map = {keyword : {} for keyword in kIndexedKeywords}
+        for _, rule_or_text_block in rule_or_text_block_hll:
+            if (not rule_or_text_block.is_rule):
+                continue
+            rule = rule_or_text_block.rule
+            ignore_rule_flag, conditions_list = rule.GetConditions()
+            # Disabled and ignored rules never match any item
+            if (RuleVisibility.IsDisabled(rule.visibility) or ignore_rule_flag):
+                continue
+            rule_index = len(self.rules)
+            self.rules.append(rule)
+            self.continue_flags.append('Continue' in rule.parsed_lines_hll)
+            self.AddRuleToBuckets(rule_index, conditions_list)
+        self.value_lengths_map = {keyword : sorted(set(len(value) for value in buckets))
+                for keyword, buckets in self.buckets_map.items()}
+    # End __init__
+
+    def AddRuleToBuckets(self, rule_index: int, conditions_list: list):
+        for indexed_keyword in kIndexedKeywords:
+            for keyword, op_string, values_list in conditions_list:
+                # Values that do not parse as strings are not compared by substring
+                if ((keyword == indexed_keyword) and (op_string in kIndexedOperators)
+                        and all(isinstance(simple_parser.ParseValueDynamic(value), str)
+                                for value in values_list)):
+                    buckets = self.buckets_map[indexed_keyword]
+                    for value in values_list:
+                        rule_indices = buckets.setdefault(value, [])
+                        # A value may be listed more than once in the same condition
+                        if ((len(rule_indices) == 0) or (rule_indices[-1] != rule_index)):
+                            rule_indices.append(rule_index)
+                    return
+        self.unindexed_rule_indices.append(rule_index)
+    # End AddRuleToBuckets
+
+    # Returns True if no rules have been added, removed, or modified since the index was built.
+    def IsCurrent(self, rule_or_text_block_hll: HashLinkedList) -> bool:
+        return ((rule_or_text_block_hll is self.rule_or_text_block_hll)
+                and (rule_or_text_block_hll.num_modifications == self.num_hll_modifications)
+                and (loot_filter_rule.g_num_rule_modifications == self.num_rule_modifications))
+    # End IsCurrent
+
+    # Returns the indices (into self.rules) of all rules that could match the item, sorted.
+    def GetCandidateRuleIndices(self, item: Item) -> List[int]:
+        CheckType(item, 'item', Item)
+        candidate_indices = set(self.unindexed_rule_indices)
+        for keyword in kIndexedKeywords:
+            buckets = self.buckets_map[keyword]
+            # Rules conditioned on a keyword the item does not have never match it
+            if ((len(buckets) == 0) or (keyword not in item.properties_map)):
+                continue
+            item_value = item.properties_map[keyword]
+            # Unusual item values are compared by RuleMatchesItem against all bucketed rules
+            if (not isinstance(simple_parser.ParseValueDynamic(item_value), str)):
+                for rule_indices in buckets.values():
+                    candidate_indices.update(rule_indices)
+                continue
+            for value_length in self.value_lengths_map[keyword]:
+                for start in range(len(item_value) - value_length + 1):
+                    rule_indices = buckets.get(item_value[start : start + value_length])
+                    if (rule_indices != None):
+                        candidate_indices.update(rule_indices)
+        return sorted(candidate_indices)
+    # End GetCandidateRuleIndices
+
+    # Returns the first matching rule without a Continue line, or if there is none,
+    # the last matching rule with a Continue line, or None if no rule matches.
+    def GetRuleMatchingItem(self, item: Item) -> LootFilterRule:
+        CheckType(item, 'item', Item)
+        matched_continue_rule = None
+        for rule_index in self.GetCandidateRuleIndices(item):
+            rule = self.rules[rule_index]
+            if (RuleMatchesItem(rule, item)):
+                if (self.continue_flags[rule_index]):
+                    matched_continue_rule = rule
+                else:
+                    return rule
+        return matched_continue_rule
+    # End GetRuleMatchingItem
+
+# End class RuleMatchIndex
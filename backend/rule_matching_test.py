@@ -1,7 +1,8 @@
-from item import Item, RuleMatchesItem
+from item import Item, OperatorFunc, RuleMatchesItem
 from item_test import ParseTestCases
 from loot_filter import InputFilterSource, LootFilter
-from loot_filter_rule import LootFilterRule
+from loot_filter_rule import RuleVisibility, LootFilterRule
+import simple_parser
 import test_consts
 from test_assertions import AssertEqual, AssertTrue, AssertFalse
 import test_helper
@@ -512,6 +513,76 @@ def TestRuleMatchesItem():
         AssertEqual(expected_match_flag, match_flag)
     print('TestRuleMatchesItem passed!')
 
+# Reference implementation of RuleMatchesItem, which parses rule conditions on every call
+def RuleMatchesItemUncompiled(rule: LootFilterRule, item: Item) -> bool:
+    ignore_rule_flag, rule_conditions_list = rule.GetConditions()
+    if (ignore_rule_flag):
+        return False
+    for keyword, op_string, values_list in rule_conditions_list:
+        if (keyword not in item.properties_map):
+            return False
+        elif (keyword == 'Sockets'):
+            if ((len(values_list) == 1) and (simple_parser.IsInt(values_list[0]))):
+                if (not OperatorFunc(op_string, item.properties_map['NumSockets'],
+                                     int(values_list[0]))):
+                    return False
+                continue
+            else:
+                return False
+        item_value_list = item.properties_map[keyword]
+        if (not isinstance(item_value_list, list)):
+            item_value_list = [item_value_list]
+        if (not any(OperatorFunc(op_string, item_value, rule_value)
+                    for item_value in item_value_list for rule_value in values_list)):
+            return False
+    return True
+
+# Returns the result of match_function(rule, item), or the type of the error it raises
+def MatchResult(match_function, rule: LootFilterRule, item: Item):
+    try:
+        return match_function(rule, item)
+    except Exception as e:
+        return type(e)
+
+# Rules exercising operators and value types that are rare in real filters
+kCompilerTestRuleTexts = ['Show\nRarity <= Rare', 'Show\nRarity Normal Magic', 'Show\nRarity Rar',
+        'Show\nRarity > Normal 2', 'Show\nQuality >= 5', 'Show\nQuality 0', 'Show\nCorrupted False',
+        'Show\nMirrored True', 'Show\nClass == "Wands"', 'Show\nClass "Currency" "Wand"',
+        'Show\nHasInfluence None', 'Show\nHasInfluence Shaper Redeemer', 'Show\nSockets >= 3',
+        'Show\nSockets 3GGG', 'Show\nItemLevel ! 85', 'Show\nItemLevel "Rare"',
+        'Show\nLinkedSockets >= Rare', 'Show\nBaseType "Imbued Wand" 5', 'Show\nBaseType',
+        'Show\nStackSize > 2\nClass Currency', 'Show\nGemLevel >= 4\nClass "Gems"',
+        'Show\nItemLevel >= 60\nItemLevel < 82', 'Show\nItemLevel == 81\nItemLevel >= 81',
+        'Show\nItemLevel > 80\nClass Armour\nItemLevel <= 83',
+        'Show\nItemLevel < 60\nItemLevel > 80', 'Show\nItemLevel >= 1 2\nItemLevel < 9',
+        'Show\nItemLevel >= 75\nItemLevel ! 82\nItemLevel < 84',
+        'Show\nItemLevel > 1\nItemLevel "Rare"', 'Show\nAreaLevel >= 68\nAreaLevel < 75']
+
+# Compares RuleMatchesItem (compiled conditions) with the uncompiled reference implementation,
+# including the type of any error raised, for all rules of the test filter and custom rules.
+def TestCompiledRuleConditions():
+    test_helper.SetUp()
+    loot_filter = LootFilter(test_consts.kTestProfileName, InputFilterSource.kDownload)
+    rules = [LootFilterRule(rule_text) for rule_text in kCompilerTestRuleTexts]
+    rules += [LootFilterRule(rule_text) for _, rule_text, _ in kTestCases]
+    rules += [rule_or_text_block.rule for _, rule_or_text_block in loot_filter.rule_or_text_block_hll
+              if rule_or_text_block.is_rule]
+    items = [Item(item_text) for item_text, _, _ in kTestCases]
+    items += [Item(item_text) for item_text, _, _ in
+              ParseTestCases(test_consts.kItemTestCasesInputFullpath)]
+    for item in items:
+        for rule in rules:
+            AssertEqual(MatchResult(RuleMatchesItem, rule, item),
+                        MatchResult(RuleMatchesItemUncompiled, rule, item))
+    # Compiled conditions must be discarded when the rule is modified
+    rule = LootFilterRule('Show # $type->test $tier->test\nQuality >= 5')
+    item = items[-1]
+    quality = item.properties_map['Quality']
+    AssertTrue(RuleMatchesItem(rule, item) == (quality >= 5))
+    rule.ModifyLine('Quality', '<', 5)
+    AssertTrue(RuleMatchesItem(rule, item) == (quality < 5))
+    print('TestCompiledRuleConditions passed!')
+
 # Missing features and issues with rule-item matching:
 #  - Magic items do not have their BaseType parsed (need BaseType list for this)
 #  - Rules about Sockets only match the number, not the color (number of links work)
@@ -529,9 +600,99 @@ def TestGetRuleMatchingItem():
                 (expected_matched_rule.type_tag, expected_matched_rule.tier_tag))
     print('TestGetRuleMatchingItem passed!')
 
+# Reference implementation of LootFilter.GetRuleMatchingItem, checking every rule in order
+def GetRuleMatchingItemLinear(loot_filter: LootFilter, item: Item) -> LootFilterRule:
+    matched_continue_rule = None
+    for tags, rule_or_text_block in loot_filter.rule_or_text_block_hll:
+        if (rule_or_text_block.is_rule):
+            rule = rule_or_text_block.rule
+            if (not RuleVisibility.IsDisabled(rule.visibility)
+                    and RuleMatchesItem(rule, item)):
+                if ('Continue' in rule.parsed_lines_hll):
+                    matched_continue_rule = rule
+                else:
+                    return rule
+    return matched_continue_rule
+
+# Generates simple items from the Class and BaseType conditions of the filter's rules,
+# including items whose BaseType or Class only contains the rule's value as a substring.
+def GenerateItems(loot_filter: LootFilter) -> list:
+    item_template = 'Item Class: {}\nRarity: {}\n{}\n--------\nItem Level: 80'
+    items = []
+    for tags, rule_or_text_block in loot_filter.rule_or_text_block_hll:
+        if (not rule_or_text_block.is_rule):
+            continue
+        rule = rule_or_text_block.rule
+        class_values = (rule.parsed_lines_hll['Class'][1]
+                if ('Class' in rule.parsed_lines_hll) else ['Stackable Currency'])
+        for base_type in list(rule.GetBaseTypeList())[:1]:
+            items.append(Item(item_template.format(class_values[0], 'Rare', base_type)))
+            items.append(Item(item_template.format(
+                    'Stackable ' + class_values[-1], 'Normal', 'Veiled ' + base_type)))
+    return items
+
+def TestRuleMatchIndex():
+    test_helper.SetUp()
+    loot_filter = LootFilter(test_consts.kTestProfileName, InputFilterSource.kDownload)
+    items = [Item(item_text) for item_text, _, _ in
+            ParseTestCases(test_consts.kItemTestCasesInputFullpath)]
+    items += GenerateItems(loot_filter)
+    for item in items:
+        AssertTrue(loot_filter.GetRuleMatchingItem(item) is
+                GetRuleMatchingItemLinear(loot_filter, item))
+    # Modifying rules must invalidate the index
+    chaos_orb_item = Item(
+            'Item Class: Stackable Currency\nRarity: Currency\nChaos Orb\n--------\nStack Size: 1/10')
+    chaos_orb_rule = loot_filter.GetRuleMatchingItem(chaos_orb_item)
+    rule_match_index = loot_filter.rule_match_index
+    loot_filter.GetRuleMatchingItem(items[0])
+    AssertTrue(loot_filter.rule_match_index is rule_match_index)
+    loot_filter.SetCurrencyToTier('Chaos Orb', 9)
+    loot_filter.AddBaseTypeRule('Imbued Wand', True, 1, 100)
+    for item in [chaos_orb_item] + items[::8]:
+        AssertTrue(loot_filter.GetRuleMatchingItem(item) is
+                GetRuleMatchingItemLinear(loot_filter, item))
+    AssertFalse(loot_filter.rule_match_index is rule_match_index)
+    new_chaos_orb_rule = loot_filter.GetRuleMatchingItem(chaos_orb_item)
+    AssertFalse(new_chaos_orb_rule is chaos_orb_rule)
+    AssertTrue('Chaos Orb' in new_chaos_orb_rule.GetBaseTypeList())
+    print('TestRuleMatchIndex passed!')
+
+# Lazily parsing the rules of a freshly loaded filter (which building the index does) must
+# not make the index stale, so several lookups only build the index once.
+def TestRuleMatchIndexLazyParsing():
+    test_helper.SetUp()
+    LootFilter(test_consts.kTestProfileName, InputFilterSource.kDownload).SaveToFile()
+    loot_filter = LootFilter(test_consts.kTestProfileName, InputFilterSource.kOutput)
+    items = [Item(item_text) for item_text, _, _ in
+            ParseTestCases(test_consts.kItemTestCasesInputFullpath)]
+    loot_filter.GetRuleMatchingItem(items[0])
+    rule_match_index = loot_filter.rule_match_index
+    for item in items[1:4]:
+        loot_filter.GetRuleMatchingItem(item)
+        AssertTrue(loot_filter.rule_match_index is rule_match_index)
+    AssertTrue(rule_match_index.IsCurrent(loot_filter.rule_or_text_block_hll))
+    print('TestRuleMatchIndexLazyParsing passed!')
+
+def TestGetRulesMatchingItems():
+    test_helper.SetUp()
+    loot_filter = LootFilter(test_consts.kTestProfileName, InputFilterSource.kDownload)
+    items = [Item(item_text) for item_text, _, _ in
+            ParseTestCases(test_consts.kItemTestCasesInputFullpath)]
+    matched_rules = loot_filter.GetRulesMatchingItems(items)
+    AssertEqual(len(matched_rules), len(items))
+    for item, matched_rule in zip(items, matched_rules):
+        AssertTrue(matched_rule is GetRuleMatchingItemLinear(loot_filter, item))
+    AssertEqual(loot_filter.GetRulesMatchingItems([]), [])
+    print('TestGetRulesMatchingItems passed!')
+
 def main():
     TestRuleMatchesItem()
+    TestCompiledRuleConditions()
     TestGetRuleMatchingItem()
+    TestRuleMatchIndex()
+    TestRuleMatchIndexLazyParsing()
+    TestGetRulesMatchingItems()
     test_helper.TearDown()
     print('All tests passed!')
 
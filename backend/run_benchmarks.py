@@ -0,0 +1,371 @@
+'''
+Benchmarks the main backend operations on each of the test filters in Resources/Test:
+ - read_and_classify_blocks: reading the filter, splitting it into blocks, and classifying
+   each block as a rule or text block (the filter-independent first stage of parsing)
+ - parse_download: constructing a LootFilter from the downloaded filter (cold parse, no snapshot)
+ - parse_output: constructing a LootFilter from the output filter (warm parse, from its snapshot)
+ - setter: <function call>: each filter-modifying call of backend_cli_test.kTestBatchString
+ - save_to_file: LootFilter.SaveToFile after applying all setters
+ - import_downloaded_filter: a full backend_cli.py call (in a new process), with a large
+   .changes file (every setter call, plus a call per flask and splinter base type, repeated)
+ - match_items: parsing N item texts and finding the rule matching each item
+
+Each benchmark is run several times, and the median, 10th and 90th percentile, and max
+times are reported.  The median times are then compared against a baseline (a JSON file
+previously written with --save-baseline): a benchmark is reported as a regression if its
+median is slower than the baseline median by more than the given threshold.
+Returns exit code 1 if any regressions are found.
+
+Only read_and_classify_blocks is run on filters that are not FilterBlade filters (such as
+SFH.filter), since DLF cannot load them.  Setters that are not applicable to a filter
+are skipped for that filter.
+
+Usage: python run_benchmarks.py [--repeats N] [--num-items N] [--filter SUBSTRING]
+                                [--baseline PATH] [--save-baseline] [--threshold FRACTION]
+Example:
+ > python run_benchmarks.py --save-baseline
+ > (make changes)
+ > python run_benchmarks.py
+'''
+
+import argparse
+import json
+import math
+import os
+import shlex
+import statistics
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List
+
+import backend_cli
+from backend_cli_function_info import kFunctionInfoMap
+import backend_cli_test
+import consts
+import file_helper
+import generate_item_test_cases
+from item import Item
+from loot_filter import ClassifyBlock, InputFilterSource, LootFilter
+import parse_helper
+import profile
+import resources
+import stage_timing
+import test_consts
+import test_helper
+
+kDefaultBaselineFullpath = os.path.join(consts.kCacheDirectory, 'benchmark_baseline.json')
+kDefaultNumRepeats = 10
+kDefaultNumItems = 1000
+kDefaultRegressionThreshold = 0.25
+
+# Median differences smaller than this are never reported as regressions (timer noise)
+kMinRegressionSeconds = 0.0005
+
+# Number of times the large .changes file repeats its function calls
+kNumChangesRepeats = 10
+
+kOldMiscFiltersDirectory = os.path.join(test_consts.kTestResourcesDirectory, 'OldMiscFilters')
+
+kBenchmarkFilterFullpaths = (
+        [test_consts.kTestBaseFilterFullpath,
+         os.path.join(test_consts.kTestResourcesDirectory,
+                      test_consts.kTestNonFilterBladeBaseFilterFilename)]
+        + sorted(file_helper.ListFilesInDirectory(kOldMiscFiltersDirectory, fullpath=True)))
+
+kItemTextFullpaths = [test_consts.kTestItemsFullpath,
+                      os.path.join(test_consts.kTestItemDirectory, 'sample_items.txt')]
+
+# Filter-modifying function calls of kTestBatchString, in order (profile name omitted).
+# Calls to functions no longer in kFunctionInfoMap are skipped.
+def GetSetterCalls() -> List[str]:
+    setter_calls = []
+    for function_call in backend_cli_test.kTestBatchString.split('\n'):
+        function_name = shlex.split(function_call)[0]
+        if ((function_name in kFunctionInfoMap)
+                and kFunctionInfoMap[function_name]['ModifiesFilter']):
+            setter_calls.append(function_call)
+    return setter_calls
+# End GetSetterCalls
+
+kSetterCalls = GetSetterCalls()
+
+# ============================== Statistics ==============================
+
+# Returns the given percentile (0 to 100) of the given sorted samples,
+# interpolating linearly between the closest ranks.
+def Percentile(sorted_samples: List[float], percentile: float) -> float:
+    position = (len(sorted_samples) - 1) * percentile / 100
+    lower_index = math.floor(position)
+    upper_index = math.ceil(position)
+    return (sorted_samples[lower_index]
+            + (sorted_samples[upper_index] - sorted_samples[lower_index])
+            * (position - lower_index))
+# End Percentile
+
+# Returns a dict of summary statistics (in seconds) of the given samples
+def ComputeStats(samples: List[float]) -> Dict[str, float]:
+    sorted_samples = sorted(samples)
+    return {'median' : statistics.median(sorted_samples),
+            'p10' : Percentile(sorted_samples, 10),
+            'p90' : Percentile(sorted_samples, 90),
+            'max' : sorted_samples[-1],
+            'num_samples' : len(sorted_samples)}
+# End ComputeStats
+
+# Calls the given function (without arguments) num_repeats times,
+# returning the time taken by each call.  setup_function, if given, is called
+# (untimed) before each call.
+def TimeCalls(function: Callable, num_repeats: int,
+              setup_function: Callable or None = None) -> List[float]:
+    samples = []
+    for _ in range(num_repeats):
+        if (setup_function != None):
+            setup_function()
+        start_time = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start_time)
+    return samples
+# End TimeCalls
+
+# ============================== Benchmarks ==============================
+
+# Creates the test profile with the given filter as its downloaded filter.
+# Note: the filter is copied, since importing the filter removes the downloaded filter.
+def SetUpProfile(filter_fullpath: str):
+    test_helper.TearDown()
+    os.makedirs(test_consts.kTestProfileDownloadDirectory, exist_ok=True)
+    os.makedirs(test_consts.kTestProfilePathOfExileDirectory, exist_ok=True)
+    profile_config_values = dict(test_consts.kTestProfileConfigValues)
+    profile_config_values['DownloadedLootFilterFilename'] = os.path.basename(filter_fullpath)
+    profile_obj = profile.CreateNewProfile(test_consts.kTestProfileName, profile_config_values)
+    file_helper.CopyFile(test_consts.kTestProfileRulesFullpath, profile_obj.rules_path)
+    CopyDownloadedFilter(filter_fullpath)
+# End SetUpProfile
+
+def CopyDownloadedFilter(filter_fullpath: str):
+    file_helper.CopyFile(filter_fullpath, os.path.join(
+            test_consts.kTestProfileDownloadDirectory, os.path.basename(filter_fullpath)))
+# End CopyDownloadedFilter
+
+# Applies the given function call (profile name omitted) to the loot filter, without
+# writing its output, saving the filter, or updating the .changes file.
+def ApplyFunctionCall(loot_filter: LootFilter, function_call: str):
+    function_tokens = shlex.split(function_call)
+    backend_cli.g_command_handlers[function_tokens[0]](loot_filter, function_tokens[1:])
+# End ApplyFunctionCall
+
+# Returns the subset of kSetterCalls that can be applied to the given loot filter
+def GetApplicableSetterCalls(loot_filter: LootFilter) -> List[str]:
+    applicable_setter_calls = []
+    for setter_call in kSetterCalls:
+        try:
+            ApplyFunctionCall(loot_filter, setter_call)
+            applicable_setter_calls.append(setter_call)
+        except Exception:
+            pass
+    return applicable_setter_calls
+# End GetApplicableSetterCalls
+
+# Returns the lines of a large .changes file made of the given setter calls
+# and a call per flask and splinter base type, repeated kNumChangesRepeats times.
+def GenerateChangesLines(setter_calls: List[str]) -> List[str]:
+    base_type_calls = (
+            ['set_flask_visibility "{}" 1 0'.format(flask_base_type)
+             for flask_base_type in resources.kAllFlaskTypes]
+            + ['set_splinter_min_visible_stack_size "{}" 3'.format(splinter_base_type)
+               for splinter_base_type in file_helper.ReadFile(os.path.join(
+                       consts.kResourcesDirectory, 'splinter_base_types.txt'),
+                       strip=True, discard_empty_lines=True)])
+    return (setter_calls + base_type_calls) * kNumChangesRepeats
+# End GenerateChangesLines
+
+def IsFilterBladeFilter(filter_fullpath: str) -> bool:
+    header_lines = file_helper.ReadFile(filter_fullpath, strip=True, max_num_lines=100)
+    return parse_helper.IsSubstringInLines(consts.kFilterBladeHeaderIdentifier, header_lines)
+# End IsFilterBladeFilter
+
+def ReadAndClassifyBlocks(filter_fullpath: str):
+    for block in file_helper.IterBlocks(filter_fullpath):
+        ClassifyBlock(block)
+# End ReadAndClassifyBlocks
+
+# Returns the item texts used for item matching, repeated up to num_items items
+def GetItemTexts(num_items: int) -> List[str]:
+    item_texts = []
+    for item_text_fullpath in kItemTextFullpaths:
+        item_texts.extend(generate_item_test_cases.ParseSampleItemsTxt(item_text_fullpath))
+    return [item_texts[i % len(item_texts)] for i in range(num_items)]
+# End GetItemTexts
+
+# Runs all benchmarks on the given filter, adding the samples of each benchmark
+# to the given samples dict, keyed by "<filter filename>: <benchmark name>".
+# Also prints the median time of each stage of the cold parse.
+def RunFilterBenchmarks(filter_fullpath: str, num_repeats: int, num_items: int,
+                        samples_dict: Dict[str, List[float]]):
+    filter_name = os.path.basename(filter_fullpath)
+    print('Benchmarking {} ...'.format(filter_name))
+    samples_dict[filter_name + ': read_and_classify_blocks'] = TimeCalls(
+            lambda: ReadAndClassifyBlocks(filter_fullpath), num_repeats)
+    if (not IsFilterBladeFilter(filter_fullpath)):
+        print('  not a FilterBlade filter, skipping remaining benchmarks')
+        return
+    SetUpProfile(filter_fullpath)
+    # Cold parse, recording stage times
+    stage_samples_dict = {}
+    def ParseDownloadedFilter():
+        stage_timing.ResetTimings()
+        LootFilter(test_consts.kTestProfileName, InputFilterSource.kDownload)
+        for stage_name, seconds in stage_timing.GetStageTimes():
+            stage_samples_dict.setdefault(stage_name, []).append(seconds)
+    # End ParseDownloadedFilter
+    stage_timing.EnableTiming(True)
+    try:
+        samples_dict[filter_name + ': parse_download'] = TimeCalls(
+                ParseDownloadedFilter, num_repeats,
+                lambda: CopyDownloadedFilter(filter_fullpath))
+    finally:
+        stage_timing.EnableTiming(False)
+    print('  parse_download stages (median ms): ' + ', '.join(
+            '{} {:.1f}'.format(stage_name, statistics.median(stage_samples) * 1000)
+            for stage_name, stage_samples in stage_samples_dict.items()))
+    # Import (without profile changes) to create the output filter, then
+    # construct a LootFilter from it once, which saves the snapshot used by warm parses
+    CopyDownloadedFilter(filter_fullpath)
+    loot_filter = LootFilter(test_consts.kTestProfileName, InputFilterSource.kDownload)
+    loot_filter.SaveToFile()
+    LootFilter(test_consts.kTestProfileName, InputFilterSource.kOutput)
+    samples_dict[filter_name + ': parse_output'] = TimeCalls(
+            lambda: LootFilter(test_consts.kTestProfileName, InputFilterSource.kOutput),
+            num_repeats)
+    # Setters and SaveToFile
+    loot_filter = LootFilter(test_consts.kTestProfileName, InputFilterSource.kOutput)
+    setter_calls = GetApplicableSetterCalls(loot_filter)
+    for setter_call in setter_calls:
+        samples_dict[filter_name + ': setter: ' + setter_call] = []
+    for _ in range(num_repeats):
+        for setter_call in setter_calls:
+            start_time = time.perf_counter()
+            ApplyFunctionCall(loot_filter, setter_call)
+            samples_dict[filter_name + ': setter: ' + setter_call].append(
+                    time.perf_counter() - start_time)
+    samples_dict[filter_name + ': save_to_file'] = TimeCalls(
+            loot_filter.SaveToFile, num_repeats,
+            lambda: [ApplyFunctionCall(loot_filter, setter_call)
+                     for setter_call in setter_calls])
+    # Full import_downloaded_filter call, with a large .changes file
+    changes_lines = GenerateChangesLines(setter_calls)
+    changes_fullpath = loot_filter.profile_obj.config_values['ChangesFullpath']
+    def PrepareImport():
+        CopyDownloadedFilter(filter_fullpath)
+        file_helper.WriteToFile(changes_lines, changes_fullpath)
+    # End PrepareImport
+    def ImportDownloadedFilter():
+        subprocess.run([sys.executable, 'backend_cli.py', 'import_downloaded_filter',
+                        test_consts.kTestProfileName],
+                       cwd=consts.kBackendDirectory, stdout=subprocess.DEVNULL, check=True)
+    # End ImportDownloadedFilter
+    samples_dict['{}: import_downloaded_filter ({} changes)'.format(
+            filter_name, len(changes_lines))] = TimeCalls(
+                    ImportDownloadedFilter, num_repeats, PrepareImport)
+    # Item matching
+    item_texts = GetItemTexts(num_items)
+    loot_filter = LootFilter(test_consts.kTestProfileName, InputFilterSource.kOutput)
+    # The rule match index is built on the first match, so match once before timing
+    loot_filter.GetRuleMatchingItem(Item(item_texts[0]))
+    samples_dict['{}: match_items ({} items)'.format(filter_name, num_items)] = TimeCalls(
+            lambda: [loot_filter.GetRuleMatchingItem(Item(item_text))
+                     for item_text in item_texts],
+            num_repeats)
+    test_helper.TearDown()
+# End RunFilterBenchmarks
+
+# ============================== Reporting ==============================
+
+def PrintStats(stats_dict: Dict[str, Dict[str, float]]):
+    name_width = max(len(benchmark_name) for benchmark_name in stats_dict)
+    print('{}  {:>10} {:>10} {:>10} {:>10}'.format(
+            'Benchmark'.ljust(name_width), 'median ms', 'p10 ms', 'p90 ms', 'max ms'))
+    for benchmark_name, stats in stats_dict.items():
+        print('{}  {:10.2f} {:10.2f} {:10.2f} {:10.2f}'.format(
+                benchmark_name.ljust(name_width), stats['median'] * 1000, stats['p10'] * 1000,
+                stats['p90'] * 1000, stats['max'] * 1000))
+# End PrintStats
+
+# Compares median times against the baseline, printing the differences,
+# and returns the names of the benchmarks that regressed by more than the threshold.
+def CompareToBaseline(stats_dict: Dict[str, Dict[str, float]],
+                      baseline_stats_dict: Dict[str, Dict[str, float]],
+                      regression_threshold: float) -> List[str]:
+    regressed_benchmark_names = []
+    for benchmark_name, stats in stats_dict.items():
+        if (benchmark_name not in baseline_stats_dict):
+            print('{}: not in baseline'.format(benchmark_name))
+            continue
+        median = stats['median']
+        baseline_median = baseline_stats_dict[benchmark_name]['median']
+        relative_change = (median - baseline_median) / baseline_median if baseline_median else 0
+        regressed_flag = ((relative_change > regression_threshold)
+                          and (median - baseline_median > kMinRegressionSeconds))
+        if (regressed_flag):
+            regressed_benchmark_names.append(benchmark_name)
+        print('{}: {:.2f} ms -> {:.2f} ms ({:+.1f}%){}'.format(
+                benchmark_name, baseline_median * 1000, median * 1000, relative_change * 100,
+                '  REGRESSION' if regressed_flag else ''))
+    return regressed_benchmark_names
+# End CompareToBaseline
+
+def ParseArguments():
+    parser = argparse.ArgumentParser(
+            description='Benchmarks backend operations on the test filters.')
+    parser.add_argument('--repeats', type=int, default=kDefaultNumRepeats,
+                        help='number of times each benchmark is run')
+    parser.add_argument('--num-items', type=int, default=kDefaultNumItems,
+                        help='number of items matched in the match_items benchmark')
+    parser.add_argument('--filter', default='',
+                        help='only benchmark filters whose filename contains this string')
+    parser.add_argument('--baseline', default=kDefaultBaselineFullpath,
+                        help='baseline JSON file to compare against or save to')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='save the results as the new baseline instead of comparing')
+    parser.add_argument('--threshold', type=float, default=kDefaultRegressionThreshold,
+                        help='relative median slowdown reported as a regression (0.25 = 25%%)')
+    return parser.parse_args()
+# End ParseArguments
+
+def main():
+    args = ParseArguments()
+    samples_dict = {}
+    for filter_fullpath in kBenchmarkFilterFullpaths:
+        if (args.filter in os.path.basename(filter_fullpath)):
+            RunFilterBenchmarks(filter_fullpath, args.repeats, args.num_items, samples_dict)
+    stats_dict = {benchmark_name : ComputeStats(samples)
+                  for benchmark_name, samples in samples_dict.items()}
+    print()
+    PrintStats(stats_dict)
+    print()
+    if (args.save_baseline):
+        file_helper.WriteToFile(json.dumps(stats_dict, indent=1), args.baseline)
+        print('Saved baseline to {}'.format(args.baseline))
+        return
+    if (not os.path.isfile(args.baseline)):
+        print('No baseline found at {} (run with --save-baseline to create it)'.format(
+                args.baseline))
+        return
+    with open(args.baseline, encoding='utf-8') as baseline_file:
+        baseline_stats_dict = json.load(baseline_file)
+    print('Comparing median times against baseline {} (threshold: {:.0f}%)'.format(
+            args.baseline, args.threshold * 100))
+    regressed_benchmark_names = CompareToBaseline(
+            stats_dict, baseline_stats_dict, args.threshold)
+    print()
+    if (len(regressed_benchmark_names) > 0):
+        print('Error: {} benchmarks regressed:'.format(len(regressed_benchmark_names)))
+        for benchmark_name in regressed_benchmark_names:
+            print(' • {}'.format(benchmark_name))
+        sys.exit(1)
+    print('No regressions found.')
+# End main
+
+if (__name__ == '__main__'):
+    main()
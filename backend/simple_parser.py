@@ -1,11 +1,14 @@
 '''
  - ParseFromTemplate(s: str, template: str) -> Tuple[bool, List[str]]
+ - CompileTemplate(template: str) -> re.Pattern
+ - ParseFromTemplateInterpreted(s: str, template: str) -> Tuple[bool, List[str]]
  - ParseEnclosedBy(line: str, start_seq: str, end_seq: str = None) -> List[str]
  - IsInt(s: str or int) -> bool
  - ParseInts(line: str or int) -> List[int]
  - ParseValueDynamic(s: Any) -> Any
 '''
 
+import re
 from typing import List, Tuple, Any
 
 from type_checker import CheckType
@@ -14,6 +17,9 @@ kWildcardMatchString = '{}'
 kWildcardIgnoreString = '{~}'
 kTerminationChar = '*'
 
+# Maps each template to its compiled regular expression (see CompileTemplate)
+g_compiled_templates = {}
+
 # Returns (is_wildcard: bool, is_match: bool, wildcard_length: int) triplet
 def IsWildcard(template: str, index: int) -> Tuple[bool, bool, int]:
     CheckType(template, 'template', str)
@@ -34,6 +40,51 @@ def IsWildcard(template: str, index: int) -> Tuple[bool, bool, int]:
 # Returns the pair: parse_success, parse_result_list
 # Example: ParseFromTemplate("abc:xyz", "{}:{~}") -> true, ["abc"]
 def ParseFromTemplate(s: str, template: str) -> Tuple[bool, List[str]]:
+    CheckType(s, 's', str)
+    CheckType(template, 'template', str)
+    match = CompileTemplate(template).fullmatch(s + kTerminationChar)
+    if (match == None):
+        return False, []
+    return True, list(match.groups())
+# End ParseFromTemplate
+
+# Returns a regular expression that matches s + kTerminationChar exactly when
+# ParseFromTemplate(s, template) succeeds, with the parse result as its groups.
+# Compiled templates are cached, so each template is only compiled once.
+#
+# A wildcard never backtracks: it matches characters up to the first occurrence of the character
+# following it in the template, which is then matched.  Hence a wildcard followed by the character
+# c is equivalent to '[^c]*c'.  (The template always ends with kTerminationChar, so every wildcard
+# is followed by a character.)  Consecutive wildcards behave like the last of them alone.
+def CompileTemplate(template: str) -> re.Pattern:
+    CheckType(template, 'template', str)
+    compiled_template = g_compiled_templates.get(template)
+    if (compiled_template != None):
+        return compiled_template
+    terminated_template = template + kTerminationChar
+    pattern = ''
+    wildcard_is_match = None  # None if not in a wildcard, otherwise whether it is a match wildcard
+    template_index = 0
+    while (template_index < len(terminated_template)):
+        is_wildcard, is_match, wc_length = IsWildcard(terminated_template, template_index)
+        if (is_wildcard):
+            wildcard_is_match = is_match
+            template_index += wc_length
+            continue
+        c = re.escape(terminated_template[template_index])
+        if (wildcard_is_match != None):
+            pattern += ('([^{}]*)' if wildcard_is_match else '[^{}]*').format(c)
+            wildcard_is_match = None
+        pattern += c
+        template_index += 1
+    compiled_template = re.compile(pattern)
+    g_compiled_templates[template] = compiled_template
+    return compiled_template
+# End CompileTemplate
+
+# Reference implementation of ParseFromTemplate, which interprets the template directly
+# (used to test the compiled templates).
+def ParseFromTemplateInterpreted(s: str, template: str) -> Tuple[bool, List[str]]:
     CheckType(s, 's', str)
     CheckType(template, 'template', str)
     # The logic is much simpler if we append an identical character to both strings,
@@ -78,7 +129,7 @@ def ParseFromTemplate(s: str, template: str) -> Tuple[bool, List[str]]:
     if (in_token and keep_token):
         token_list.append(current_token)
     return True, token_list
-# End ParseFromTemplate
+# End ParseFromTemplateInterpreted
 
 # Example: parsing the string 'BaseType "Leather Belt" "Two-Stone Ring" "Agate Amulet"'
 # with start_seq = '"' yields ['Leather Belt', 'Two-Stone Ring', 'Agate Amulet'].
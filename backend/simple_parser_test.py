@@ -2,51 +2,52 @@ import simple_parser
 
 from test_assertions import AssertEqual, AssertTrue, AssertFalse
 
-def TestParseFromTemplate():
+# Runs with both the compiled (default) and interpreted implementations of ParseFromTemplate.
+def TestParseFromTemplate(parse_function=simple_parser.ParseFromTemplate):
     # Very simple parse: single item
     text = 'hello'
     template = '{}'
-    success, result = simple_parser.ParseFromTemplate(text, template)
+    success, result = parse_function(text, template)
     AssertTrue(success)
     AssertEqual(result, ['hello'])
     # Very simple parse: single item enclosed by other characters
     text = '[(quick brown fox)]'
     template = '[({})]'
-    success, result = simple_parser.ParseFromTemplate(text, template)
+    success, result = parse_function(text, template)
     AssertTrue(success)
     AssertEqual(result, ['quick brown fox'])
     # Multi item parse
     text = 'One (two three four) five'
     template = '{}({}){}'
-    success, result = simple_parser.ParseFromTemplate(text, template)
+    success, result = parse_function(text, template)
     AssertTrue(success)
     AssertEqual(result, ['One ', 'two three four', ' five'])
     # Mismatch test - text missing item
     text = '123.456.789'
     template = '{}.{}.{}.'
-    success, result = simple_parser.ParseFromTemplate(text, template)
+    success, result = parse_function(text, template)
     AssertFalse(success)
     # Mismatch test - text with extra item
     text = '123.456.789'
     template = '{}.{}.'
-    success, result = simple_parser.ParseFromTemplate(text, template)
+    success, result = parse_function(text, template)
     AssertFalse(success)
     # Multi item parse with ignored portions
     text = 'The quick (brown fox, jumps, over the) lazy dog'
     template = '{~}({},{~},{}){~}'
-    success, result = simple_parser.ParseFromTemplate(text, template)
+    success, result = parse_function(text, template)
     AssertTrue(success)
     AssertEqual(result, ['brown fox', ' over the'])
     # Match wildcard can match empty string
     text = ''
     template = '{}'
-    success, result = simple_parser.ParseFromTemplate(text, template)
+    success, result = parse_function(text, template)
     AssertTrue(success)
     AssertEqual(result, [''])
     # Ignore wildcard can match empty string
     text = '-Word-'
     template = '{~}-{}-{~}'
-    success, result = simple_parser.ParseFromTemplate(text, template)
+    success, result = parse_function(text, template)
     AssertTrue(success)
     AssertEqual(result, ['Word'])
     # Rule tag parse
@@ -54,17 +55,32 @@ def TestParseFromTemplate():
     tier_tag = 'raredecoratorgear'
     text = 'Show # $type->{} $tier->{}'.format(type_tag, tier_tag)
     template = 'Show {~}$type->{} $tier->{} {~}'
-    success, result = simple_parser.ParseFromTemplate(text + ' ', template)
+    success, result = parse_function(text + ' ', template)
     AssertTrue(success)
     AssertEqual(result, [type_tag, tier_tag])
     text = 'Show # $type->{} $tier->{} $other_tag other text'.format(type_tag, tier_tag)
     template = 'Show {~}$type->{} $tier->{} {~}'
-    success, result = simple_parser.ParseFromTemplate(text + ' ', template)
+    success, result = parse_function(text + ' ', template)
     AssertTrue(success)
     AssertEqual(result, [type_tag, tier_tag])
-    print('TestParseFromTemplate passed!')
+    print('TestParseFromTemplate passed! ({})'.format(parse_function.__name__))
 # End TestParseFromTemplate
 
+# Checks that compiled templates parse exactly as the interpreted templates do,
+# including in cases where a backtracking regular expression search would differ.
+def TestCompiledTemplateDifferential():
+    templates = ['{}', '{~}', 'a{}', '{}a', '{}ab', '{}a{}b', '{}{~}x', '{~}{}x', '[{}](.{~})',
+                 '{} {}', '{}: {}', 'Show {~}$type->{} $tier->{} {~}', '{}\n{~}\n{}', 'x{']
+    strings = ['', 'a', 'b', 'x', 'ab', 'aab', 'aabb', 'abab', 'a b c', 'key: value: x',
+               '[x](.y)', '[](.)', 'Show # $type->a $tier->b ', 'one\ntwo\nthree', 'x{', 'a*b']
+    for template in templates:
+        for s in strings:
+            AssertEqual(simple_parser.ParseFromTemplate(s, template),
+                        simple_parser.ParseFromTemplateInterpreted(s, template))
+    # Compiled templates are cached
+    AssertTrue(simple_parser.CompileTemplate('{}ab') is simple_parser.CompileTemplate('{}ab'))
+    print('TestCompiledTemplateDifferential passed!')
+
 def TestParseEnclosedBy():
     # Basic case
     text = 'BaseType "Leather Belt" "Two-Stone Ring" "Agate Amulet"'
@@ -129,6 +145,8 @@ def TestParseValueDynamic():
 
 def main():
     TestParseFromTemplate()
+    TestParseFromTemplate(simple_parser.ParseFromTemplateInterpreted)
+    TestCompiledTemplateDifferential()
     TestParseEnclosedBy()
     TestParseEnclosedByOrSplitBy()
     TestIsInt()
@@ -0,0 +1,154 @@
+'''
+Opt-in timing of the stages of a backend_cli call: module import, profile load, filter
+reading and parsing, import changes, handler dispatch, saving the filter, and updating the
+.changes file.
+
+Timing is disabled by default.  While disabled, TimeStage and TimedIterator add no
+measurable overhead.  When enabled (see backend_cli.main_impl), the time spent in each
+stage is accumulated over the call (a stage may be entered several times, e.g. when rules
+are parsed on first access), and WriteTimings appends one line per call to the timings file.
+Each line is a JSON object:
+ {"time": <str>, "call": <List[str]>, "total_seconds": <float>,
+  "stages": [[<stage_name: str>, <seconds: float>], ...]}
+with stages listed in the order they were first completed.  Stages may contain other
+stages (e.g. "dispatch_handler" contains "save_filter"), so stage times do not add up
+to the total.
+
+Functions:
+ - EnableTiming(enable_flag: bool)
+ - IsTimingEnabled() -> bool
+ - ResetTimings()
+ - AddStageTime(stage_name: str, seconds: float)
+ - TimeStage(stage_name: str) -> context manager
+ - TimedIterator(stage_name: str, iterable) -> generator
+ - GetStageTimes() -> List[Tuple[str, float]]
+ - WriteTimings(call_arguments: List[str], total_seconds: float, timings_fullpath: str)
+ - ImportCProfile() -> module
+ - RunWithCProfile(function, stats_fullpath: str)
+'''
+
+import contextlib
+import datetime
+import importlib.util
+import json
+import os.path
+import sys
+import sysconfig
+import time
+from typing import List, Tuple
+
+import file_helper
+from type_checker import CheckType
+
+g_timing_enabled = False
+
+# Maps stage name to accumulated seconds, in order of first completion
+g_stage_seconds = {}
+
+def EnableTiming(enable_flag: bool):
+    CheckType(enable_flag, 'enable_flag', bool)
+    global g_timing_enabled
+    g_timing_enabled = enable_flag
+# End EnableTiming
+
+def IsTimingEnabled() -> bool:
+    return g_timing_enabled
+# End IsTimingEnabled
+
+def ResetTimings():
+    g_stage_seconds.clear()
+# End ResetTimings
+
+# Note: no type checks here, since this may be called once per parsed rule
+def AddStageTime(stage_name: str, seconds: float):
+    g_stage_seconds[stage_name] = g_stage_seconds.get(stage_name, 0.0) + seconds
+# End AddStageTime
+
+# Context manager adding the time spent in its body to the given stage, if timing is enabled.
+# Example:
+#   with stage_timing.TimeStage('save_filter'):
+#       loot_filter.SaveToFile()
+@contextlib.contextmanager
+def TimeStage(stage_name: str):
+    if (not g_timing_enabled):
+        yield
+        return
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        AddStageTime(stage_name, time.perf_counter() - start_time)
+# End TimeStage
+
+# Yields the items of the given iterable, adding the time spent producing each item to the
+# given stage, if timing is enabled.  (Used to time a generator separately from the loop
+# consuming it, such as reading blocks from a file while parsing them.)
+def TimedIterator(stage_name: str, iterable):
+    if (not g_timing_enabled):
+        yield from iterable
+        return
+    iterator = iter(iterable)
+    while (True):
+        start_time = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            AddStageTime(stage_name, time.perf_counter() - start_time)
+            return
+        AddStageTime(stage_name, time.perf_counter() - start_time)
+        yield item
+# End TimedIterator
+
+def GetStageTimes() -> List[Tuple[str, float]]:
+    return list(g_stage_seconds.items())
+# End GetStageTimes
+
+# Appends the recorded stage times as a single JSON line to the given file.
+# call_arguments describes the call, e.g. the command-line arguments.
+def WriteTimings(call_arguments: List[str], total_seconds: float, timings_fullpath: str):
+    CheckType(call_arguments, 'call_arguments', list, str)
+    CheckType(total_seconds, 'total_seconds', float)
+    CheckType(timings_fullpath, 'timings_fullpath', str)
+    timings_dict = {'time' : datetime.datetime.now().isoformat(timespec='seconds'),
+                    'call' : call_arguments,
+                    'total_seconds' : round(total_seconds, 6),
+                    'stages' : [[stage_name, round(seconds, 6)]
+                                for stage_name, seconds in GetStageTimes()]}
+    file_helper.AppendToFile(json.dumps(timings_dict) + '\n', timings_fullpath)
+# End WriteTimings
+
+# Imports and returns the standard library cProfile module.  cProfile imports the standard
+# library "profile" module, which is shadowed by DLF's profile.py, so the standard library
+# module is loaded explicitly and swapped in for the duration of the import.
+# (Imported on demand, since profiling is rarely used.)
+def ImportCProfile():
+    if ('cProfile' in sys.modules):
+        return sys.modules['cProfile']
+    stdlib_profile_spec = importlib.util.spec_from_file_location(
+            'profile', os.path.join(sysconfig.get_paths()['stdlib'], 'profile.py'))
+    stdlib_profile_module = importlib.util.module_from_spec(stdlib_profile_spec)
+    stdlib_profile_spec.loader.exec_module(stdlib_profile_module)
+    dlf_profile_module = sys.modules.get('profile')
+    sys.modules['profile'] = stdlib_profile_module
+    try:
+        import cProfile
+    finally:
+        if (dlf_profile_module != None):
+            sys.modules['profile'] = dlf_profile_module
+        else:
+            del sys.modules['profile']
+    return cProfile
+# End ImportCProfile
+
+# Calls the given function (without arguments) under cProfile, then writes the profile stats
+# to the given file (readable with pstats, or tools such as snakeviz), even if it raises.
+def RunWithCProfile(function, stats_fullpath: str):
+    CheckType(stats_fullpath, 'stats_fullpath', str)
+    profiler = ImportCProfile().Profile()
+    profiler.enable()
+    try:
+        function()
+    finally:
+        profiler.disable()
+        profiler.dump_stats(stats_fullpath)
+# End RunWithCProfile
@@ -0,0 +1,85 @@
+import json
+import os.path
+
+import file_helper
+import stage_timing
+import test_consts
+import test_helper
+from test_assertions import AssertEqual, AssertTrue
+
+kTestTimingsFilepath = os.path.join(test_consts.kTestWorkingDirectory, 'test.timings')
+
+def TestDisabled():
+    stage_timing.EnableTiming(False)
+    stage_timing.ResetTimings()
+    with stage_timing.TimeStage('stage_a'):
+        pass
+    AssertEqual(list(stage_timing.TimedIterator('stage_b', range(3))), [0, 1, 2])
+    AssertEqual(stage_timing.GetStageTimes(), [])
+    print('TestDisabled passed!')
+
+def TestTimeStage():
+    stage_timing.EnableTiming(True)
+    stage_timing.ResetTimings()
+    for _ in range(3):
+        with stage_timing.TimeStage('stage_a'):
+            pass
+    with stage_timing.TimeStage('stage_b'):
+        with stage_timing.TimeStage('stage_c'):
+            pass
+    # Stages are listed in order of first completion, with repeated stages accumulated
+    AssertEqual([stage_name for stage_name, _ in stage_timing.GetStageTimes()],
+                ['stage_a', 'stage_c', 'stage_b'])
+    # Time is recorded even if the body raises
+    try:
+        with stage_timing.TimeStage('stage_d'):
+            raise RuntimeError('test error')
+    except RuntimeError:
+        pass
+    AssertEqual(stage_timing.GetStageTimes()[-1][0], 'stage_d')
+    stage_timing.EnableTiming(False)
+    print('TestTimeStage passed!')
+
+def TestTimedIterator():
+    stage_timing.EnableTiming(True)
+    stage_timing.ResetTimings()
+    consumed_items = []
+    for item in stage_timing.TimedIterator('produce', iter(['x', 'y', 'z'])):
+        with stage_timing.TimeStage('consume'):
+            consumed_items.append(item)
+    AssertEqual(consumed_items, ['x', 'y', 'z'])
+    AssertEqual(sorted(stage_name for stage_name, _ in stage_timing.GetStageTimes()),
+                ['consume', 'produce'])
+    stage_timing.EnableTiming(False)
+    print('TestTimedIterator passed!')
+
+def TestWriteTimings():
+    test_helper.TearDown()
+    stage_timing.EnableTiming(True)
+    for call_index in range(2):
+        stage_timing.ResetTimings()
+        stage_timing.AddStageTime('stage_a', 0.25)
+        stage_timing.AddStageTime('stage_a', 0.5)
+        stage_timing.WriteTimings(['call', str(call_index)], 1.0, kTestTimingsFilepath)
+    stage_timing.EnableTiming(False)
+    timings_lines = file_helper.ReadFile(kTestTimingsFilepath, strip=True, discard_empty_lines=True)
+    AssertEqual(len(timings_lines), 2)
+    for call_index, timings_line in enumerate(timings_lines):
+        timings_dict = json.loads(timings_line)
+        AssertEqual(timings_dict['call'], ['call', str(call_index)])
+        AssertEqual(timings_dict['total_seconds'], 1.0)
+        AssertEqual(timings_dict['stages'], [['stage_a', 0.75]])
+        AssertTrue('time' in timings_dict)
+    test_helper.TearDown()
+    print('TestWriteTimings passed!')
+
+def main():
+    TestDisabled()
+    TestTimeStage()
+    TestTimedIterator()
+    TestWriteTimings()
+    test_helper.TearDown()
+    print('All tests passed!')
+
+if (__name__ == '__main__'):
+    main()
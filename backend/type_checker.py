@@ -1,8 +1,30 @@
+import os
+
 import logger
 
+# Levels of type checking performed by CheckType and CheckTypesMatch:
+#  - kFull: every call performs its check
+#  - kDisabled: no checks are performed
+# The level is kFull unless set by the environment variable kTypeCheckLevelEnvironmentVariable
+# (which tests leave unset, so they always check fully), or by SetTypeCheckLevel.
+class TypeCheckLevel:
+    kFull = 'full'
+    kDisabled = 'disabled'
+
+    kLevelsList = [kFull, kDisabled]
+# End class TypeCheckLevel
+
+kTypeCheckLevelEnvironmentVariable = 'DLF_TYPE_CHECK_LEVEL'
+
+g_type_check_level = TypeCheckLevel.kFull
+# Equivalent to (g_type_check_level != TypeCheckLevel.kDisabled), checked by every call
+g_type_checks_enabled = True
+
 # Logs error and raises exception if variable is not an instance of required type
 # Note: can use a tuple of types for required_type to give multiple options
 def CheckType(variable, variable_name: str, required_type, required_inner_type=None):
+    if (not g_type_checks_enabled):
+        return
     if (required_inner_type != None):
         CheckType2(variable, variable_name, required_type, required_inner_type)
     elif (not isinstance(variable, required_type)):
@@ -51,9 +73,46 @@ def CheckType2(variable, variable_name: str, required_outer_type, required_inner
 
 # Only performs a shallow check, i.e. a list of strings and list of ints would return True
 def CheckTypesMatch(left, left_name: str, right, right_name: str):
+    if (not g_type_checks_enabled):
+        return
     if (type(left) != type(right)):
         error_message: str = 'types do not match; {} is: {} ({}), {} is: {} ({})'.format(
                 left_name, left, type(left).__name__, right_name, right, type(right).__name__)
         logger.Log('TypeError: ' + error_message)
         raise TypeError(error_message)
-# End CheckTypesMatch
\ No newline at end of file
+# End CheckTypesMatch
+
+# ============================== Type Check Levels ==============================
+
+# (CheckType2 is only used through CheckType, so it needs no check of its own.)
+def SetTypeCheckLevel(type_check_level: str):
+    global g_type_check_level, g_type_checks_enabled
+    if (type_check_level not in TypeCheckLevel.kLevelsList):
+        error_message: str = 'invalid type check level: "{}"; valid levels: {}'.format(
+                type_check_level, ', '.join(TypeCheckLevel.kLevelsList))
+        logger.Log('ValueError: ' + error_message)
+        raise ValueError(error_message)
+    g_type_check_level = type_check_level
+    g_type_checks_enabled = (type_check_level != TypeCheckLevel.kDisabled)
+# End SetTypeCheckLevel
+
+def GetTypeCheckLevel() -> str:
+    return g_type_check_level
+# End GetTypeCheckLevel
+
+# Sets the level given by the environment variable kTypeCheckLevelEnvironmentVariable, if set.
+# An invalid level is logged and ignored (leaving the level at kFull), so that a typo in the
+# environment variable cannot stop the backend from starting.
+def ApplyTypeCheckLevelEnvironmentVariable():
+    type_check_level = os.environ.get(kTypeCheckLevelEnvironmentVariable)
+    if (type_check_level == None):
+        return
+    if (type_check_level in TypeCheckLevel.kLevelsList):
+        SetTypeCheckLevel(type_check_level)
+    else:
+        SetTypeCheckLevel(TypeCheckLevel.kFull)
+        logger.Log('Warning: ignoring invalid type check level "{}" in environment variable {}'
+                   .format(type_check_level, kTypeCheckLevelEnvironmentVariable))
+# End ApplyTypeCheckLevelEnvironmentVariable
+
+ApplyTypeCheckLevelEnvironmentVariable()
@@ -1,6 +1,9 @@
-from type_checker import CheckType, CheckTypesMatch
+import os
 
-from test_assertions import AssertEqual, AssertFailure
+import type_checker
+from type_checker import CheckType, CheckTypesMatch, TypeCheckLevel
+
+from test_assertions import AssertEqual, AssertTrue, AssertFailure
 
 def TestCorrectTypes():
     # Single string
@@ -37,10 +40,47 @@ def TestTypesMatch():
         AssertFailure()
     print('TestTypesMatch passed!')
 
+# Returns True if CheckType raised a TypeError for the given arguments, False otherwise.
+# (All checks go through the same call site here.)
+def CheckTypeRaises(variable, required_type) -> bool:
+    try:
+        CheckType(variable, 'variable', required_type)
+    except TypeError:
+        return True
+    return False
+
+def TestTypeCheckLevels():
+    AssertEqual(type_checker.GetTypeCheckLevel(), TypeCheckLevel.kFull)
+    AssertEqual([CheckTypeRaises(5, str) for i in range(2)], [True, True])
+    # Disabled: no calls are checked
+    type_checker.SetTypeCheckLevel(TypeCheckLevel.kDisabled)
+    AssertEqual([CheckTypeRaises(5, str) for i in range(2)], [False, False])
+    CheckTypesMatch(5, 'an_integer', 'five', 'some_string')
+    # Invalid level (first_call was removed)
+    try:
+        type_checker.SetTypeCheckLevel('first_call')
+    except ValueError:  # this should happen
+        pass
+    else:  # this shouldn't happen
+        AssertFailure()
+    type_checker.SetTypeCheckLevel(TypeCheckLevel.kFull)
+    AssertTrue(CheckTypeRaises(5, str))
+    # Environment variable: valid level is set, invalid level leaves full checks
+    os.environ[type_checker.kTypeCheckLevelEnvironmentVariable] = TypeCheckLevel.kDisabled
+    type_checker.ApplyTypeCheckLevelEnvironmentVariable()
+    AssertEqual(type_checker.GetTypeCheckLevel(), TypeCheckLevel.kDisabled)
+    os.environ[type_checker.kTypeCheckLevelEnvironmentVariable] = 'dsiabled'
+    type_checker.ApplyTypeCheckLevelEnvironmentVariable()
+    AssertEqual(type_checker.GetTypeCheckLevel(), TypeCheckLevel.kFull)
+    del os.environ[type_checker.kTypeCheckLevelEnvironmentVariable]
+    AssertTrue(CheckTypeRaises(5, str))
+    print('TestTypeCheckLevels passed!')
+
 def main():
     TestCorrectTypes()
     TestIncorrectTypes()
     TestTypesMatch()
+    TestTypeCheckLevels()
 
 if (__name__ == '__main__'):
     main()
\ No newline at end of file